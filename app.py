@@ -3,165 +3,306 @@ Hackathon Platform - Flask Application
 A comprehensive platform for managing hackathon events
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-import mysql.connector
-from mysql.connector import Error
+from flask import (Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, Response,
+                   stream_with_context, has_request_context)
+import click
+import csv
 import hashlib
-import secrets
-from datetime import datetime, timedelta
+import io
+import json
+import math
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 import os
+import queue
+import random
+import time
+
+from config import load_config
+import db as db_module
+from db import ConnectionPool, SQLitePool, RecordingCursor, Error, IntegrityError
+from migrations import migrate, find_full_scans
+from dashboard_data import DashboardCache, load_dashboard
+from importer import ParticipantImporter
+from datagen import DataGenerator
+from cache import MemoryBackend, RedisBackend, PageCache
+from metrics import Metrics, QueryLog, InstrumentedConnection
+from profiler import SamplingProfiler
+from live import RankingsBroker, queue_delivery
+from scoring import ScoringScheme, CRITERIA, NORMALIZATIONS, evaluation_array, final_scores, require_numpy
+from assignment import plan_reviews
+from pagination import encode_cursor, decode_cursor, page_size, keyset_condition, keyset_params, split_page
+from search import SearchIndex, tokenize
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
-
-# MySQL database configuration
-app.config['DB_HOST'] = 'localhost'
-app.config['DB_USER'] = 'root'
-app.config['DB_PASSWORD'] = 'egy123456'
-app.config['DB_NAME'] = 'hackathon2'
+load_config(app)
+
+# Per-process resources, built on first use in each worker
+_pool = None
+_replica_pool = None
+_pool_pid = None
+dashboard_cache = None
+page_cache = None
+metrics = None
+profiler = None
+rankings_broker = None
+search_index = None
+
+# Most dashboards a worker keeps in memory
+DASHBOARD_CACHE_ENTRIES = 10000
+
+def make_cache_backend(max_entries):
+    """Build the cache store selected by CACHE_BACKEND"""
+    if app.config['CACHE_BACKEND'] == 'redis':
+        return RedisBackend(app.config['CACHE_REDIS_URL'])
+    return MemoryBackend(max_entries=max_entries)
+
+def caches_enabled():
+    """Whether every worker sees the cache invalidations of the others"""
+    return app.config['CACHE_BACKEND'] != 'memory' or app.config['WEB_CONCURRENCY'] <= 1
+
+def replica_configured():
+    return bool(app.config['DB_REPLICA_HOST']) and app.config['DB_BACKEND'] == 'mysql'
+
+def init_worker():
+    """Give this process its own caches and a fresh connection pool.
+
+    Called after a pre-fork server forks each worker: connections opened in
+    the parent must not be shared between processes.
+    """
+    global _pool, _replica_pool, _pool_pid, dashboard_cache, page_cache, metrics, profiler, rankings_broker, \
+        search_index
+    _pool = None
+    _replica_pool = None
+    _pool_pid = None
+    # A per-process cache would keep serving what another worker's write changed
+    enabled = caches_enabled()
+    if not enabled:
+        app.logger.warning('Page and dashboard caches are off: %s workers need CACHE_BACKEND=redis '
+                           'to share invalidations', app.config['WEB_CONCURRENCY'])
+    dashboard_cache = DashboardCache(make_cache_backend(DASHBOARD_CACHE_ENTRIES),
+                                     ttl=app.config['DASHBOARD_CACHE_TTL'] if enabled else 0)
+    page_cache = PageCache(make_cache_backend(app.config['CACHE_MAX_ENTRIES']),
+                           ttl=app.config['CACHE_TTL'] if enabled else 0,
+                           recent=app.config['READ_YOUR_WRITES_SECONDS'] if replica_configured() else 0)
+    metrics = Metrics(app.config['METRICS_DIR'] or os.path.join(app.instance_path, 'metrics'),
+                      gauges=lambda: pool_gauges())
+    profiler = SamplingProfiler(app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles'),
+                                interval=app.config['PROFILE_INTERVAL_MS'] / 1000,
+                                max_bytes=app.config['PROFILE_MAX_MB'] * 1024 * 1024,
+                                db_files=[db_module.__file__])
+    rankings_broker = RankingsBroker(lambda ids: rankings_versions(ids), lambda id: live_standings(id),
+                                     poll_interval=app.config['LIVE_RANKINGS_POLL_SECONDS'])
+    # MySQL searches its FULLTEXT indexes; SQLite gets an index in memory
+    search_index = SearchIndex(lambda: search_position(), lambda after: search_changes(after),
+                               lambda kind, ids: search_documents(kind, ids)) \
+        if app.config['DB_BACKEND'] == 'sqlite' else None
+
+def create_app(settings_file=None):
+    """Configure the application for serving and return it.
+
+    Routes are registered on the module-level app, so this re-reads the
+    configuration (optionally from settings_file), applies pending migrations
+    once and resets the per-process resources.
+    """
+    load_config(app, settings_file)
+    init_worker()
+    if app.config['MIGRATE_ON_START']:
+        with app.app_context():
+            init_db()
+        # Don't hand the parent's connections down to forked workers
+        get_pool().close_all()
+        if _replica_pool is not None:
+            _replica_pool.close_all()
+        init_worker()
+    return app
+
+init_worker()
 
 # Database helper functions
-def get_db():
-    """Get database connection"""
-    try:
-        db = mysql.connector.connect(
-            host=app.config['DB_HOST'],
-            user=app.config['DB_USER'],
-            password=app.config['DB_PASSWORD'],
-            database=app.config['DB_NAME']
-        )
-        return db
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        raise
+def mysql_pool(host, port):
+    return ConnectionPool(
+        size=app.config['DB_POOL_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        host=host,
+        port=port,
+        user=app.config['DB_USER'],
+        password=app.config['DB_PASSWORD'],
+        database=app.config['DB_NAME']
+    )
+
+def get_pool():
+    """Get the process-wide connection pool of the primary, creating it on first use"""
+    global _pool, _replica_pool, _pool_pid
+    # A pool inherited across fork() belongs to the parent; start a new one
+    if _pool is None or _pool_pid != os.getpid():
+        _pool_pid = os.getpid()
+        _replica_pool = None
+        if app.config['DB_BACKEND'] == 'sqlite':
+            _pool = SQLitePool(
+                app.config['SQLITE_PATH'] or os.path.join(app.instance_path, 'hackathon.sqlite3'),
+                timeout=app.config['DB_POOL_TIMEOUT']
+            )
+            return _pool
+        _pool = mysql_pool(app.config['DB_HOST'], app.config['DB_PORT'])
+    return _pool
+
+def get_replica_pool():
+    """Get the process-wide connection pool of the read replica"""
+    global _replica_pool
+    get_pool()
+    if _replica_pool is None:
+        _replica_pool = mysql_pool(app.config['DB_REPLICA_HOST'], app.config['DB_REPLICA_PORT'])
+    return _replica_pool
+
+def reads_from_replica():
+    """Whether this request's reads may go to the replica.
+
+    Only GET and HEAD requests read from it, and not for a while after the
+    session wrote something (see pin_to_primary), so users always see their
+    own changes.
+    """
+    return (replica_configured() and has_request_context()
+            and request.method in ('GET', 'HEAD')
+            and session.get('primary_until', 0) < time.time())
+
+def get_db(primary=False):
+    """Get the database connection for the current request.
+
+    Reads of GET requests are served by the replica when one is configured;
+    primary=True asks for the primary regardless.
+    """
+    replica = not primary and reads_from_replica()
+    key = 'replica_db' if replica else 'db'
+    if key not in g:
+        try:
+            db = (get_replica_pool() if replica else get_pool()).get()
+        except Error as e:
+            print(f"Error connecting to the database: {e}")
+            raise
+        # Within a request, time every statement into the request's query log
+        log = g.get('query_log')
+        setattr(g, key, InstrumentedConnection(db, log) if log is not None else db)
+    return getattr(g, key)
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """Return the request's connections to their pools"""
+    for key, pool in (('db', get_pool), ('replica_db', get_replica_pool)):
+        db = g.pop(key, None)
+        if db is not None:
+            pool().put(db.connection if isinstance(db, InstrumentedConnection) else db)
+
+def pool_gauges():
+    """This worker's numeric pool statistics, for /metrics"""
+    if _pool is None or _pool_pid != os.getpid():
+        return []
+    pools = [('primary', _pool)] + ([('replica', _replica_pool)] if _replica_pool is not None else [])
+    return [('hackathon_db_pool', {'pool': role, 'stat': name, 'pid': _pool_pid}, value)
+            for role, pool in pools
+            for name, value in pool.stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+# Request instrumentation
+@app.before_request
+def start_query_log():
+    g.query_log = QueryLog()
+
+@app.after_request
+def pin_to_primary(response):
+    """After a write, keep the session's reads on the primary until the replica has it"""
+    if replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        session['primary_until'] = time.time() + app.config['READ_YOUR_WRITES_SECONDS']
+    return response
+
+@app.after_request
+def add_server_timing(response):
+    """Report the request's database time so far, as browsers and the benchmark read it"""
+    log = g.get('query_log')
+    if log is not None:
+        g.response_status = response.status_code
+        response.headers.add('Server-Timing', f'db;dur={log.total * 1000:.3f};desc="{log.count} queries"')
+    return response
+
+@app.teardown_request
+def record_request_metrics(exception=None):
+    """Feed the finished request into the metrics; log slow and repeated statements.
+
+    Runs once the response has been sent, so streamed exports are measured in full.
+    """
+    log = g.pop('query_log', None)
+    if log is None:
+        return
+    route = request.endpoint or 'unmatched'
+    status = 500 if exception is not None else g.get('response_status', 500)
+    slow, repeated = metrics.observe_request(
+        route, request.method, status, time.perf_counter() - log.started, log,
+        app.config['SLOW_QUERY_MS'] / 1000, app.config['REPEATED_QUERY_THRESHOLD']
+    )
+    for sql, seconds in slow:
+        app.logger.warning('Slow query on %s (%.1f ms): %s', route, seconds * 1000, ' '.join(sql.split()))
+    for sql, count in repeated.items():
+        app.logger.warning('Statement ran %d times in one request on %s (N+1?): %s',
+                           count, route, ' '.join(sql.split()))
+
+def profiling_requested():
+    """Whether to profile this request: sampled, or asked for by an allowed user"""
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < 1 / rate:
+        return True
+    if 'X-Profile' in request.headers and 'user_id' in session:
+        allowed = {user_id.strip() for user_id in app.config['PROFILE_USERS'].split(',')}
+        return str(session['user_id']) in allowed
+    return False
+
+@app.before_request
+def start_profile():
+    if request.environ.get('hackathon.async_view') or not profiling_requested():
+        return
+    g.profile = profiler.start(request.endpoint or 'unmatched')
+
+@app.after_request
+def finish_profile(response):
+    """Write the request's profile; tell a user who asked for it where it went"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.finish(profile)
+        if 'X-Profile' in request.headers:
+            response.headers['X-Profile'] = profile.summary() + (f'; file={os.path.basename(path)}' if path else '')
+    return response
+
+@app.teardown_request
+def abandon_profile(exception=None):
+    # after_request is skipped when the view raised; keep the profile anyway
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.finish(profile)
 
 def init_db():
     """Initialize the database with schema"""
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(64) NOT NULL,
-            full_name VARCHAR(255) NOT NULL,
-            role VARCHAR(50) NOT NULL DEFAULT 'participant',
-            bio TEXT,
-            github_username VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Hackathons table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS hackathons (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            organizer_id INT NOT NULL,
-            title VARCHAR(255) NOT NULL,
-            description TEXT NOT NULL,
-            start_date TIMESTAMP NOT NULL,
-            end_date TIMESTAMP NOT NULL,
-            registration_deadline TIMESTAMP NOT NULL,
-            max_team_size INT DEFAULT 4,
-            min_team_size INT DEFAULT 1,
-            status VARCHAR(50) DEFAULT 'draft',
-            is_online BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (organizer_id) REFERENCES users(id)
-        )
-    ''')
-    
-    # Teams table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS teams (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            hackathon_id INT NOT NULL,
-            team_name VARCHAR(255) NOT NULL,
-            team_leader_id INT NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
-            FOREIGN KEY (team_leader_id) REFERENCES users(id),
-            UNIQUE(hackathon_id, team_name)
-        )
-    ''')
-    
-    # Team members table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS team_members (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            team_id INT NOT NULL,
-            user_id INT NOT NULL,
-            status VARCHAR(50) DEFAULT 'accepted',
-            role VARCHAR(50) DEFAULT 'member',
-            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (team_id) REFERENCES teams(id),
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            UNIQUE(team_id, user_id)
-        )
-    ''')
-    
-    # Projects table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS projects (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            team_id INT UNIQUE NOT NULL,
-            title VARCHAR(255) NOT NULL,
-            description TEXT NOT NULL,
-            github_url VARCHAR(500),
-            demo_url VARCHAR(500),
-            is_submitted BOOLEAN DEFAULT 0,
-            submitted_at TIMESTAMP NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (team_id) REFERENCES teams(id)
-        )
-    ''')
-    
-    # Jury assignments table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jury_assignments (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            hackathon_id INT NOT NULL,
-            jury_id INT NOT NULL,
-            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
-            FOREIGN KEY (jury_id) REFERENCES users(id),
-            UNIQUE(hackathon_id, jury_id)
-        )
-    ''')
-    
-    # Evaluations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS evaluations (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            project_id INT NOT NULL,
-            jury_id INT NOT NULL,
-            innovation_score FLOAT,
-            technical_score FLOAT,
-            presentation_score FLOAT,
-            usefulness_score FLOAT,
-            overall_score FLOAT,
-            comments TEXT,
-            is_submitted BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (project_id) REFERENCES projects(id),
-            FOREIGN KEY (jury_id) REFERENCES users(id),
-            UNIQUE(project_id, jury_id)
-        )
-    ''')
-    
-    db.commit()
+    # Bring the schema up to date
+    migrate(db, app.config['DB_BACKEND'])
 
     # Create sample data if database is empty
     cursor.execute('SELECT COUNT(*) as count FROM users')
     result = cursor.fetchone()
     if result['count'] == 0:
         create_sample_data(db)
+        reconcile_counters(db)
+
+    # Backfill the score aggregate for databases created before it existed
+    cursor.execute('''
+        SELECT (SELECT COUNT(*) FROM project_scores) as scored,
+               (SELECT COUNT(*) FROM evaluations) as evaluated
+    ''')
+    result = cursor.fetchone()
+    if result['scored'] == 0 and result['evaluated'] > 0:
+        rebuild_project_scores(db)
 
     cursor.close()
-    db.close()
 
 def create_sample_data(db):
     """Create sample data for demonstration"""
@@ -176,11 +317,10 @@ def create_sample_data(db):
         ('participant3@hack.com', hash_password('password123'), 'Charlie Designer', 'participant'),
     ]
 
-    for email, pwd_hash, name, role in users:
-        cursor.execute(
-            'INSERT INTO users (email, password_hash, full_name, role) VALUES (%s, %s, %s, %s)',
-            (email, pwd_hash, name, role)
-        )
+    cursor.executemany(
+        'INSERT INTO users (email, password_hash, full_name, role) VALUES (%s, %s, %s, %s)',
+        users
+    )
     
     # Create a sample hackathon
     cursor.execute('''
@@ -224,6 +364,338 @@ def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
+def refresh_project_score(cursor, project_id, hackathon_id=None):
+    """Recompute one project's score aggregate and its hackathon's ranks.
+
+    Runs on the caller's cursor so it commits together with the evaluation write.
+    Callers that know the project's hackathon pass it to save a lookup.
+    """
+    cursor.execute('''
+        INSERT INTO project_scores (project_id, hackathon_id, score_sum, score_count, avg_score)
+        SELECT p.id, t.hackathon_id,
+               COALESCE(SUM(e.overall_score), 0), COUNT(e.id), AVG(e.overall_score)
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        LEFT JOIN evaluations e ON p.id = e.project_id AND e.is_submitted = 1
+        WHERE p.id = %s
+        GROUP BY p.id, t.hackathon_id
+        ON DUPLICATE KEY UPDATE
+            score_sum = VALUES(score_sum),
+            score_count = VALUES(score_count),
+            avg_score = VALUES(avg_score)
+    ''', (project_id,))
+    if hackathon_id is None:
+        cursor.execute('SELECT hackathon_id FROM project_scores WHERE project_id = %s', (project_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        hackathon_id = row['hackathon_id']
+    refresh_ranks(cursor, hackathon_id)
+
+def refresh_project_scores(cursor, hackathon_id, project_ids):
+    """Recompute the score aggregate of several projects, then rank the hackathon once"""
+    if not project_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(project_ids))
+    cursor.execute(f'''
+        INSERT INTO project_scores (project_id, hackathon_id, score_sum, score_count, avg_score)
+        SELECT p.id, t.hackathon_id,
+               COALESCE(SUM(e.overall_score), 0), COUNT(e.id), AVG(e.overall_score)
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        LEFT JOIN evaluations e ON p.id = e.project_id AND e.is_submitted = 1
+        WHERE p.id IN ({placeholders})
+        GROUP BY p.id, t.hackathon_id
+        ON DUPLICATE KEY UPDATE
+            score_sum = VALUES(score_sum),
+            score_count = VALUES(score_count),
+            avg_score = VALUES(avg_score)
+    ''', tuple(project_ids))
+    refresh_ranks(cursor, hackathon_id)
+
+# Ranks the projects shown in the rankings (scored and submitted), writing
+# only the positions that moved. MySQL updates through a join; SQLite has
+# UPDATE ... FROM instead
+RANK_SQL = {
+    'mysql': '''
+        UPDATE project_scores ps
+        JOIN (
+            SELECT s.project_id, RANK() OVER (ORDER BY s.avg_score DESC) as position
+            FROM project_scores s
+            JOIN projects p ON s.project_id = p.id
+            WHERE s.hackathon_id = %s AND s.score_count > 0 AND p.is_submitted = 1
+        ) r ON ps.project_id = r.project_id
+        SET ps.rank_position = r.position
+        WHERE NOT ps.rank_position <=> r.position
+    ''',
+    'sqlite': '''
+        UPDATE project_scores
+        SET rank_position = r.position
+        FROM (
+            SELECT s.project_id, RANK() OVER (ORDER BY s.avg_score DESC) as position
+            FROM project_scores s
+            JOIN projects p ON s.project_id = p.id
+            WHERE s.hackathon_id = %s AND s.score_count > 0 AND p.is_submitted = 1
+        ) r
+        WHERE project_scores.project_id = r.project_id
+          AND project_scores.rank_position IS NOT r.position
+    ''',
+}
+
+def refresh_ranks(cursor, hackathon_id):
+    """Reassign rank positions within a hackathon from the stored averages.
+
+    A hackathon with its own scoring scheme is only marked stale: it is
+    rescored as a whole on the next read of its rankings (score_if_stale),
+    not inside every evaluation's transaction.
+    """
+    # Projects left out of the rankings: unscored or withdrawn
+    cursor.execute('''
+        UPDATE project_scores
+        SET rank_position = NULL
+        WHERE hackathon_id = %s AND rank_position IS NOT NULL
+          AND (score_count = 0 OR project_id IN (SELECT id FROM projects WHERE is_submitted = 0))
+    ''', (hackathon_id,))
+    scheme = scoring_scheme(cursor, hackathon_id)
+    if scheme.is_plain_mean:
+        cursor.execute(RANK_SQL[app.config['DB_BACKEND']], (hackathon_id,))
+    else:
+        cursor.execute('UPDATE hackathons SET scores_stale = 1 WHERE id = %s', (hackathon_id,))
+    touch_rankings(cursor, hackathon_id)
+
+def score_if_stale(hackathon_id):
+    """Rescore a hackathon whose evaluations changed since its scheme last ran.
+
+    Runs on the primary in a context of its own, so any read path (and the
+    live rankings thread) can call it. Concurrent readers queue on the
+    hackathon row and only the first one rescores. Returns whether this
+    call rescored.
+    """
+    rescored = False
+    with app.app_context():
+        db = get_db(primary=True)
+        cursor = db.cursor(dictionary=True)
+        cursor.execute('SELECT scores_stale FROM hackathons WHERE id = %s', (hackathon_id,))
+        row = cursor.fetchone()
+        if row and row['scores_stale']:
+            cursor.execute('''
+                UPDATE hackathons SET scores_stale = 0 WHERE id = %s AND scores_stale = 1
+            ''', (hackathon_id,))
+            if cursor.rowcount:
+                rescore_hackathon(cursor, hackathon_id, scoring_scheme(cursor, hackathon_id))
+                # New validators, so nothing read before the rescore is reused
+                touch_rankings(cursor, hackathon_id)
+                rescored = True
+            db.commit()
+        cursor.close()
+    if rescored:
+        page_cache.invalidate(f'rankings:{hackathon_id}')
+    return rescored
+
+def query_scored_rankings(cursor, hackathon_id):
+    """query_rankings, after rescoring the hackathon if it is stale"""
+    if not score_if_stale(hackathon_id):
+        return query_rankings(cursor, hackathon_id)
+    # A replica may not have the rescore yet
+    primary = get_db(primary=True).cursor(dictionary=True)
+    rankings = query_rankings(primary, hackathon_id)
+    primary.close()
+    return rankings
+
+def scoring_scheme(cursor, hackathon_id):
+    """The hackathon's scoring scheme (the plain mean if it has none)"""
+    columns = ', '.join(f'weight_{criterion}' for criterion in CRITERIA)
+    cursor.execute(f'''
+        SELECT {columns}, score_normalization, score_trim
+        FROM hackathons WHERE id = %s
+    ''', (hackathon_id,))
+    hackathon = cursor.fetchone()
+    return ScoringScheme.from_hackathon(hackathon) if hackathon else ScoringScheme()
+
+# Every submitted evaluation of a hackathon, for rescoring it as a whole
+SCORING_EVALUATIONS_SQL = '''
+    SELECT e.project_id, e.jury_id, e.innovation_score, e.technical_score,
+           e.presentation_score, e.usefulness_score
+    FROM project_scores ps
+    JOIN projects p ON ps.project_id = p.id
+    JOIN evaluations e ON e.project_id = ps.project_id
+    WHERE ps.hackathon_id = %s AND p.is_submitted = 1 AND e.is_submitted = 1
+'''
+
+def rescore_hackathon(cursor, hackathon_id, scheme):
+    """Store the scheme's final scores and ranks for the hackathon's submitted projects.
+
+    The results stay in project_scores until the next evaluation arrives;
+    only projects whose score or rank moved are written.
+    """
+    cursor.execute(SCORING_EVALUATIONS_SQL, (hackathon_id,))
+    results = final_scores(evaluation_array(cursor.fetchall()), scheme)
+
+    cursor.execute('''
+        SELECT ps.project_id, ps.avg_score, ps.rank_position
+        FROM project_scores ps
+        JOIN projects p ON ps.project_id = p.id
+        WHERE ps.hackathon_id = %s AND ps.score_count > 0 AND p.is_submitted = 1
+    ''', (hackathon_id,))
+    changes = []
+    for row in cursor.fetchall():
+        score, rank = results.get(row['project_id'], (None, None))
+        # avg_score is a FLOAT column, so compare with its precision
+        if (rank != row['rank_position'] or (score is None) != (row['avg_score'] is None) or
+                score is not None and abs(score - row['avg_score']) > 1e-4):
+            changes.append((score, rank, row['project_id']))
+    if changes:
+        cursor.executemany('''
+            UPDATE project_scores SET avg_score = %s, rank_position = %s WHERE project_id = %s
+        ''', changes)
+
+def rebuild_project_scores(db, hackathon_id=None):
+    """Recompute the score aggregate from the evaluations table"""
+    cursor = db.cursor(dictionary=True)
+
+    if hackathon_id is None:
+        cursor.execute('DELETE FROM project_scores')
+        cursor.execute('SELECT id FROM hackathons')
+        hackathon_ids = [row['id'] for row in cursor.fetchall()]
+    else:
+        cursor.execute('DELETE FROM project_scores WHERE hackathon_id = %s', (hackathon_id,))
+        hackathon_ids = [hackathon_id]
+
+    for h_id in hackathon_ids:
+        cursor.execute('''
+            INSERT INTO project_scores (project_id, hackathon_id, score_sum, score_count, avg_score)
+            SELECT p.id, t.hackathon_id,
+                   COALESCE(SUM(e.overall_score), 0), COUNT(e.id), AVG(e.overall_score)
+            FROM projects p
+            JOIN teams t ON p.team_id = t.id
+            LEFT JOIN evaluations e ON p.id = e.project_id AND e.is_submitted = 1
+            WHERE t.hackathon_id = %s
+            GROUP BY p.id, t.hackathon_id
+        ''', (h_id,))
+        refresh_ranks(cursor, h_id)
+
+    db.commit()
+    cursor.close()
+    return len(hackathon_ids)
+
+def reconcile_counters(db):
+    """Recompute denormalized team/member/submission counters, returning rows fixed"""
+    cursor = db.cursor()
+    fixed = 0
+
+    cursor.execute('''
+        UPDATE teams AS t
+        SET member_count = (SELECT COUNT(*) FROM team_members tm
+                            WHERE tm.team_id = t.id AND tm.status = 'accepted')
+        WHERE member_count <> (SELECT COUNT(*) FROM team_members tm
+                               WHERE tm.team_id = t.id AND tm.status = 'accepted')
+    ''')
+    fixed += cursor.rowcount
+
+    cursor.execute('''
+        UPDATE hackathons AS h
+        SET team_count = (SELECT COUNT(*) FROM teams t WHERE t.hackathon_id = h.id),
+            submitted_count = (SELECT COUNT(*) FROM teams t
+                               JOIN projects p ON t.id = p.team_id
+                               WHERE t.hackathon_id = h.id AND p.is_submitted = 1)
+        WHERE team_count <> (SELECT COUNT(*) FROM teams t WHERE t.hackathon_id = h.id)
+           OR submitted_count <> (SELECT COUNT(*) FROM teams t
+                                  JOIN projects p ON t.id = p.team_id
+                                  WHERE t.hackathon_id = h.id AND p.is_submitted = 1)
+    ''')
+    fixed += cursor.rowcount
+
+    db.commit()
+    cursor.close()
+    return fixed
+
+def team_user_ids(cursor, team_id):
+    """Accepted members of a team, whose dashboards show the team"""
+    cursor.execute('''
+        SELECT user_id FROM team_members WHERE team_id = %s AND status = 'accepted'
+    ''', (team_id,))
+    return [row['user_id'] for row in cursor.fetchall()]
+
+def hackathon_staff_ids(cursor, hackathon_id):
+    """Organizer and jury of a hackathon, whose dashboards show its counts"""
+    cursor.execute('''
+        SELECT organizer_id as user_id FROM hackathons WHERE id = %s
+        UNION
+        SELECT jury_id FROM jury_assignments WHERE hackathon_id = %s
+    ''', (hackathon_id, hackathon_id))
+    return [row['user_id'] for row in cursor.fetchall()]
+
+def assign_reviews(cursor, hackathon_id):
+    """Bring a hackathon's review assignments to its reviews_per_project, balanced across its jury.
+
+    Runs on the caller's cursor, so the changes commit with the write that
+    prompted them. Returns the (added, removed) assignment pairs.
+    """
+    # Lock the hackathon row so concurrent submissions plan one after the other
+    cursor.execute('''
+        UPDATE hackathons SET reviews_per_project = reviews_per_project WHERE id = %s
+    ''', (hackathon_id,))
+    cursor.execute('SELECT reviews_per_project FROM hackathons WHERE id = %s', (hackathon_id,))
+    hackathon = cursor.fetchone()
+    if not hackathon or not hackathon['reviews_per_project']:
+        return [], []
+
+    cursor.execute('''
+        SELECT p.id FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        WHERE t.hackathon_id = %s AND p.is_submitted = 1
+    ''', (hackathon_id,))
+    projects = [row['id'] for row in cursor.fetchall()]
+    cursor.execute('SELECT jury_id FROM jury_assignments WHERE hackathon_id = %s', (hackathon_id,))
+    jurors = [row['jury_id'] for row in cursor.fetchall()]
+    cursor.execute('''
+        SELECT project_id, jury_id FROM review_assignments WHERE hackathon_id = %s
+    ''', (hackathon_id,))
+    reviews = [(row['project_id'], row['jury_id']) for row in cursor.fetchall()]
+    # Any evaluation, even a draft, pins its reviewer to the project
+    cursor.execute('''
+        SELECT e.project_id, e.jury_id FROM evaluations e
+        JOIN projects p ON e.project_id = p.id
+        JOIN teams t ON p.team_id = t.id
+        WHERE t.hackathon_id = %s
+    ''', (hackathon_id,))
+    started = [(row['project_id'], row['jury_id']) for row in cursor.fetchall()]
+    # Jurors may not review their own team's project
+    cursor.execute('''
+        SELECT p.id as project_id, tm.user_id as jury_id FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        JOIN team_members tm ON tm.team_id = t.id AND tm.status = 'accepted'
+        JOIN jury_assignments ja ON ja.hackathon_id = t.hackathon_id AND ja.jury_id = tm.user_id
+        WHERE t.hackathon_id = %s
+    ''', (hackathon_id,))
+    conflicts = [(row['project_id'], row['jury_id']) for row in cursor.fetchall()]
+
+    added, removed = plan_reviews(projects, jurors, reviews, hackathon['reviews_per_project'],
+                                  conflicts, started)
+    if removed:
+        cursor.executemany('DELETE FROM review_assignments WHERE project_id = %s AND jury_id = %s',
+                           removed)
+    if added:
+        cursor.executemany('''
+            INSERT IGNORE INTO review_assignments (hackathon_id, project_id, jury_id)
+            VALUES (%s, %s, %s)
+        ''', [(hackathon_id, project_id, jury_id) for project_id, jury_id in added])
+    return added, removed
+
+def requested_page():
+    """Page size and decoded two-column cursor from the query string"""
+    limit = page_size(request.args.get('limit'),
+                      app.config['PAGE_SIZE'], app.config['MAX_PAGE_SIZE'])
+    return limit, decode_cursor(request.args.get('after'), 2)
+
+def next_page_url(endpoint, next_cursor, limit, **values):
+    """URL of the following page, or None on the last page"""
+    if next_cursor is None:
+        return None
+    if limit != app.config['PAGE_SIZE']:
+        values['limit'] = limit
+    return url_for(endpoint, after=next_cursor, **values)
+
 def login_required(f):
     """Decorator to require login"""
     @wraps(f)
@@ -234,6 +706,34 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def remember_role(role):
+    """Cache the user's role in the session"""
+    session['user_role'] = role
+    session['role_checked_at'] = time.time()
+
+def current_role():
+    """Role of the logged in user, re-read from the database once the cached copy expires"""
+    if role_is_fresh():
+        return session['user_role']
+
+    cursor = get_db().cursor(dictionary=True)
+    user = query_user_role(cursor, session['user_id'])
+    cursor.close()
+    return refresh_role(user)
+
+def role_is_fresh():
+    """Whether the role cached in the session can still be trusted"""
+    checked_at = session.get('role_checked_at', 0)
+    return 'user_role' in session and time.time() - checked_at < app.config['ROLE_CACHE_TTL']
+
+def refresh_role(user):
+    """Cache a freshly read role, or forget it if the user is gone"""
+    if not user:
+        session.pop('user_role', None)
+        return None
+    remember_role(user['role'])
+    return user['role']
+
 def role_required(role):
     """Decorator to require specific role"""
     def decorator(f):
@@ -243,14 +743,7 @@ def role_required(role):
                 flash('Please log in to access this page.', 'warning')
                 return redirect(url_for('login'))
 
-            db = get_db()
-            cursor = db.cursor(dictionary=True)
-            cursor.execute('SELECT role FROM users WHERE id = %s', (session['user_id'],))
-            user = cursor.fetchone()
-            cursor.close()
-            db.close()
-
-            if not user or user['role'] != role:
+            if current_role() != role:
                 flash('You do not have permission to access this page.', 'danger')
                 return redirect(url_for('index'))
 
@@ -258,28 +751,495 @@ def role_required(role):
         return decorated_function
     return decorator
 
-# Routes
-@app.route('/')
-def index():
-    """Homepage"""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+# Shared queries, used by both the HTML pages and the JSON API
+def cached_query(key, tags, query, *args):
+    """Run a shared query through the page cache, touching the database only on a miss"""
+    def load():
+        # A replica may not have the write that invalidated this entry yet
+        cursor = get_db(primary=page_cache.recently_invalidated(tags)).cursor(dictionary=True)
+        result = query(cursor, *args)
+        cursor.close()
+        return result
+    return page_cache.get_or_set(key, tags, load)
 
-    # Get active hackathons
+def query_hackathon(cursor, hackathon_id):
+    """A hackathon with its organizer's name"""
     cursor.execute('''
-        SELECT h.*, u.full_name as organizer_name,
-               (SELECT COUNT(*) FROM teams WHERE hackathon_id = h.id) as team_count
+        SELECT h.*, u.full_name as organizer_name
         FROM hackathons h
         JOIN users u ON h.organizer_id = u.id
-        WHERE h.status IN ('open_registration', 'ongoing')
-        ORDER BY h.start_date ASC
-    ''')
-    hackathons = cursor.fetchall()
+        WHERE h.id = %s
+    ''', (hackathon_id,))
+    return cursor.fetchone()
 
+def query_user_role(cursor, user_id):
+    """A user's current role"""
+    cursor.execute('SELECT role FROM users WHERE id = %s', (user_id,))
+    return cursor.fetchone()
+
+def query_user_team(cursor, hackathon_id, user_id):
+    """The team a user has been accepted into for a hackathon, if any"""
+    cursor.execute('''
+        SELECT t.id, t.team_name
+        FROM teams t
+        JOIN team_members tm ON t.id = tm.team_id
+        WHERE t.hackathon_id = %s AND tm.user_id = %s AND tm.status = 'accepted'
+    ''', (hackathon_id, user_id))
+    return cursor.fetchone()
+
+def query_team(cursor, team_id):
+    """A team with its hackathon title and leader's name"""
+    cursor.execute('''
+        SELECT t.*, h.title as hackathon_title, h.id as hackathon_id,
+               u.full_name as leader_name
+        FROM teams t
+        JOIN hackathons h ON t.hackathon_id = h.id
+        JOIN users u ON t.team_leader_id = u.id
+        WHERE t.id = %s
+    ''', (team_id,))
+    return cursor.fetchone()
+
+def query_team_members(cursor, team_id):
+    """Accepted members of a team"""
+    cursor.execute('''
+        SELECT u.full_name, u.email, u.github_username, tm.role
+        FROM team_members tm
+        JOIN users u ON tm.user_id = u.id
+        WHERE tm.team_id = %s AND tm.status = 'accepted'
+    ''', (team_id,))
+    return cursor.fetchall()
+
+def query_team_project(cursor, team_id):
+    """A team's project, submitted or not"""
+    cursor.execute('''
+        SELECT * FROM projects WHERE team_id = %s
+    ''', (team_id,))
+    return cursor.fetchone()
+
+def query_active_hackathons(cursor, limit, after=None):
+    """One page of open and ongoing hackathons, soonest first"""
+    keyset = 'AND ' + keyset_condition(('h.start_date', 'h.id')) if after else ''
+    cursor.execute(f'''
+        SELECT h.*, u.full_name as organizer_name
+        FROM hackathons h
+        JOIN users u ON h.organizer_id = u.id
+        WHERE h.status IN ('open_registration', 'ongoing') {keyset}
+        ORDER BY h.start_date ASC, h.id ASC
+        LIMIT %s
+    ''', (keyset_params(after) if after else ()) + (limit + 1,))
+    return split_page(cursor.fetchall(), limit, lambda h: (h['start_date'], h['id']))
+
+def query_hackathon_teams(cursor, hackathon_id, limit, after=None):
+    """One page of a hackathon's teams, newest first"""
+    keyset = 'AND ' + keyset_condition(('t.created_at', 't.id'), descending=True) if after else ''
+    cursor.execute(f'''
+        SELECT t.*,
+               u.full_name as leader_name,
+               p.is_submitted
+        FROM teams t
+        JOIN users u ON t.team_leader_id = u.id
+        LEFT JOIN projects p ON t.id = p.team_id
+        WHERE t.hackathon_id = %s {keyset}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT %s
+    ''', (hackathon_id,) + (keyset_params(after) if after else ()) + (limit + 1,))
+    return split_page(cursor.fetchall(), limit, lambda t: (t['created_at'], t['id']))
+
+def query_submitted_projects(cursor, hackathon_id, limit, after=None):
+    """One page of a hackathon's submitted projects, latest submission first"""
+    keyset = 'AND ' + keyset_condition(('p.submitted_at', 'p.id'), descending=True) if after else ''
+    cursor.execute(f'''
+        SELECT p.id, p.team_id, t.team_name, p.title, p.description,
+               p.github_url, p.demo_url, p.submitted_at
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        WHERE t.hackathon_id = %s AND p.is_submitted = 1 {keyset}
+        ORDER BY p.submitted_at DESC, p.id DESC
+        LIMIT %s
+    ''', (hackathon_id,) + (keyset_params(after) if after else ()) + (limit + 1,))
+    return split_page(cursor.fetchall(), limit, lambda p: (p['submitted_at'], p['id']))
+
+def query_rankings(cursor, hackathon_id):
+    """Precomputed standings of a hackathon, best first"""
+    cursor.execute('''
+        SELECT
+            ps.rank_position,
+            ps.project_id,
+            t.id as team_id,
+            t.team_name,
+            p.title as project_title,
+            p.github_url,
+            p.demo_url,
+            ps.avg_score as final_score,
+            ps.score_count as evaluation_count
+        FROM project_scores ps
+        JOIN projects p ON ps.project_id = p.id
+        JOIN teams t ON p.team_id = t.id
+        WHERE ps.hackathon_id = %s AND ps.rank_position IS NOT NULL AND p.is_submitted = 1
+        ORDER BY ps.rank_position ASC
+    ''', (hackathon_id,))
+    return cursor.fetchall()
+
+def query_login(cursor, email, password_hash):
+    """The user with these credentials, if any"""
+    cursor.execute('SELECT * FROM users WHERE email = %s AND password_hash = %s', (email, password_hash))
+    return cursor.fetchone()
+
+def query_organized_hackathon(cursor, hackathon_id, organizer_id):
+    """A hackathon, if the user organizes it"""
+    cursor.execute('''
+        SELECT * FROM hackathons
+        WHERE id = %s AND organizer_id = %s
+    ''', (hackathon_id, organizer_id))
+    return cursor.fetchone()
+
+def query_led_team(cursor, team_id, leader_id):
+    """A team with its hackathon's title, if the user leads it"""
+    cursor.execute('''
+        SELECT t.*, h.title as hackathon_title, h.id as hackathon_id
+        FROM teams t
+        JOIN hackathons h ON t.hackathon_id = h.id
+        WHERE t.id = %s AND t.team_leader_id = %s
+    ''', (team_id, leader_id))
+    return cursor.fetchone()
+
+def query_team_name_taken(cursor, hackathon_id, team_name, team_id):
+    """Whether another team of the hackathon has this name"""
+    cursor.execute('''
+        SELECT id FROM teams
+        WHERE hackathon_id = %s AND team_name = %s AND id != %s
+    ''', (hackathon_id, team_name, team_id))
+    return cursor.fetchone() is not None
+
+def query_team_summary(cursor, team_id):
+    """A team with its leader's name and whether its project is submitted"""
+    cursor.execute('''
+        SELECT t.*, u.full_name as leader_name, p.is_submitted
+        FROM teams t
+        JOIN users u ON t.team_leader_id = u.id
+        LEFT JOIN projects p ON t.id = p.team_id
+        WHERE t.id = %s
+    ''', (team_id,))
+    return cursor.fetchone()
+
+def query_join_target(cursor, team_id):
+    """A team someone asks to join, with its capacity"""
+    cursor.execute('''
+        SELECT t.hackathon_id, t.team_name, t.team_leader_id, t.member_count, h.max_team_size
+        FROM teams t
+        JOIN hackathons h ON t.hackathon_id = h.id
+        WHERE t.id = %s
+    ''', (team_id,))
+    return cursor.fetchone()
+
+def query_join_memberships(cursor, hackathon_id, user_id, team_id):
+    """The user's request for a team and accepted place in any team of the hackathon"""
+    cursor.execute('''
+        SELECT tm.team_id, tm.status, t.team_name
+        FROM team_members tm
+        JOIN teams t ON tm.team_id = t.id
+        WHERE t.hackathon_id = %s AND tm.user_id = %s
+          AND (tm.team_id = %s OR tm.status = 'accepted')
+    ''', (hackathon_id, user_id, team_id))
+    return cursor.fetchall()
+
+def query_pending_requests(cursor, team_id, limit, after=None):
+    """One page of a team's pending join requests, oldest first"""
+    keyset = 'AND ' + keyset_condition(('tm.joined_at', 'tm.id')) if after else ''
+    cursor.execute(f'''
+        SELECT tm.id, tm.user_id, tm.joined_at, u.full_name, u.email, u.github_username, u.bio
+        FROM team_members tm
+        JOIN users u ON tm.user_id = u.id
+        WHERE tm.team_id = %s AND tm.status = 'pending' {keyset}
+        ORDER BY tm.joined_at ASC, tm.id ASC
+        LIMIT %s
+    ''', (team_id,) + (keyset_params(after) if after else ()) + (limit + 1,))
+    return split_page(cursor.fetchall(), limit, lambda r: (r['joined_at'], r['id']))
+
+def query_pending_request(cursor, request_id):
+    """A pending join request with its team, and whether the user joined another team since"""
+    cursor.execute('''
+        SELECT tm.*, t.team_leader_id, t.hackathon_id,
+               EXISTS (
+                   SELECT 1 FROM team_members other
+                   JOIN teams ot ON other.team_id = ot.id
+                   WHERE other.user_id = tm.user_id AND other.status = 'accepted'
+                     AND ot.hackathon_id = t.hackathon_id
+               ) as in_other_team
+        FROM team_members tm
+        JOIN teams t ON tm.team_id = t.id
+        WHERE tm.id = %s AND tm.status = 'pending'
+    ''', (request_id,))
+    return cursor.fetchone()
+
+def query_led_team_project_state(cursor, team_id, leader_id):
+    """A team and whether its project is submitted, if the user leads it"""
+    cursor.execute('''
+        SELECT t.*, p.is_submitted as project_submitted
+        FROM teams t
+        LEFT JOIN projects p ON p.team_id = t.id
+        WHERE t.id = %s AND t.team_leader_id = %s
+    ''', (team_id, leader_id))
+    return cursor.fetchone()
+
+# A juror's assigned projects, when the hackathon assigns reviews
+ASSIGNED_PROJECTS_SQL = '''
+    SELECT p.*, t.team_name,
+           (SELECT COUNT(*) FROM evaluations
+            WHERE project_id = p.id AND jury_id = ra.jury_id AND is_submitted = 1) as is_evaluated
+    FROM review_assignments ra
+    JOIN projects p ON ra.project_id = p.id
+    JOIN teams t ON p.team_id = t.id
+    WHERE ra.jury_id = %s AND ra.hackathon_id = %s AND p.is_submitted = 1
+    ORDER BY p.submitted_at DESC
+'''
+
+def query_evaluation_projects(cursor, hackathon_id, jury_id, assigned):
+    """Submitted projects a juror evaluates, with whether they already have"""
+    if assigned:
+        # Only the projects assigned to this juror
+        cursor.execute(ASSIGNED_PROJECTS_SQL, (jury_id, hackathon_id))
+    else:
+        cursor.execute('''
+            SELECT p.*, t.team_name,
+                   (SELECT COUNT(*) FROM evaluations
+                    WHERE project_id = p.id AND jury_id = %s AND is_submitted = 1) as is_evaluated
+            FROM projects p
+            JOIN teams t ON p.team_id = t.id
+            WHERE t.hackathon_id = %s AND p.is_submitted = 1
+            ORDER BY p.submitted_at DESC
+        ''', (jury_id, hackathon_id))
+    return cursor.fetchall()
+
+def query_evaluable_projects(cursor, hackathon_id, jury_id, project_ids):
+    """Which of the projects are submitted ones of a hackathon the juror may evaluate.
+
+    The juror must be on the hackathon's panel, assigned the project when
+    reviews are assigned, and not a member of the project's team.
+    """
+    placeholders = ', '.join(['%s'] * len(project_ids))
+    cursor.execute(f'''
+        SELECT p.id
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        JOIN jury_assignments ja ON ja.hackathon_id = t.hackathon_id AND ja.jury_id = %s
+        JOIN hackathons h ON h.id = t.hackathon_id
+        WHERE t.hackathon_id = %s AND p.is_submitted = 1 AND p.id IN ({placeholders})
+          AND (h.reviews_per_project = 0 OR EXISTS (
+              SELECT 1 FROM review_assignments ra
+              WHERE ra.project_id = p.id AND ra.jury_id = ja.jury_id))
+          AND NOT EXISTS (
+              SELECT 1 FROM team_members tm
+              WHERE tm.team_id = t.id AND tm.user_id = ja.jury_id AND tm.status = 'accepted')
+    ''', (jury_id, hackathon_id, *project_ids))
+    return {row['id'] for row in cursor.fetchall()}
+
+def query_project(cursor, project_id):
+    """A project with its team's name and hackathon"""
+    cursor.execute('''
+        SELECT p.*, t.team_name, t.id as team_id, t.hackathon_id
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        WHERE p.id = %s
+    ''', (project_id,))
+    return cursor.fetchone()
+
+def query_evaluation(cursor, project_id, jury_id):
+    """A juror's evaluation of a project, draft or submitted"""
+    cursor.execute('''
+        SELECT * FROM evaluations
+        WHERE project_id = %s AND jury_id = %s
+    ''', (project_id, jury_id))
+    return cursor.fetchone()
+
+def rankings_versions(hackathon_ids):
+    """When each hackathon's standings last changed, for the live rankings broker"""
+    placeholders = ', '.join(['%s'] * len(hackathon_ids))
+    with app.app_context():
+        cursor = get_db().cursor(dictionary=True)
+        cursor.execute(f'SELECT id, rankings_updated_at FROM hackathons WHERE id IN ({placeholders})',
+                       tuple(hackathon_ids))
+        rows = cursor.fetchall()
+        cursor.close()
+    return {row['id']: row['rankings_updated_at'] for row in rows}
+
+def live_standings(hackathon_id):
+    """A hackathon's standings as JSON-ready rows, read from the primary"""
+    with app.app_context():
+        cursor = get_db().cursor(dictionary=True)
+        rankings = query_scored_rankings(cursor, hackathon_id)
+        cursor.close()
+    return [dict(row, final_score=float(row['final_score']) if row['final_score'] is not None else None)
+            for row in rankings]
+
+def touch_rankings(cursor, hackathon_id):
+    """Mark a hackathon's standings as changed for conditional GETs"""
+    cursor.execute('''
+        UPDATE hackathons SET rankings_updated_at = CURRENT_TIMESTAMP(6) WHERE id = %s
+    ''', (hackathon_id,))
+
+# Changes kept in the search_changes journal
+SEARCH_JOURNAL_ROWS = 10000
+
+def record_search_change(cursor, kind, ref_id):
+    """Journal a hackathon or team whose searchable text changed ('all' for bulk loads).
+
+    Only the SQLite in-memory search index reads the journal; MySQL's
+    FULLTEXT indexes follow the tables by themselves.
+    """
+    if search_index is not None:
+        cursor.execute('INSERT INTO search_changes (kind, ref_id) VALUES (%s, %s)', (kind, ref_id))
+        # Keep only the newest changes; an index further behind rebuilds instead
+        cursor.execute('DELETE FROM search_changes WHERE id <= %s',
+                       (cursor.lastrowid - SEARCH_JOURNAL_ROWS,))
+
+# Rows the in-memory search index is built from, and the column that
+# selects them by id (projects are reloaded with their team)
+SEARCH_DOCUMENTS = {
+    'hackathon': ('SELECT id, title, description, status FROM hackathons', 'id'),
+    'team': ('SELECT id, team_name as title, description, hackathon_id FROM teams', 'id'),
+    'project': ('''
+        SELECT p.id, p.title, p.description, p.is_submitted, t.hackathon_id
+        FROM projects p
+        JOIN teams t ON p.team_id = t.id
+    ''', 'p.team_id'),
+}
+
+def reindex_search(db):
+    """Have every worker rebuild its in-memory search index, after a bulk load"""
+    cursor = db.cursor()
+    record_search_change(cursor, 'all', 0)
+    db.commit()
+    cursor.close()
+
+def search_position():
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute('SELECT COALESCE(MAX(id), 0) as id FROM search_changes')
+    position = cursor.fetchone()['id']
     cursor.close()
-    db.close()
+    return position
 
-    return render_template('index.html', hackathons=hackathons)
+def search_changes(after):
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute('SELECT id, kind, ref_id FROM search_changes WHERE id > %s ORDER BY id', (after,))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def search_documents(kind, ids):
+    sql, key = SEARCH_DOCUMENTS[kind]
+    params = ()
+    if ids is not None:
+        sql += f' WHERE {key} IN ({", ".join(["%s"] * len(ids))})'
+        params = tuple(ids)
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+# What each kind of search result shows: its columns and tables, the
+# columns of its FULLTEXT index, and which rows the public may find
+SEARCH_SOURCES = {
+    'hackathon': {
+        'columns': 'h.id, h.title, h.description, h.status',
+        'tables': 'hackathons h',
+        'key': 'h.id',
+        'match': 'h.title, h.description',
+        'visible': "h.status != 'draft'",
+    },
+    'team': {
+        'columns': 't.id, t.team_name, t.description, t.hackathon_id, h.title as hackathon_title',
+        'tables': 'teams t JOIN hackathons h ON t.hackathon_id = h.id',
+        'key': 't.id',
+        'match': 't.team_name, t.description',
+        'visible': "h.status != 'draft'",
+    },
+    'project': {
+        'columns': '''p.id, p.title, p.description, p.team_id, t.team_name, t.hackathon_id,
+                      h.title as hackathon_title''',
+        'tables': 'projects p JOIN teams t ON p.team_id = t.id JOIN hackathons h ON t.hackathon_id = h.id',
+        'key': 'p.id',
+        'match': 'p.title, p.description',
+        'visible': "p.is_submitted = 1 AND h.status != 'draft'",
+    },
+}
+# MySQL's FULLTEXT indexes leave out shorter words (innodb_ft_min_token_size)
+FULLTEXT_MIN_TERM = 3
+
+def query_search(cursor, kind, query, hackathon_id, limit, after=None):
+    """One page of matches of one kind, most relevant first, from MySQL's FULLTEXT index.
+
+    Every term must match, and the last one also matches as a prefix.
+    """
+    source = SEARCH_SOURCES[kind]
+    terms = [term for term in tokenize(query) if len(term) >= FULLTEXT_MIN_TERM]
+    if not terms:
+        return [], None
+    against = ' '.join(f'+{term}' for term in terms) + '*'
+    scope = 'AND h.id = %s' if hackathon_id is not None else ''
+    keyset = 'HAVING ' + keyset_condition(('score', 'id'), descending=True) if after else ''
+    cursor.execute(f'''
+        SELECT {source['columns']},
+               MATCH({source['match']}) AGAINST (%s IN BOOLEAN MODE) as score
+        FROM {source['tables']}
+        WHERE MATCH({source['match']}) AGAINST (%s IN BOOLEAN MODE) AND {source['visible']} {scope}
+        {keyset}
+        ORDER BY score DESC, id DESC
+        LIMIT %s
+    ''', (against, against) + ((hackathon_id,) if hackathon_id is not None else ()) +
+        (keyset_params(after) if after else ()) + (limit + 1,))
+    return split_page(cursor.fetchall(), limit, lambda row: (row['score'], row['id']))
+
+def query_search_results(cursor, kind, ids):
+    """Search results of one kind by id, for hits ranked by the in-memory index"""
+    source = SEARCH_SOURCES[kind]
+    cursor.execute(f'''
+        SELECT {source['columns']}
+        FROM {source['tables']}
+        WHERE {source['key']} IN ({', '.join(['%s'] * len(ids))})
+    ''', tuple(ids))
+    return {row['id']: row for row in cursor.fetchall()}
+
+def query_indexed_search(cursor, kind, query, hackathon_id, limit, after=None):
+    """One page of matches of one kind, most relevant first, from the in-memory index"""
+    ranked = search_index.search(kind, query, hackathon_id)
+    if after:
+        after = tuple(after)
+        ranked = [hit for hit in ranked if hit < after]
+    hits = ranked[:limit]
+    if not hits:
+        return [], None
+    rows = query_search_results(cursor, kind, [doc_id for _, doc_id in hits])
+    # A document deleted since it was indexed is skipped
+    results = [dict(rows[doc_id], score=score) for score, doc_id in hits if doc_id in rows]
+    return results, encode_cursor(*hits[-1]) if len(ranked) > limit else None
+
+def search_records(kind, query, hackathon_id, limit, after=None):
+    """A page of search results of one kind, from whichever index this backend has"""
+    cursor = get_db().cursor(dictionary=True)
+    if search_index is not None:
+        page = query_indexed_search(cursor, kind, query, hackathon_id, limit, after)
+    else:
+        page = query_search(cursor, kind, query, hackathon_id, limit, after)
+    cursor.close()
+    return page
+
+# Routes
+@app.route('/')
+def index():
+    """Homepage"""
+    limit, after = requested_page()
+
+    # Get active hackathons, one page at a time
+    hackathons, next_cursor = cached_query(f'index:{limit}:{after}', ['hackathons'],
+                                           query_active_hackathons, limit, after)
+
+    next_url = next_page_url('index', next_cursor, limit)
+    if request.args.get('partial'):
+        return render_template('_hackathon_cards.html', hackathons=hackathons,
+                               next_url=next_url, partial=True)
+    return render_template('index.html', hackathons=hackathons, next_url=next_url)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -290,18 +1250,13 @@ def login():
 
         db = get_db()
         cursor = db.cursor(dictionary=True)
-        cursor.execute(
-            'SELECT * FROM users WHERE email = %s AND password_hash = %s',
-            (email, hash_password(password))
-        )
-        user = cursor.fetchone()
+        user = query_login(cursor, email, hash_password(password))
         cursor.close()
-        db.close()
 
         if user:
             session['user_id'] = user['id']
             session['user_name'] = user['full_name']
-            session['user_role'] = user['role']
+            remember_role(user['role'])
             flash(f'Welcome back, {user["full_name"]}!', 'success')
             return redirect(url_for('dashboard'))
         else:
@@ -327,7 +1282,6 @@ def register():
         if existing:
             flash('Email already registered.', 'danger')
             cursor.close()
-            db.close()
             return render_template('register.html')
 
         # Create user
@@ -337,7 +1291,6 @@ def register():
         )
         db.commit()
         cursor.close()
-        db.close()
 
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
@@ -355,138 +1308,86 @@ def logout():
 @login_required
 def dashboard():
     """User dashboard"""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
     user_id = session['user_id']
-    user_role = session['user_role']
-
-    data = {}
-
-    if user_role == 'organizer':
-        # Get hackathons organized by user
-        cursor.execute('''
-            SELECT h.*,
-                   (SELECT COUNT(*) FROM teams WHERE hackathon_id = h.id) as team_count,
-                   (SELECT COUNT(*) FROM teams t
-                    JOIN projects p ON t.id = p.team_id
-                    WHERE t.hackathon_id = h.id AND p.is_submitted = 1) as submitted_count
-            FROM hackathons h
-            WHERE h.organizer_id = %s
-            ORDER BY h.created_at DESC
-        ''', (user_id,))
-        data['hackathons'] = cursor.fetchall()
-
-    elif user_role == 'jury':
-        # Get assigned hackathons
-        cursor.execute('''
-            SELECT h.*,
-                   (SELECT COUNT(*) FROM teams t
-                    JOIN projects p ON t.id = p.team_id
-                    WHERE t.hackathon_id = h.id AND p.is_submitted = 1) as total_projects,
-                   (SELECT COUNT(*) FROM evaluations e
-                    JOIN projects p ON e.project_id = p.id
-                    JOIN teams t ON p.team_id = t.id
-                    WHERE t.hackathon_id = h.id AND e.jury_id = %s AND e.is_submitted = 1) as evaluated_count
-            FROM hackathons h
-            JOIN jury_assignments ja ON h.id = ja.hackathon_id
-            WHERE ja.jury_id = %s
-            ORDER BY h.start_date DESC
-        ''', (user_id, user_id))
-        data['assignments'] = cursor.fetchall()
-
-    else:  # participant
-        # Get user's teams
-        cursor.execute('''
-            SELECT t.*, h.title as hackathon_title, h.status as hackathon_status,
-                   (SELECT COUNT(*) FROM team_members WHERE team_id = t.id AND status = 'accepted') as member_count,
-                   p.id as project_id, p.title as project_title, p.is_submitted
-            FROM teams t
-            JOIN hackathons h ON t.hackathon_id = h.id
-            JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN projects p ON t.id = p.team_id
-            WHERE tm.user_id = %s AND tm.status = 'accepted'
-            ORDER BY t.created_at DESC
-        ''', (user_id,))
-        data['teams'] = cursor.fetchall()
-
-        # Get pending join requests
-        cursor.execute('''
-            SELECT tm.id, tm.joined_at, tm.status, t.team_name, t.id as team_id, h.title as hackathon_title
-            FROM team_members tm
-            JOIN teams t ON tm.team_id = t.id
-            JOIN hackathons h ON t.hackathon_id = h.id
-            WHERE tm.user_id = %s AND tm.status IN ('pending', 'rejected')
-            ORDER BY tm.joined_at DESC
-        ''', (user_id,))
-        data['join_requests'] = cursor.fetchall()
-
-        # Get pending requests for teams user leads
-        cursor.execute('''
-            SELECT COUNT(*) as count
-            FROM team_members tm
-            JOIN teams t ON tm.team_id = t.id
-            WHERE t.team_leader_id = %s AND tm.status = 'pending'
-        ''', (user_id,))
-        result = cursor.fetchone()
-        data['pending_team_requests'] = result['count'] if result else 0
+    user_role = current_role()
 
-    cursor.close()
-    db.close()
+    data = dashboard_cache.get(user_id, user_role)
+    if data is None:
+        data = load_dashboard(get_db(), user_id, user_role)
+        dashboard_cache.set(user_id, user_role, data)
 
     return render_template('dashboard.html', data=data)
 
 @app.route('/hackathon/<int:id>')
 def hackathon_detail(id):
     """Hackathon details page"""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
-    cursor.execute('''
-        SELECT h.*, u.full_name as organizer_name
-        FROM hackathons h
-        JOIN users u ON h.organizer_id = u.id
-        WHERE h.id = %s
-    ''', (id,))
-    hackathon = cursor.fetchone()
+    tags = [f'hackathon:{id}']
+    hackathon = cached_query(f'hackathon:{id}', tags, query_hackathon, id)
 
     if not hackathon:
         flash('Hackathon not found.', 'danger')
-        cursor.close()
-        db.close()
         return redirect(url_for('index'))
 
-    # Get teams
-    cursor.execute('''
-        SELECT t.*,
-               u.full_name as leader_name,
-               (SELECT COUNT(*) FROM team_members WHERE team_id = t.id) as member_count,
-               p.is_submitted
-        FROM teams t
-        JOIN users u ON t.team_leader_id = u.id
-        LEFT JOIN projects p ON t.id = p.team_id
-        WHERE t.hackathon_id = %s
-        ORDER BY t.created_at DESC
-    ''', (id,))
-    teams = cursor.fetchall()
+    # Get teams, newest first, one page at a time
+    limit, after = requested_page()
+    teams, next_cursor = cached_query(f'hackathon_teams:{id}:{limit}:{after}', tags,
+                                      query_hackathon_teams, id, limit, after)
 
     # Check if user is in a team
     user_team = None
     if 'user_id' in session:
-        cursor.execute('''
-            SELECT t.id, t.team_name
-            FROM teams t
-            JOIN team_members tm ON t.id = tm.team_id
-            WHERE t.hackathon_id = %s AND tm.user_id = %s AND tm.status = 'accepted'
-        ''', (id, session['user_id']))
-        user_team = cursor.fetchone()
-
-    cursor.close()
-    db.close()
+        cursor = get_db().cursor(dictionary=True)
+        user_team = query_user_team(cursor, id, session['user_id'])
+        cursor.close()
 
+    next_url = next_page_url('hackathon_detail', next_cursor, limit, id=id)
+    if request.args.get('partial'):
+        return render_template('_team_cards.html',
+                               hackathon=hackathon,
+                               teams=teams,
+                               user_team=user_team,
+                               next_url=next_url,
+                               partial=True)
     return render_template('hackathon_detail.html',
                          hackathon=hackathon,
                          teams=teams,
-                         user_team=user_team)
+                         user_team=user_team,
+                         next_url=next_url)
+
+# Results of each kind shown when searching everything at once
+SEARCH_PREVIEW = 5
+
+@app.route('/search')
+def search():
+    """Search hackathons, teams and submitted projects, most relevant first"""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind')
+    if kind not in SEARCH_SOURCES:
+        kind = None
+    hackathon_id = request.args.get('hackathon_id', type=int)
+    hackathon = None
+    if hackathon_id is not None:
+        hackathon = cached_query(f'hackathon:{hackathon_id}', [f'hackathon:{hackathon_id}'],
+                                 query_hackathon, hackathon_id)
+
+    sections = []
+    next_url = None
+    if query and kind:
+        limit, after = requested_page()
+        results, next_cursor = search_records(kind, query, hackathon_id, limit, after)
+        sections.append((kind, results, None))
+        next_url = next_page_url('search', next_cursor, limit, q=query, kind=kind, hackathon_id=hackathon_id)
+        if request.args.get('partial'):
+            return render_template('_search_results.html', kind=kind, results=results,
+                                   next_url=next_url, partial=True)
+    elif query:
+        for source in SEARCH_SOURCES:
+            results, next_cursor = search_records(source, query, hackathon_id, SEARCH_PREVIEW)
+            more_url = url_for('search', q=query, kind=source, hackathon_id=hackathon_id) if next_cursor else None
+            sections.append((source, results, more_url))
+
+    return render_template('search.html', query=query, kind=kind, hackathon=hackathon,
+                           sections=sections, next_url=next_url)
 
 @app.route('/hackathon/create', methods=['GET', 'POST'])
 @role_required('organizer')
@@ -510,9 +1411,10 @@ def create_hackathon():
             ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'draft')
         ''', (session['user_id'], title, description, start_date, end_date,
               registration_deadline, max_team_size, is_online))
+        record_search_change(cursor, 'hackathon', cursor.lastrowid)
         db.commit()
         cursor.close()
-        db.close()
+        dashboard_cache.invalidate(session['user_id'])
 
         flash('Hackathon created successfully!', 'success')
         return redirect(url_for('dashboard'))
@@ -527,16 +1429,11 @@ def edit_hackathon(hackathon_id):
     cursor = db.cursor(dictionary=True)
 
     # Verify user is the organizer
-    cursor.execute('''
-        SELECT * FROM hackathons
-        WHERE id = %s AND organizer_id = %s
-    ''', (hackathon_id, session['user_id']))
-    hackathon = cursor.fetchone()
+    hackathon = query_organized_hackathon(cursor, hackathon_id, session['user_id'])
 
     if not hackathon:
         flash('Only the organizer can edit this hackathon.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
@@ -549,80 +1446,151 @@ def edit_hackathon(hackathon_id):
         is_online = 1 if request.form.get('is_online') else 0
         status = request.form.get('status')
 
+        try:
+            scheme = ScoringScheme(
+                [float(request.form.get(f'weight_{criterion}', 1)) for criterion in CRITERIA],
+                request.form.get('score_normalization', 'none'),
+                float(request.form.get('score_trim', 0)) / 100)
+            reviews_per_project = int(request.form.get('reviews_per_project', 0))
+            errors = scheme.errors()
+            if reviews_per_project < 0:
+                errors.append('Reviews per project must be zero or more.')
+            if not errors and not scheme.is_plain_mean:
+                # Fail here rather than on the next evaluation
+                require_numpy()
+        except ValueError:
+            errors = ['Weights, trim and reviews per project must be numbers.']
+        except RuntimeError as e:
+            errors = [str(e)]
+        if errors:
+            for error in errors:
+                flash(error, 'danger')
+            cursor.close()
+            return render_template('edit_hackathon.html', hackathon=hackathon,
+                                   criteria=CRITERIA, normalizations=NORMALIZATIONS)
+        current = ScoringScheme.from_hackathon(hackathon)
+        rescore = (scheme.weights, scheme.normalization, scheme.trim) != \
+            (current.weights, current.normalization, current.trim)
+
         # Update hackathon
         cursor.execute('''
             UPDATE hackathons
             SET title = %s, description = %s, start_date = %s, end_date = %s,
-                registration_deadline = %s, max_team_size = %s, is_online = %s, status = %s
+                registration_deadline = %s, max_team_size = %s, is_online = %s, status = %s,
+                weight_innovation = %s, weight_technical = %s, weight_presentation = %s,
+                weight_usefulness = %s, score_normalization = %s, score_trim = %s,
+                reviews_per_project = %s
             WHERE id = %s
         ''', (title, description, start_date, end_date, registration_deadline,
-              max_team_size, is_online, status, hackathon_id))
+              max_team_size, is_online, status, *scheme.weights, scheme.normalization,
+              scheme.trim, reviews_per_project, hackathon_id))
+        record_search_change(cursor, 'hackathon', hackathon_id)
+        if reviews_per_project != hackathon['reviews_per_project']:
+            assign_reviews(cursor, hackathon_id)
 
         db.commit()
         cursor.close()
-        db.close()
+        if rescore:
+            # Rebuilds the hackathon's aggregates and ranks them under the new scheme
+            rebuild_project_scores(db, hackathon_id)
+        # Title and status show on every participant's and juror's dashboard
+        dashboard_cache.clear()
+        page_cache.invalidate('hackathons', f'hackathon:{hackathon_id}', f'rankings:{hackathon_id}')
+        rankings_broker.notify(hackathon_id)
 
         flash('Hackathon updated successfully!', 'success')
         return redirect(url_for('hackathon_detail', id=hackathon_id))
 
     cursor.close()
-    db.close()
 
-    return render_template('edit_hackathon.html', hackathon=hackathon)
+    return render_template('edit_hackathon.html', hackathon=hackathon,
+                           criteria=CRITERIA, normalizations=NORMALIZATIONS)
+
+@app.route('/hackathon/<int:hackathon_id>/reviews/assign', methods=['POST'])
+@role_required('organizer')
+def rebalance_reviews(hackathon_id):
+    """Re-run review assignment, after jurors join or leave the panel"""
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    if not query_organized_hackathon(cursor, hackathon_id, session['user_id']):
+        cursor.close()
+        flash('Only the organizer can assign reviews.', 'danger')
+        return redirect(url_for('dashboard'))
+
+    added, removed = assign_reviews(cursor, hackathon_id)
+    db.commit()
+    dashboard_cache.invalidate(*hackathon_staff_ids(cursor, hackathon_id))
+    cursor.close()
+
+    flash(f'Review assignments updated: {len(added)} added, {len(removed)} removed.', 'success')
+    return redirect(url_for('edit_hackathon', hackathon_id=hackathon_id))
 
 @app.route('/team/create/<int:hackathon_id>', methods=['GET', 'POST'])
 @login_required
 def create_team(hackathon_id):
     """Create a new team"""
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute('SELECT * FROM hackathons WHERE id = %s', (hackathon_id,))
+    hackathon = cursor.fetchone()
+
+    if not hackathon:
+        flash('Hackathon not found.', 'danger')
+        cursor.close()
+        return redirect(url_for('index'))
+
     if request.method == 'POST':
         team_name = request.form.get('team_name')
         description = request.form.get('description')
 
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
+        # Lock the hackathon row first: it queues concurrent team creation, so
+        # two requests from one user can't both pass the check below
+        cursor.execute('UPDATE hackathons SET team_count = team_count WHERE id = %s', (hackathon_id,))
 
-        # Check if user already in a team for this hackathon
-        cursor.execute('''
-            SELECT t.id FROM teams t
-            JOIN team_members tm ON t.id = tm.team_id
-            WHERE t.hackathon_id = %s AND tm.user_id = %s
-        ''', (hackathon_id, session['user_id']))
-        existing = cursor.fetchone()
+        # Create the team, already counting its leader, unless the user is
+        # in (or has asked to join) a team for this hackathon
+        try:
+            cursor.execute('''
+                INSERT INTO teams (hackathon_id, team_name, team_leader_id, description, member_count)
+                SELECT h.id, %s, %s, %s, 1
+                FROM hackathons h
+                WHERE h.id = %s AND NOT EXISTS (
+                    SELECT 1 FROM teams t
+                    JOIN team_members tm ON t.id = tm.team_id
+                    WHERE t.hackathon_id = h.id AND tm.user_id = %s
+                )
+            ''', (team_name, session['user_id'], description, hackathon_id, session['user_id']))
+        except IntegrityError:
+            db.rollback()
+            flash('A team with this name already exists in this hackathon.', 'danger')
+            cursor.close()
+            return render_template('create_team.html', hackathon=hackathon)
 
-        if existing:
+        if cursor.rowcount == 0:
+            db.rollback()
             flash('You are already in a team for this hackathon.', 'warning')
             cursor.close()
-            db.close()
             return redirect(url_for('hackathon_detail', id=hackathon_id))
 
-        # Create team
-        cursor.execute('''
-            INSERT INTO teams (hackathon_id, team_name, team_leader_id, description)
-            VALUES (%s, %s, %s, %s)
-        ''', (hackathon_id, team_name, session['user_id'], description))
-
         team_id = cursor.lastrowid
+        cursor.execute('UPDATE hackathons SET team_count = team_count + 1 WHERE id = %s', (hackathon_id,))
 
         # Add leader as member
         cursor.execute('''
             INSERT INTO team_members (team_id, user_id, role)
             VALUES (%s, %s, 'leader')
         ''', (team_id, session['user_id']))
+        record_search_change(cursor, 'team', team_id)
 
         db.commit()
+        dashboard_cache.invalidate(session['user_id'], *hackathon_staff_ids(cursor, hackathon_id))
         cursor.close()
-        db.close()
+        page_cache.invalidate('hackathons', f'hackathon:{hackathon_id}')
 
         flash('Team created successfully!', 'success')
         return redirect(url_for('team_detail', id=team_id))
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-    cursor.execute('SELECT * FROM hackathons WHERE id = %s', (hackathon_id,))
-    hackathon = cursor.fetchone()
     cursor.close()
-    db.close()
-
     return render_template('create_team.html', hackathon=hackathon)
 
 @app.route('/team/<int:id>')
@@ -632,42 +1600,20 @@ def team_detail(id):
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    cursor.execute('''
-        SELECT t.*, h.title as hackathon_title, h.id as hackathon_id,
-               u.full_name as leader_name
-        FROM teams t
-        JOIN hackathons h ON t.hackathon_id = h.id
-        JOIN users u ON t.team_leader_id = u.id
-        WHERE t.id = %s
-    ''', (id,))
-    team = cursor.fetchone()
+    team = query_team(cursor, id)
 
     if not team:
         flash('Team not found.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('index'))
 
-    # Get team members
-    cursor.execute('''
-        SELECT u.full_name, u.email, u.github_username, tm.role
-        FROM team_members tm
-        JOIN users u ON tm.user_id = u.id
-        WHERE tm.team_id = %s AND tm.status = 'accepted'
-    ''', (id,))
-    members = cursor.fetchall()
-
-    # Get project
-    cursor.execute('''
-        SELECT * FROM projects WHERE team_id = %s
-    ''', (id,))
-    project = cursor.fetchone()
+    members = query_team_members(cursor, id)
+    project = query_team_project(cursor, id)
 
     # Check if user is team leader
     is_leader = (team['team_leader_id'] == session['user_id'])
 
     cursor.close()
-    db.close()
 
     return render_template('team_detail.html',
                          team=team,
@@ -683,18 +1629,11 @@ def edit_team(team_id):
     cursor = db.cursor(dictionary=True)
 
     # Verify user is team leader
-    cursor.execute('''
-        SELECT t.*, h.title as hackathon_title, h.id as hackathon_id
-        FROM teams t
-        JOIN hackathons h ON t.hackathon_id = h.id
-        WHERE t.id = %s AND t.team_leader_id = %s
-    ''', (team_id, session['user_id']))
-    team = cursor.fetchone()
+    team = query_led_team(cursor, team_id, session['user_id'])
 
     if not team:
         flash('Only team leader can edit team information.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
@@ -702,16 +1641,9 @@ def edit_team(team_id):
         description = request.form.get('description')
 
         # Check if new team name is unique within the hackathon
-        cursor.execute('''
-            SELECT id FROM teams
-            WHERE hackathon_id = %s AND team_name = %s AND id != %s
-        ''', (team['hackathon_id'], team_name, team_id))
-        existing = cursor.fetchone()
-
-        if existing:
+        if query_team_name_taken(cursor, team['hackathon_id'], team_name, team_id):
             flash('A team with this name already exists in this hackathon.', 'danger')
             cursor.close()
-            db.close()
             return render_template('edit_team.html', team=team)
 
         # Update team information
@@ -720,16 +1652,19 @@ def edit_team(team_id):
             SET team_name = %s, description = %s
             WHERE id = %s
         ''', (team_name, description, team_id))
+        touch_rankings(cursor, team['hackathon_id'])
+        record_search_change(cursor, 'team', team_id)
 
         db.commit()
+        dashboard_cache.invalidate(*team_user_ids(cursor, team_id))
         cursor.close()
-        db.close()
+        page_cache.invalidate(f'hackathon:{team["hackathon_id"]}', f'rankings:{team["hackathon_id"]}')
+        rankings_broker.notify(team['hackathon_id'])
 
         flash('Team information updated successfully!', 'success')
         return redirect(url_for('team_detail', id=team_id))
 
     cursor.close()
-    db.close()
 
     return render_template('edit_team.html', team=team)
 
@@ -740,22 +1675,19 @@ def request_join_team(team_id):
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    # Get team info
-    cursor.execute('SELECT hackathon_id, team_name FROM teams WHERE id = %s', (team_id,))
-    team = cursor.fetchone()
+    # Get team info and capacity
+    team = query_join_target(cursor, team_id)
 
     if not team:
         flash('Team not found.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('index'))
 
-    # Check if user already has a request or membership
-    cursor.execute('''
-        SELECT status FROM team_members
-        WHERE team_id = %s AND user_id = %s
-    ''', (team_id, session['user_id']))
-    existing = cursor.fetchone()
+    # The user's request for this team and accepted place in any team of the
+    # hackathon, in one query
+    memberships = query_join_memberships(cursor, team['hackathon_id'], session['user_id'], team_id)
+    existing = next((m for m in memberships if m['team_id'] == team_id), None)
+    other_team = next((m for m in memberships if m['team_id'] != team_id), None)
 
     if existing:
         if existing['status'] == 'accepted':
@@ -765,32 +1697,28 @@ def request_join_team(team_id):
         elif existing['status'] == 'rejected':
             flash('Your previous request was rejected.', 'warning')
         cursor.close()
-        db.close()
         return redirect(url_for('hackathon_detail', id=team['hackathon_id']))
 
-    # Check if user is already in another team for this hackathon
-    cursor.execute('''
-        SELECT t.team_name FROM teams t
-        JOIN team_members tm ON t.id = tm.team_id
-        WHERE t.hackathon_id = %s AND tm.user_id = %s AND tm.status = 'accepted'
-    ''', (team['hackathon_id'], session['user_id']))
-    other_team = cursor.fetchone()
-
     if other_team:
         flash(f'You are already in team "{other_team["team_name"]}" for this hackathon.', 'warning')
         cursor.close()
-        db.close()
         return redirect(url_for('hackathon_detail', id=team['hackathon_id']))
 
-    # Create join request
+    # Only a hint: approval re-checks capacity atomically
+    if team['member_count'] >= team['max_team_size']:
+        flash(f'Team "{team["team_name"]}" is full.', 'warning')
+        cursor.close()
+        return redirect(url_for('hackathon_detail', id=team['hackathon_id']))
+
+    # Create join request; a concurrent duplicate is ignored by the unique key
     cursor.execute('''
-        INSERT INTO team_members (team_id, user_id, status, role)
+        INSERT IGNORE INTO team_members (team_id, user_id, status, role)
         VALUES (%s, %s, 'pending', 'member')
     ''', (team_id, session['user_id']))
 
     db.commit()
     cursor.close()
-    db.close()
+    dashboard_cache.invalidate(session['user_id'], team['team_leader_id'])
 
     flash(f'Join request sent to team "{team["team_name"]}"!', 'success')
     return redirect(url_for('hackathon_detail', id=team['hackathon_id']))
@@ -803,34 +1731,24 @@ def view_team_requests(team_id):
     cursor = db.cursor(dictionary=True)
 
     # Verify user is team leader
-    cursor.execute('''
-        SELECT t.*, h.title as hackathon_title
-        FROM teams t
-        JOIN hackathons h ON t.hackathon_id = h.id
-        WHERE t.id = %s AND t.team_leader_id = %s
-    ''', (team_id, session['user_id']))
-    team = cursor.fetchone()
+    team = query_led_team(cursor, team_id, session['user_id'])
 
     if not team:
         flash('Only team leader can view requests.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
-    # Get pending requests
-    cursor.execute('''
-        SELECT tm.id, tm.user_id, tm.joined_at, u.full_name, u.email, u.github_username, u.bio
-        FROM team_members tm
-        JOIN users u ON tm.user_id = u.id
-        WHERE tm.team_id = %s AND tm.status = 'pending'
-        ORDER BY tm.joined_at ASC
-    ''', (team_id,))
-    requests = cursor.fetchall()
+    # Get pending requests, oldest first, one page at a time
+    limit, after = requested_page()
+    requests, next_cursor = query_pending_requests(cursor, team_id, limit, after)
 
     cursor.close()
-    db.close()
 
-    return render_template('team_requests.html', team=team, requests=requests)
+    next_url = next_page_url('view_team_requests', next_cursor, limit, team_id=team_id)
+    if request.args.get('partial'):
+        return render_template('_team_request_cards.html', team=team, requests=requests,
+                               next_url=next_url, partial=True)
+    return render_template('team_requests.html', team=team, requests=requests, next_url=next_url)
 
 @app.route('/team/request/<int:request_id>/approve', methods=['POST'])
 @login_required
@@ -840,36 +1758,53 @@ def approve_team_request(request_id):
     cursor = db.cursor(dictionary=True)
 
     # Get request and verify user is team leader
-    cursor.execute('''
-        SELECT tm.*, t.team_leader_id, t.hackathon_id
-        FROM team_members tm
-        JOIN teams t ON tm.team_id = t.id
-        WHERE tm.id = %s AND tm.status = 'pending'
-    ''', (request_id,))
-    request_data = cursor.fetchone()
+    request_data = query_pending_request(cursor, request_id)
 
     if not request_data:
         flash('Request not found.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     if request_data['team_leader_id'] != session['user_id']:
         flash('Only team leader can approve requests.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
-    # Approve the request
+    if request_data['in_other_team']:
+        flash('This participant has already joined another team.', 'warning')
+        cursor.close()
+        return redirect(url_for('view_team_requests', team_id=request_data['team_id']))
+
+    # Take a place in the team: the capacity check and the increment are one
+    # statement, so concurrent approvals can never overfill it
+    cursor.execute('''
+        UPDATE teams SET member_count = member_count + 1
+        WHERE id = %s AND member_count < (
+            SELECT max_team_size FROM hackathons WHERE id = teams.hackathon_id
+        )
+    ''', (request_data['team_id'],))
+    if cursor.rowcount == 0:
+        db.rollback()
+        flash('The team is full.', 'warning')
+        cursor.close()
+        return redirect(url_for('view_team_requests', team_id=request_data['team_id']))
+
+    # Approve the request, unless a concurrent approval got there first
     cursor.execute('''
         UPDATE team_members
         SET status = 'accepted'
-        WHERE id = %s
+        WHERE id = %s AND status = 'pending'
     ''', (request_id,))
+    if cursor.rowcount == 0:
+        db.rollback()
+        flash('This request has already been handled.', 'info')
+        cursor.close()
+        return redirect(url_for('view_team_requests', team_id=request_data['team_id']))
 
     db.commit()
+    dashboard_cache.invalidate(*team_user_ids(cursor, request_data['team_id']))
     cursor.close()
-    db.close()
+    page_cache.invalidate(f'hackathon:{request_data["hackathon_id"]}')
 
     flash('Team member approved!', 'success')
     return redirect(url_for('view_team_requests', team_id=request_data['team_id']))
@@ -882,24 +1817,16 @@ def reject_team_request(request_id):
     cursor = db.cursor(dictionary=True)
 
     # Get request and verify user is team leader
-    cursor.execute('''
-        SELECT tm.*, t.team_leader_id
-        FROM team_members tm
-        JOIN teams t ON tm.team_id = t.id
-        WHERE tm.id = %s AND tm.status = 'pending'
-    ''', (request_id,))
-    request_data = cursor.fetchone()
+    request_data = query_pending_request(cursor, request_id)
 
     if not request_data:
         flash('Request not found.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     if request_data['team_leader_id'] != session['user_id']:
         flash('Only team leader can reject requests.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     # Reject the request
@@ -911,7 +1838,7 @@ def reject_team_request(request_id):
 
     db.commit()
     cursor.close()
-    db.close()
+    dashboard_cache.invalidate(request_data['user_id'], session['user_id'])
 
     flash('Request rejected.', 'info')
     return redirect(url_for('view_team_requests', team_id=request_data['team_id']))
@@ -923,17 +1850,12 @@ def submit_project(team_id):
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    # Verify user is team leader
-    cursor.execute(
-        'SELECT * FROM teams WHERE id = %s AND team_leader_id = %s',
-        (team_id, session['user_id'])
-    )
-    team = cursor.fetchone()
+    # Verify user is team leader; the project's state comes along for the save
+    team = query_led_team_project_state(cursor, team_id, session['user_id'])
 
     if not team:
         flash('Only team leader can submit project.', 'danger')
         cursor.close()
-        db.close()
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
@@ -943,30 +1865,48 @@ def submit_project(team_id):
         demo_url = request.form.get('demo_url')
         is_submitted = 1 if request.form.get('submit') else 0
 
-        # Check if project exists
-        cursor.execute('SELECT id FROM projects WHERE team_id = %s', (team_id,))
-        existing = cursor.fetchone()
+        was_submitted = 1 if team['project_submitted'] else 0
 
-        if existing:
-            # Update existing project
-            cursor.execute('''
-                UPDATE projects
-                SET title = %s, description = %s, github_url = %s, demo_url = %s,
-                    is_submitted = %s, submitted_at = %s
-                WHERE team_id = %s
-            ''', (title, description, github_url, demo_url, is_submitted,
-                  datetime.now() if is_submitted else None, team_id))
-        else:
-            # Create new project
-            cursor.execute('''
-                INSERT INTO projects (team_id, title, description, github_url, demo_url, is_submitted, submitted_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ''', (team_id, title, description, github_url, demo_url, is_submitted,
-                  datetime.now() if is_submitted else None))
+        # Counter and rankings timestamp first. The hackathon row lock queues
+        # concurrent saves, and the subquery sees the project as it was before
+        # this save, so the count stays exact without reading it back.
+        cursor.execute('''
+            UPDATE hackathons
+            SET submitted_count = submitted_count + %s - (
+                    SELECT COUNT(*) FROM projects WHERE team_id = %s AND is_submitted = 1
+                ),
+                rankings_updated_at = CURRENT_TIMESTAMP(6)
+            WHERE id = %s
+        ''', (is_submitted, team_id, team['hackathon_id']))
+
+        # projects.team_id is unique: the first save inserts, later ones update
+        cursor.execute('''
+            INSERT INTO projects (team_id, title, description, github_url, demo_url, is_submitted, submitted_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                title = VALUES(title),
+                description = VALUES(description),
+                github_url = VALUES(github_url),
+                demo_url = VALUES(demo_url),
+                is_submitted = VALUES(is_submitted),
+                submitted_at = VALUES(submitted_at)
+        ''', (team_id, title, description, github_url, demo_url, is_submitted,
+              datetime.now() if is_submitted else None))
+        # The project is indexed with its team
+        record_search_change(cursor, 'team', team_id)
+        if is_submitted != was_submitted:
+            # A late project gets its reviewers; a withdrawn one frees them
+            assign_reviews(cursor, team['hackathon_id'])
+            # and it enters or leaves the rankings
+            refresh_ranks(cursor, team['hackathon_id'])
 
         db.commit()
+        dashboard_cache.invalidate(*team_user_ids(cursor, team_id))
+        if is_submitted != was_submitted:
+            dashboard_cache.invalidate(*hackathon_staff_ids(cursor, team['hackathon_id']))
         cursor.close()
-        db.close()
+        page_cache.invalidate(f'hackathon:{team["hackathon_id"]}', f'rankings:{team["hackathon_id"]}')
+        rankings_broker.notify(team['hackathon_id'])
 
         if is_submitted:
             flash('Project submitted successfully!', 'success')
@@ -976,10 +1916,8 @@ def submit_project(team_id):
         return redirect(url_for('team_detail', id=team_id))
 
     # Get existing project if any
-    cursor.execute('SELECT * FROM projects WHERE team_id = %s', (team_id,))
-    project = cursor.fetchone()
+    project = query_team_project(cursor, team_id)
     cursor.close()
-    db.close()
 
     return render_template('submit_project.html', team=team, project=project)
 
@@ -990,26 +1928,139 @@ def evaluate_hackathon(hackathon_id):
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    # Get submitted projects
-    cursor.execute('''
-        SELECT p.*, t.team_name,
-               (SELECT COUNT(*) FROM evaluations
-                WHERE project_id = p.id AND jury_id = %s AND is_submitted = 1) as is_evaluated
-        FROM projects p
-        JOIN teams t ON p.team_id = t.id
-        WHERE t.hackathon_id = %s AND p.is_submitted = 1
-        ORDER BY p.submitted_at DESC
-    ''', (session['user_id'], hackathon_id))
-    projects = cursor.fetchall()
-
     cursor.execute('SELECT * FROM hackathons WHERE id = %s', (hackathon_id,))
     hackathon = cursor.fetchone()
 
+    projects = query_evaluation_projects(cursor, hackathon_id, session['user_id'],
+                                         bool(hackathon and hackathon['reviews_per_project']))
+
     cursor.close()
-    db.close()
 
     return render_template('evaluate_list.html', projects=projects, hackathon=hackathon)
 
+EVALUATION_CRITERIA = ('innovation', 'technical', 'presentation', 'usefulness')
+
+def valid_score(score):
+    # float() accepts 'nan' and 'inf', which compare false against any bound
+    return math.isfinite(score) and 0 <= score <= 10
+
+def read_bulk_evaluations():
+    """Rows of a bulk evaluation request: a JSON body or an uploaded CSV/JSON file"""
+    if request.is_json:
+        payload = request.get_json(silent=True)
+    else:
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            raise ValueError('Choose a CSV or JSON file to upload.')
+        text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig')
+        if upload.filename.lower().endswith('.json'):
+            payload = json.load(text)
+        else:
+            return list(csv.DictReader(text))
+
+    if isinstance(payload, dict):
+        payload = payload.get('evaluations')
+    if not isinstance(payload, list):
+        raise ValueError('Expected a list of evaluations.')
+    return payload
+
+def validate_bulk_evaluations(rows):
+    """Turn raw rows into evaluation tuples, collecting per-row errors"""
+    evaluations = {}
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(f'Row {number}: expected an object.')
+            continue
+        try:
+            project_id = int(row.get('project_id'))
+            scores = [float(row.get(name)) for name in EVALUATION_CRITERIA]
+        except (TypeError, ValueError):
+            errors.append(f'Row {number}: project_id and all four scores are required numbers.')
+            continue
+        if not all(valid_score(score) for score in scores):
+            errors.append(f'Row {number}: scores must be numbers between 0 and 10.')
+            continue
+        submit = str(row.get('submit', '')).strip().lower() in ('1', 'true', 'yes', 'y')
+        overall = sum(scores) / len(scores)
+        # A later row for the same project replaces an earlier one
+        evaluations[project_id] = (project_id, *scores, overall,
+                                   row.get('comments') or None, 1 if submit else 0)
+    return list(evaluations.values()), errors
+
+@app.route('/evaluate/<int:hackathon_id>/bulk', methods=['POST'])
+@role_required('jury')
+def evaluate_bulk(hackathon_id):
+    """Save a batch of evaluations in one transaction"""
+    wants_json = request.is_json
+
+    def fail(errors):
+        if wants_json:
+            return jsonify({'saved': 0, 'errors': errors}), 400
+        for error in errors[:5]:
+            flash(error, 'danger')
+        if len(errors) > 5:
+            flash(f'...and {len(errors) - 5} more problems. Nothing was saved.', 'danger')
+        return redirect(url_for('evaluate_hackathon', hackathon_id=hackathon_id))
+
+    try:
+        rows = read_bulk_evaluations()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return fail([str(e)])
+
+    if len(rows) > app.config['BULK_EVALUATION_LIMIT']:
+        return fail([f'At most {app.config["BULK_EVALUATION_LIMIT"]} evaluations per upload.'])
+
+    evaluations, errors = validate_bulk_evaluations(rows)
+    if not evaluations and not errors:
+        errors.append('The upload contained no evaluations.')
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+
+    if evaluations and not errors:
+        # Only submitted projects of a hackathon this juror is assigned to
+        project_ids = [e[0] for e in evaluations]
+        allowed = query_evaluable_projects(cursor, hackathon_id, session['user_id'], project_ids)
+        for project_id in project_ids:
+            if project_id not in allowed:
+                errors.append(f'Project {project_id} is not a submitted project you can evaluate here.')
+
+    if errors:
+        cursor.close()
+        return fail(errors)
+
+    # One multi-row upsert, one aggregate refresh, one commit
+    cursor.executemany('''
+        INSERT INTO evaluations (
+            project_id, jury_id, innovation_score, technical_score,
+            presentation_score, usefulness_score, overall_score,
+            comments, is_submitted
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            innovation_score = VALUES(innovation_score),
+            technical_score = VALUES(technical_score),
+            presentation_score = VALUES(presentation_score),
+            usefulness_score = VALUES(usefulness_score),
+            overall_score = VALUES(overall_score),
+            comments = VALUES(comments),
+            is_submitted = VALUES(is_submitted)
+    ''', [(e[0], session['user_id'], *e[1:]) for e in evaluations])
+
+    refresh_project_scores(cursor, hackathon_id, [e[0] for e in evaluations])
+
+    db.commit()
+    cursor.close()
+    dashboard_cache.invalidate(session['user_id'])
+    page_cache.invalidate(f'rankings:{hackathon_id}')
+    rankings_broker.notify(hackathon_id)
+
+    submitted = sum(1 for e in evaluations if e[-1])
+    if wants_json:
+        return jsonify({'saved': len(evaluations), 'submitted': submitted, 'errors': []})
+    flash(f'Saved {len(evaluations)} evaluations ({submitted} submitted).', 'success')
+    return redirect(url_for('evaluate_hackathon', hackathon_id=hackathon_id))
+
 @app.route('/evaluate/project/<int:project_id>', methods=['GET', 'POST'])
 @role_required('jury')
 def evaluate_project(project_id):
@@ -1017,59 +2068,61 @@ def evaluate_project(project_id):
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
-    cursor.execute('''
-        SELECT p.*, t.team_name, t.id as team_id
-        FROM projects p
-        JOIN teams t ON p.team_id = t.id
-        WHERE p.id = %s
-    ''', (project_id,))
-    project = cursor.fetchone()
+    project = query_project(cursor, project_id)
 
     if not project:
         flash('Project not found.', 'danger')
         cursor.close()
-        db.close()
+        return redirect(url_for('dashboard'))
+
+    # The same rules as bulk evaluation: on the panel, assigned, no conflict
+    if project_id not in query_evaluable_projects(cursor, project['hackathon_id'],
+                                                  session['user_id'], [project_id]):
+        flash('You cannot evaluate this project.', 'danger')
+        cursor.close()
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST':
-        innovation = float(request.form.get('innovation'))
-        technical = float(request.form.get('technical'))
-        presentation = float(request.form.get('presentation'))
-        usefulness = float(request.form.get('usefulness'))
+        try:
+            scores = [float(request.form.get(name)) for name in EVALUATION_CRITERIA]
+        except (TypeError, ValueError):
+            scores = None
+        if scores is None or not all(valid_score(score) for score in scores):
+            flash('Scores must be numbers between 0 and 10.', 'danger')
+            evaluation = query_evaluation(cursor, project_id, session['user_id'])
+            cursor.close()
+            return render_template('evaluate_project.html', project=project, evaluation=evaluation)
+        innovation, technical, presentation, usefulness = scores
         comments = request.form.get('comments')
         is_submitted = 1 if request.form.get('submit') else 0
 
         overall = (innovation + technical + presentation + usefulness) / 4.0
 
-        # Check if evaluation exists
+        # (project_id, jury_id) is unique: one statement creates or updates
         cursor.execute('''
-            SELECT id FROM evaluations
-            WHERE project_id = %s AND jury_id = %s
-        ''', (project_id, session['user_id']))
-        existing = cursor.fetchone()
-
-        if existing:
-            cursor.execute('''
-                UPDATE evaluations
-                SET innovation_score = %s, technical_score = %s,
-                    presentation_score = %s, usefulness_score = %s,
-                    overall_score = %s, comments = %s, is_submitted = %s
-                WHERE id = %s
-            ''', (innovation, technical, presentation, usefulness,
-                  overall, comments, is_submitted, existing['id']))
-        else:
-            cursor.execute('''
-                INSERT INTO evaluations (
-                    project_id, jury_id, innovation_score, technical_score,
-                    presentation_score, usefulness_score, overall_score,
-                    comments, is_submitted
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (project_id, session['user_id'], innovation, technical,
-                  presentation, usefulness, overall, comments, is_submitted))
+            INSERT INTO evaluations (
+                project_id, jury_id, innovation_score, technical_score,
+                presentation_score, usefulness_score, overall_score,
+                comments, is_submitted
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                innovation_score = VALUES(innovation_score),
+                technical_score = VALUES(technical_score),
+                presentation_score = VALUES(presentation_score),
+                usefulness_score = VALUES(usefulness_score),
+                overall_score = VALUES(overall_score),
+                comments = VALUES(comments),
+                is_submitted = VALUES(is_submitted)
+        ''', (project_id, session['user_id'], innovation, technical,
+              presentation, usefulness, overall, comments, is_submitted))
+
+        refresh_project_score(cursor, project_id, project['hackathon_id'])
 
         db.commit()
         cursor.close()
-        db.close()
+        dashboard_cache.invalidate(session['user_id'])
+        page_cache.invalidate(f'rankings:{project["hackathon_id"]}')
+        rankings_broker.notify(project['hackathon_id'])
 
         if is_submitted:
             flash('Evaluation submitted successfully!', 'success')
@@ -1079,54 +2132,532 @@ def evaluate_project(project_id):
         return redirect(url_for('dashboard'))
 
     # Get existing evaluation
-    cursor.execute('''
-        SELECT * FROM evaluations
-        WHERE project_id = %s AND jury_id = %s
-    ''', (project_id, session['user_id']))
-    evaluation = cursor.fetchone()
+    evaluation = query_evaluation(cursor, project_id, session['user_id'])
 
     cursor.close()
-    db.close()
 
     return render_template('evaluate_project.html', project=project, evaluation=evaluation)
 
 @app.route('/rankings/<int:hackathon_id>')
 def view_rankings(hackathon_id):
     """View hackathon rankings"""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+    hackathon = cached_query(f'hackathon:{hackathon_id}', [f'hackathon:{hackathon_id}'],
+                             query_hackathon, hackathon_id)
 
-    cursor.execute('SELECT * FROM hackathons WHERE id = %s', (hackathon_id,))
+    if not hackathon:
+        flash('Hackathon not found.', 'danger')
+        return redirect(url_for('index'))
+
+    # Read precomputed rankings
+    rankings = cached_query(f'rankings:{hackathon_id}', [f'rankings:{hackathon_id}'],
+                            query_scored_rankings, hackathon_id)
+
+    return render_template('rankings.html', hackathon=hackathon, rankings=rankings,
+                           scoring=ScoringScheme.from_hackathon(hackathon))
+
+# Live rankings
+LIVE_HEARTBEAT_SECONDS = 15
+
+def sse_event(event):
+    """A broker event in the text/event-stream format"""
+    return f'event: {event["type"]}\ndata: {json.dumps(event, default=str)}\n\n'
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+@app.route('/rankings/<int:hackathon_id>/live')
+def rankings_stream(hackathon_id):
+    """Server-sent events: the standings, then every change to them.
+
+    Viewers share the broker's copy of the standings, so the database is read
+    once per change rather than once per viewer.
+    """
+    hackathon = cached_query(f'hackathon:{hackathon_id}', [f'hackathon:{hackathon_id}'],
+                             query_hackathon, hackathon_id)
+    if not hackathon:
+        return Response('Hackathon not found.', status=404)
+
+    events, deliver = queue_delivery()
+    subscription = rankings_broker.subscribe(hackathon_id, deliver)
+
+    def generate():
+        try:
+            # Ask EventSource to reconnect quickly if the stream drops
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                try:
+                    event = events.get(timeout=LIVE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # Keeps proxies from timing out; a write to a gone client ends the stream
+                    yield ': keepalive\n\n'
+                    continue
+                yield sse_event(event)
+        finally:
+            rankings_broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+# Exports
+EXPORT_CHUNK_ROWS = 500
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+EXPORT_RANKINGS_SQL = '''
+    SELECT ps.rank_position as `rank`, t.team_name, p.title as project_title,
+           ps.avg_score as final_score, ps.score_count as evaluation_count,
+           p.github_url, p.demo_url
+    FROM project_scores ps
+    JOIN projects p ON ps.project_id = p.id
+    JOIN teams t ON p.team_id = t.id
+    WHERE ps.hackathon_id = %s AND ps.rank_position IS NOT NULL AND p.is_submitted = 1
+    ORDER BY ps.rank_position ASC
+'''
+
+EXPORT_EVALUATIONS_SQL = '''
+    SELECT e.id as evaluation_id, p.id as project_id, p.title as project_title,
+           t.team_name, u.full_name as jury_name,
+           e.innovation_score, e.technical_score, e.presentation_score,
+           e.usefulness_score, e.overall_score, e.is_submitted, e.comments,
+           e.created_at
+    FROM teams t
+    JOIN projects p ON p.team_id = t.id
+    JOIN evaluations e ON e.project_id = p.id
+    JOIN users u ON e.jury_id = u.id
+    WHERE t.hackathon_id = %s
+    ORDER BY p.id, e.id
+'''
+
+def stream_export(sql, params, columns, fmt, filename):
+    """Stream a query result as CSV or NDJSON without materializing it.
+
+    The cursor is unbuffered, so rows are pulled from MySQL as the client
+    reads and memory stays flat however many rows the query returns. A
+    client that disconnects part way leaves its remaining rows to be drained
+    before the connection is reused.
+    """
+    def generate():
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+        finished = False
+        try:
+            cursor.execute(sql, params)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer) if fmt == 'csv' else None
+            if writer:
+                writer.writerow(columns)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+            pending = 0
+            for row in cursor:
+                if writer:
+                    writer.writerow([row[name] for name in columns])
+                else:
+                    buffer.write(json.dumps({name: row[name] for name in columns}, default=str))
+                    buffer.write('\n')
+                pending += 1
+                if pending >= EXPORT_CHUNK_ROWS:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+            if pending:
+                yield buffer.getvalue()
+            finished = True
+        finally:
+            if not finished:
+                # An aborted download leaves rows unread, and MySQL won't close
+                # the cursor or reuse the connection until they are consumed:
+                # drain them so the connection can go back to the pool
+                drain = getattr(db, 'consume_results', None)
+                if drain is not None:
+                    try:
+                        drain()
+                    except Error:
+                        pass
+            try:
+                cursor.close()
+            except Error:
+                # The pool discards a connection it can't roll back
+                pass
+
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
+
+@app.route('/rankings/<int:hackathon_id>/export.<any(csv, ndjson):fmt>')
+def export_rankings(hackathon_id, fmt):
+    """Download a hackathon's rankings"""
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute('SELECT id, scores_stale FROM hackathons WHERE id = %s', (hackathon_id,))
     hackathon = cursor.fetchone()
+    cursor.close()
 
-    # Calculate rankings
-    cursor.execute('''
-        SELECT
-            t.team_name,
-            p.title as project_title,
-            p.github_url,
-            p.demo_url,
-            AVG(e.overall_score) as final_score,
-            COUNT(e.id) as evaluation_count
-        FROM projects p
-        JOIN teams t ON p.team_id = t.id
-        LEFT JOIN evaluations e ON p.id = e.project_id AND e.is_submitted = 1
-        WHERE t.hackathon_id = %s AND p.is_submitted = 1
-        GROUP BY p.id
-        HAVING COUNT(e.id) > 0
-        ORDER BY final_score DESC
-    ''', (hackathon_id,))
-    rankings = cursor.fetchall()
+    if not hackathon:
+        flash('Hackathon not found.', 'danger')
+        return redirect(url_for('index'))
+    if hackathon['scores_stale']:
+        score_if_stale(hackathon_id)
 
+    return stream_export(EXPORT_RANKINGS_SQL, (hackathon_id,),
+        ('rank', 'team_name', 'project_title', 'final_score', 'evaluation_count',
+         'github_url', 'demo_url'),
+        fmt, f'rankings-{hackathon_id}')
+
+@app.route('/hackathon/<int:hackathon_id>/evaluations/export.<any(csv, ndjson):fmt>')
+@role_required('organizer')
+def export_evaluations(hackathon_id, fmt):
+    """Download every evaluation of a hackathon (organizer only)"""
+    cursor = get_db().cursor(dictionary=True)
+    hackathon = query_organized_hackathon(cursor, hackathon_id, session['user_id'])
     cursor.close()
-    db.close()
 
-    return render_template('rankings.html', hackathon=hackathon, rankings=rankings)
+    if not hackathon:
+        flash('Only the organizer can export evaluations.', 'danger')
+        return redirect(url_for('dashboard'))
+
+    return stream_export(EXPORT_EVALUATIONS_SQL, (hackathon_id,),
+        ('evaluation_id', 'project_id', 'project_title', 'team_name', 'jury_name',
+         'innovation_score', 'technical_score', 'presentation_score', 'usefulness_score',
+         'overall_score', 'is_submitted', 'comments', 'created_at'),
+        fmt, f'evaluations-{hackathon_id}')
+
+# JSON API
+API_HACKATHON_FIELDS = ('id', 'title', 'description', 'organizer_id', 'organizer_name',
+                        'start_date', 'end_date', 'registration_deadline', 'max_team_size',
+                        'min_team_size', 'status', 'is_online', 'team_count', 'submitted_count')
+API_TEAM_FIELDS = ('id', 'hackathon_id', 'team_name', 'team_leader_id', 'leader_name',
+                   'description', 'member_count', 'is_submitted', 'created_at')
+API_PROJECT_FIELDS = ('id', 'team_id', 'team_name', 'title', 'description',
+                      'github_url', 'demo_url', 'submitted_at')
+API_RANKING_FIELDS = ('rank_position', 'project_id', 'team_id', 'team_name', 'project_title',
+                      'github_url', 'demo_url', 'final_score', 'evaluation_count')
+
+def api_fields(allowed):
+    """Fields requested with ?fields=a,b, limited to the resource's public fields"""
+    requested = request.args.get('fields')
+    if not requested:
+        return allowed
+    wanted = {name.strip() for name in requested.split(',')}
+    return tuple(name for name in allowed if name in wanted)
+
+def api_row(row, fields):
+    """Public JSON representation of a row"""
+    item = {}
+    for name in fields:
+        value = row.get(name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        item[name] = value
+    return item
+
+def api_response(payload):
+    """JSON response carrying a content ETag, answered with 304 when unchanged"""
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+def api_not_found(message):
+    return jsonify({'error': message}), 404
+
+@app.route('/api/v1/hackathons')
+def api_hackathons():
+    """Active hackathons, paginated"""
+    limit, after = requested_page()
+    fields = api_fields(API_HACKATHON_FIELDS)
+    cursor = get_db().cursor(dictionary=True)
+    hackathons, next_cursor = query_active_hackathons(cursor, limit, after)
+    cursor.close()
+    return api_response({
+        'data': [api_row(h, fields) for h in hackathons],
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/api/v1/hackathons/<int:hackathon_id>')
+def api_hackathon(hackathon_id):
+    """A single hackathon"""
+    cursor = get_db().cursor(dictionary=True)
+    hackathon = query_hackathon(cursor, hackathon_id)
+    cursor.close()
+    if not hackathon:
+        return api_not_found('Hackathon not found.')
+    return api_response({'data': api_row(hackathon, api_fields(API_HACKATHON_FIELDS))})
+
+@app.route('/api/v1/hackathons/<int:hackathon_id>/teams')
+def api_hackathon_teams(hackathon_id):
+    """Teams of a hackathon, newest first, paginated"""
+    limit, after = requested_page()
+    fields = api_fields(API_TEAM_FIELDS)
+    cursor = get_db().cursor(dictionary=True)
+    teams, next_cursor = query_hackathon_teams(cursor, hackathon_id, limit, after)
+    cursor.close()
+    return api_response({
+        'data': [api_row(t, fields) for t in teams],
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/api/v1/teams/<int:team_id>')
+def api_team(team_id):
+    """A single team"""
+    cursor = get_db().cursor(dictionary=True)
+    team = query_team_summary(cursor, team_id)
+    cursor.close()
+    if not team:
+        return api_not_found('Team not found.')
+    return api_response({'data': api_row(team, api_fields(API_TEAM_FIELDS))})
+
+@app.route('/api/v1/hackathons/<int:hackathon_id>/projects')
+def api_hackathon_projects(hackathon_id):
+    """Submitted projects of a hackathon, latest first, paginated"""
+    limit, after = requested_page()
+    fields = api_fields(API_PROJECT_FIELDS)
+    cursor = get_db().cursor(dictionary=True)
+    projects, next_cursor = query_submitted_projects(cursor, hackathon_id, limit, after)
+    cursor.close()
+    return api_response({
+        'data': [api_row(p, fields) for p in projects],
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/api/v1/hackathons/<int:hackathon_id>/rankings')
+def api_hackathon_rankings(hackathon_id):
+    """Standings of a hackathon.
+
+    Validators come from hackathons.rankings_updated_at, so an unchanged
+    board is answered with 304 before the standings are read.
+    """
+    fields = api_fields(API_RANKING_FIELDS)
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute('SELECT id, rankings_updated_at, scores_stale FROM hackathons WHERE id = %s',
+                   (hackathon_id,))
+    hackathon = cursor.fetchone()
+    if not hackathon:
+        cursor.close()
+        return api_not_found('Hackathon not found.')
+    if hackathon['scores_stale'] and score_if_stale(hackathon_id):
+        # Validators and standings both come from the rescore, on the primary
+        cursor.close()
+        cursor = get_db(primary=True).cursor(dictionary=True)
+        cursor.execute('SELECT id, rankings_updated_at FROM hackathons WHERE id = %s', (hackathon_id,))
+        hackathon = cursor.fetchone()
+
+    updated_at = hackathon['rankings_updated_at']
+    stamp = updated_at.isoformat() if updated_at else 'never'
+    etag = hashlib.sha1(f'{hackathon_id}:{stamp}:{",".join(fields)}'.encode()).hexdigest()
+    last_modified = (updated_at.astimezone(timezone.utc).replace(microsecond=0)
+                     if updated_at else None)
+
+    unchanged = request.if_none_match.contains(etag)
+    if not request.if_none_match and last_modified and request.if_modified_since:
+        unchanged = last_modified <= request.if_modified_since
+    if unchanged:
+        cursor.close()
+        response = app.response_class(status=304)
+    else:
+        rankings = query_rankings(cursor, hackathon_id)
+        cursor.close()
+        response = jsonify({'data': [api_row(r, fields) for r in rankings]})
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+@app.cli.command('rebuild-leaderboard')
+@click.argument('hackathon_id', type=int, required=False)
+def rebuild_leaderboard_command(hackathon_id):
+    """Recompute project_scores from the evaluations table"""
+    count = rebuild_project_scores(get_db(), hackathon_id)
+    page_cache.clear()
+    click.echo(f'Rebuilt rankings for {count} hackathon(s).')
+
+@app.cli.command('assign-reviews')
+@click.argument('hackathon_id', type=int)
+def assign_reviews_command(hackathon_id):
+    """Balance a hackathon's review assignments across its jury"""
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    added, removed = assign_reviews(cursor, hackathon_id)
+    db.commit()
+    cursor.close()
+    dashboard_cache.clear()
+    click.echo(f'Added {len(added)} and removed {len(removed)} review assignment(s).')
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations"""
+    applied = migrate(get_db(), app.config['DB_BACKEND'])
+    if applied:
+        click.echo(f'Applied migrations: {", ".join(str(v) for v in applied)}')
+    else:
+        click.echo('Schema is up to date.')
+
+def route_queries():
+    """The statements the routes run, with representative parameters.
+
+    Each shared query function is run against a recording cursor, so the
+    plan check EXPLAINs exactly the SQL the routes execute. Paginated
+    queries are captured for the first page and for a later one, whose
+    keyset condition can change the plan.
+    """
+    after = ['2100-01-01 00:00:00', 0]
+    calls = [
+        ('index', query_active_hackathons, 25),
+        ('index.after', query_active_hackathons, 25, after),
+        ('login', query_login, 'x', 'x'),
+        ('dashboard.organizer', load_dashboard, 1, 'organizer'),
+        ('dashboard.jury', load_dashboard, 1, 'jury'),
+        ('dashboard.participant', load_dashboard, 1, 'participant'),
+        ('hackathon', query_hackathon, 1),
+        ('hackathon_detail.teams', query_hackathon_teams, 1, 25),
+        ('hackathon_detail.teams.after', query_hackathon_teams, 1, 25, after),
+        ('hackathon_detail.user_team', query_user_team, 1, 1),
+        ('edit_hackathon', query_organized_hackathon, 1, 1),
+        ('team_detail', query_team, 1),
+        ('team_detail.members', query_team_members, 1),
+        ('team_detail.project', query_team_project, 1),
+        ('edit_team', query_led_team, 1, 1),
+        ('edit_team.name_taken', query_team_name_taken, 1, 'x', 1),
+        ('request_join_team', query_join_target, 1),
+        ('request_join_team.memberships', query_join_memberships, 1, 1, 1),
+        ('view_team_requests', query_pending_requests, 1, 25),
+        ('view_team_requests.after', query_pending_requests, 1, 25, after),
+        ('approve_team_request', query_pending_request, 1),
+        ('submit_project', query_led_team_project_state, 1, 1),
+        ('evaluate_hackathon', query_evaluation_projects, 1, 1, False),
+        ('evaluate_hackathon.assigned', query_evaluation_projects, 1, 1, True),
+        ('evaluate_bulk', query_evaluable_projects, 1, 1, [1, 2]),
+        ('evaluate_project', query_project, 1),
+        ('evaluate_project.evaluation', query_evaluation, 1, 1),
+        ('view_rankings', query_rankings, 1),
+        ('api_team', query_team_summary, 1),
+        ('api_hackathon_projects', query_submitted_projects, 1, 25),
+        ('api_hackathon_projects.after', query_submitted_projects, 1, 25, after),
+    ]
+    for kind in SEARCH_SOURCES:
+        if search_index is None:
+            calls.append((f'search.{kind}', query_search, kind, 'hackathon', 1, 25))
+            calls.append((f'search.{kind}.after', query_search, kind, 'hackathon', None, 25, [1.0, 0]))
+        else:
+            calls.append((f'search.{kind}', query_search_results, kind, [1, 2]))
+
+    statements = {}
+    for name, query, *args in calls:
+        recorder = RecordingCursor()
+        query(recorder, *args)
+        for number, statement in enumerate(recorder.statements, start=1):
+            statements[name if number == 1 else f'{name}.{number}'] = statement
+    statements['export_rankings'] = (EXPORT_RANKINGS_SQL, (1,))
+    statements['export_evaluations'] = (EXPORT_EVALUATIONS_SQL, (1,))
+    statements['rescore_hackathon'] = (SCORING_EVALUATIONS_SQL, (1,))
+    return statements
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """EXPLAIN the route queries and fail on any full table scan"""
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute('SELECT COUNT(*) as count FROM team_members')
+    if cursor.fetchone()['count'] < 1000:
+        click.echo('Warning: dataset is small, the optimizer may prefer scans. '
+                   'Seed a large dataset before relying on this check.')
+    cursor.close()
+
+    offenders = find_full_scans(db, route_queries(), dialect=app.config['DB_BACKEND'])
+    for name, table, rows in offenders:
+        estimate = f' (~{rows} rows)' if rows is not None else ''
+        click.echo(f'{name}: full scan of {table}{estimate}')
+    if offenders:
+        raise SystemExit(1)
+    click.echo('No full table scans found.')
+
+@app.cli.command('import-participants')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--hackathon-id', type=int, help='Create the teams named in the file for this hackathon.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--default-password', help='Password for rows without one (default: random).')
+def import_participants_command(csv_path, hackathon_id, batch_size, default_password):
+    """Bulk import users, teams and team members from a CSV file"""
+    db = get_db()
+    importer = ParticipantImporter(db, csv_path, hackathon_id, hash_password,
+                                   batch_size=batch_size,
+                                   default_password=default_password,
+                                   progress=click.echo)
+    stats = importer.run()
+    for error in importer.errors:
+        click.echo(error, err=True)
+    if hackathon_id is not None:
+        reconcile_counters(db)
+        reindex_search(db)
+        dashboard_cache.clear()
+        page_cache.clear()
+    click.echo(', '.join(f'{name.replace("_", " ")}: {count}' for name, count in stats.items()))
+
+@app.cli.command('seed-data')
+@click.option('--users', default=1000, show_default=True, help='Participants to create.')
+@click.option('--hackathons', default=10, show_default=True)
+@click.option('--teams', default=200, show_default=True)
+@click.option('--jurors', default=20, show_default=True)
+@click.option('--prefix', default='bench', show_default=True, help='Email prefix of the generated users.')
+@click.option('--seed', default=0, show_default=True, help='Random seed, for reproducible datasets.')
+def seed_data_command(users, hackathons, teams, jurors, prefix, seed):
+    """Fill the database with synthetic data for load testing"""
+    db = get_db()
+    generator = DataGenerator(db, hash_password, users=users, hackathons=hackathons,
+                              teams=teams, jurors=jurors, prefix=prefix, seed=seed,
+                              progress=click.echo)
+    try:
+        generator.run()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    rebuild_project_scores(db)
+    reconcile_counters(db)
+    reindex_search(db)
+    dashboard_cache.clear()
+    page_cache.clear()
+    click.echo(f'Seeded {", ".join(f"{count} {table}" for table, count in generator.stats.items())}.')
+
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Fix drift in the denormalized team/member/submission counters"""
+    fixed = reconcile_counters(get_db())
+    page_cache.clear()
+    click.echo(f'Reconciled {fixed} row(s).')
+
+@app.route('/status/cache')
+def cache_status():
+    """Page cache statistics for monitoring"""
+    return jsonify(page_cache.stats())
+
+@app.route('/status/live')
+def live_status():
+    """Live rankings subscribers of this worker"""
+    return jsonify(rankings_broker.stats())
+
+@app.route('/status/search')
+def search_status():
+    """Size of this worker's in-memory search index (SQLite only)"""
+    if search_index is None:
+        return jsonify({'backend': 'fulltext'})
+    return jsonify(search_index.stats())
+
+@app.route('/status/db-pool')
+def db_pool_status():
+    """Connection pool statistics for monitoring"""
+    stats = get_pool().stats()
+    if replica_configured():
+        stats['replica'] = get_replica_pool().stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Route latency, database time and pool statistics in the Prometheus format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     # Initialize database tables
     try:
-        init_db()
+        with app.app_context():
+            init_db()
     except Error as e:
         print(f"Database initialization error: {e}")
         print(f"Please ensure MySQL is running and database '{app.config['DB_NAME']}' exists")
@@ -0,0 +1,461 @@
+"""
+Async (ASGI) serving mode for the Hackathon Platform
+
+The read-heavy pages -- index, hackathon_detail, team_detail, dashboard and
+view_rankings -- are served by coroutines that query MySQL through aiomysql,
+so one worker waits on many queries at once instead of tying up a thread per
+request. Every other route is handed to the regular Flask app on a thread
+pool. URLs, templates, sessions and the page cache are shared with the WSGI
+app.
+
+Live rankings streams (rankings_stream) are also served on the event loop,
+so a spectator costs a queue rather than a thread.
+
+Serve with any ASGI server, for example:
+
+    pip install aiomysql uvicorn
+    WEB_CONCURRENCY=4 uvicorn asgi:app
+
+The async views reuse the shared query functions of app.py. Those take a
+cursor, run one statement and shape its rows; run_query() calls a function
+once against a recorder to capture its statement, runs the statement on
+aiomysql, then calls the function again to shape the fetched rows.
+"""
+
+import asyncio
+from functools import wraps
+import io
+import sys
+import time
+
+from flask import render_template, request, redirect, url_for, flash, session, g
+from werkzeug.exceptions import HTTPException
+
+import app as main
+from app import (create_app, requested_page, next_page_url, role_is_fresh, refresh_role,
+                 sse_event, LIVE_HEARTBEAT_SECONDS, SSE_HEADERS,
+                 query_hackathon, query_active_hackathons, query_hackathon_teams,
+                 query_rankings, query_user_role, query_user_team, query_team,
+                 query_team_members, query_team_project)
+from dashboard_data import load_dashboard
+from db import RecordingCursor
+from scoring import ScoringScheme
+
+
+class AsyncDatabase:
+    """aiomysql pool of one worker, opened on first use"""
+
+    def __init__(self, config, replica=False):
+        self.config = config
+        self.replica = replica
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def pool(self):
+        async with self._lock:
+            if self._pool is None:
+                try:
+                    import aiomysql
+                except ImportError:
+                    raise RuntimeError('The async server requires the aiomysql package: pip install aiomysql')
+                self._aiomysql = aiomysql
+                # autocommit: every read sees the latest committed data, as with the sync pool
+                self._pool = await aiomysql.create_pool(
+                    minsize=1,
+                    maxsize=self.config['ASYNC_DB_POOL_SIZE'],
+                    host=self.config['DB_REPLICA_HOST' if self.replica else 'DB_HOST'],
+                    port=self.config['DB_REPLICA_PORT' if self.replica else 'DB_PORT'],
+                    user=self.config['DB_USER'],
+                    password=self.config['DB_PASSWORD'],
+                    db=self.config['DB_NAME'],
+                    charset='utf8mb4',
+                    autocommit=True
+                )
+        return self._pool
+
+    async def fetch(self, sql, params, dictionary=True):
+        pool = await self.pool()
+        cursor_class = self._aiomysql.DictCursor if dictionary else self._aiomysql.Cursor
+        async with pool.acquire() as conn:
+            async with conn.cursor(cursor_class) as cursor:
+                started = time.perf_counter()
+                try:
+                    await cursor.execute(sql, params)
+                    return await cursor.fetchall()
+                finally:
+                    # Counted in the request's query log like a sync statement
+                    log = g.get('query_log')
+                    if log is not None:
+                        log.record(sql, time.perf_counter() - started)
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+
+async_db = AsyncDatabase(main.app.config)
+async_replica = AsyncDatabase(main.app.config, replica=True)
+
+
+async def run_query(query, *args, primary=False):
+    """Run a single-statement shared query function on the async pool.
+
+    Reads go to the replica on the same terms as app.get_db().
+    """
+    recorder = RecordingCursor()
+    query(recorder, *args)
+    if len(recorder.statements) != 1:
+        raise ValueError(f'{query.__name__} runs {len(recorder.statements)} statements; expected 1')
+    sql, params = recorder.statements[0]
+    db = async_replica if not primary and main.reads_from_replica() else async_db
+    rows = await db.fetch(sql, params, recorder.dictionary)
+    return query(RecordingCursor(rows), *args)
+
+
+async def cached_query(key, tags, query, *args):
+    """Async counterpart of app.cached_query"""
+    async def load():
+        # A replica may not have the write that invalidated this entry yet
+        return await run_query(query, *args, primary=main.page_cache.recently_invalidated(tags))
+    return await main.page_cache.get_or_set_async(key, tags, load)
+
+
+async def current_role():
+    """Async counterpart of app.current_role"""
+    if role_is_fresh():
+        return session['user_role']
+    return refresh_role(await run_query(query_user_role, session['user_id']))
+
+
+def login_required(f):
+    """Async counterpart of app.login_required"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Please log in to access this page.', 'warning')
+            return redirect(url_for('login'))
+        return await f(*args, **kwargs)
+    return decorated_function
+
+
+# Async views, mirroring the routes of the same name in app.py
+async def index():
+    """Homepage"""
+    limit, after = requested_page()
+
+    hackathons, next_cursor = await cached_query(f'index:{limit}:{after}', ['hackathons'],
+                                                 query_active_hackathons, limit, after)
+
+    next_url = next_page_url('index', next_cursor, limit)
+    if request.args.get('partial'):
+        return render_template('_hackathon_cards.html', hackathons=hackathons,
+                               next_url=next_url, partial=True)
+    return render_template('index.html', hackathons=hackathons, next_url=next_url)
+
+@login_required
+async def dashboard():
+    """User dashboard"""
+    user_id = session['user_id']
+    user_role = await current_role()
+
+    data = main.dashboard_cache.get(user_id, user_role)
+    if data is None:
+        data = await run_query(load_dashboard, user_id, user_role)
+        main.dashboard_cache.set(user_id, user_role, data)
+
+    return render_template('dashboard.html', data=data)
+
+async def hackathon_detail(id):
+    """Hackathon details page"""
+    tags = [f'hackathon:{id}']
+    hackathon = await cached_query(f'hackathon:{id}', tags, query_hackathon, id)
+
+    if not hackathon:
+        flash('Hackathon not found.', 'danger')
+        return redirect(url_for('index'))
+
+    limit, after = requested_page()
+    queries = [cached_query(f'hackathon_teams:{id}:{limit}:{after}', tags,
+                            query_hackathon_teams, id, limit, after)]
+    if 'user_id' in session:
+        queries.append(run_query(query_user_team, id, session['user_id']))
+    (teams, next_cursor), *user_team = await asyncio.gather(*queries)
+    user_team = user_team[0] if user_team else None
+
+    next_url = next_page_url('hackathon_detail', next_cursor, limit, id=id)
+    if request.args.get('partial'):
+        return render_template('_team_cards.html',
+                               hackathon=hackathon,
+                               teams=teams,
+                               user_team=user_team,
+                               next_url=next_url,
+                               partial=True)
+    return render_template('hackathon_detail.html',
+                         hackathon=hackathon,
+                         teams=teams,
+                         user_team=user_team,
+                         next_url=next_url)
+
+@login_required
+async def team_detail(id):
+    """Team details page"""
+    team = await run_query(query_team, id)
+
+    if not team:
+        flash('Team not found.', 'danger')
+        return redirect(url_for('index'))
+
+    members, project = await asyncio.gather(run_query(query_team_members, id),
+                                            run_query(query_team_project, id))
+
+    return render_template('team_detail.html',
+                         team=team,
+                         members=members,
+                         project=project,
+                         is_leader=(team['team_leader_id'] == session['user_id']))
+
+async def view_rankings(hackathon_id):
+    """View hackathon rankings"""
+    tags = [f'rankings:{hackathon_id}']
+
+    async def load_rankings():
+        # A hackathon with a scoring scheme may need rescoring first, on the primary
+        rescored = await asyncio.to_thread(main.score_if_stale, hackathon_id)
+        return await run_query(query_rankings, hackathon_id,
+                               primary=rescored or main.page_cache.recently_invalidated(tags))
+
+    hackathon, rankings = await asyncio.gather(
+        cached_query(f'hackathon:{hackathon_id}', [f'hackathon:{hackathon_id}'],
+                     query_hackathon, hackathon_id),
+        main.page_cache.get_or_set_async(f'rankings:{hackathon_id}', tags, load_rankings)
+    )
+
+    if not hackathon:
+        flash('Hackathon not found.', 'danger')
+        return redirect(url_for('index'))
+
+    return render_template('rankings.html', hackathon=hackathon, rankings=rankings,
+                           scoring=ScoringScheme.from_hackathon(hackathon))
+
+# Flask endpoint name -> async view
+ASYNC_VIEWS = {
+    'index': index,
+    'dashboard': dashboard,
+    'hackathon_detail': hackathon_detail,
+    'team_detail': team_detail,
+    'view_rankings': view_rankings,
+}
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope"""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    server = scope.get('server') or ('localhost', 80)
+    environ['SERVER_NAME'] = server[0]
+    environ['SERVER_PORT'] = str(server[1] or 80)
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key in environ:
+            value = environ[key] + ',' + value
+        environ[key] = value
+    return environ
+
+
+async def read_body(receive):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+class HackathonASGI:
+    """ASGI application: async views for the read routes, the Flask app for the rest"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        # aiomysql only speaks MySQL; with SQLite every request goes to Flask
+        self.async_reads = flask_app.config['DB_BACKEND'] == 'mysql'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise NotImplementedError(f'Unsupported ASGI scope type: {scope["type"]}')
+
+        if scope['method'] in ('GET', 'HEAD'):
+            environ = build_environ(scope, b'')
+            adapter = self.flask_app.url_map.bind_to_environ(environ)
+            try:
+                endpoint, values = adapter.match()
+            except HTTPException:
+                # 404s, 405s and slash redirects are answered by Flask
+                endpoint, values = None, {}
+            if endpoint == 'rankings_stream' and scope['method'] == 'GET':
+                return await self.serve_events(values['hackathon_id'], environ, receive, send)
+            view = ASYNC_VIEWS.get(endpoint) if self.async_reads else None
+            if view is not None:
+                return await self.serve_async(view, values, environ, send)
+
+        environ = build_environ(scope, await read_body(receive))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.serve_wsgi, environ, loop, send)
+
+    async def serve_async(self, view, values, environ, send):
+        """Dispatch to an async view the way Flask's full_dispatch_request does"""
+        app = self.flask_app
+        # Coroutines share the event loop thread, so its stack samples would mix requests
+        environ['hackathon.async_view'] = True
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**values)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+
+            body = response.get_data() if environ['REQUEST_METHOD'] != 'HEAD' else b''
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                            for k, v in response.headers.items()],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+
+    async def serve_events(self, hackathon_id, environ, receive, send):
+        """A live rankings stream, fed by the broker through an asyncio queue"""
+        loop = asyncio.get_running_loop()
+
+        def find_hackathon():
+            with self.flask_app.request_context(environ):
+                return main.cached_query(f'hackathon:{hackathon_id}', [f'hackathon:{hackathon_id}'],
+                                         query_hackathon, hackathon_id)
+
+        if not await loop.run_in_executor(None, find_hackathon):
+            await send({'type': 'http.response.start', 'status': 404,
+                        'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+            await send({'type': 'http.response.body', 'body': b'Hackathon not found.'})
+            return
+
+        events = asyncio.Queue()
+
+        def deliver(event):
+            # Called on the broker's thread; a client this far behind is dropped
+            if events.qsize() >= 100:
+                raise asyncio.QueueFull
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        subscription = main.rankings_broker.subscribe(hackathon_id, deliver)
+        disconnected = asyncio.ensure_future(wait_disconnect())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/event-stream; charset=utf-8')] +
+                           [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in SSE_HEADERS.items()],
+            })
+            chunk = 'retry: 3000\n\n'
+            while True:
+                await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+                if subscription.closed:
+                    break
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, disconnected}, timeout=LIVE_HEARTBEAT_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    chunk = sse_event(getter.result())
+                    continue
+                getter.cancel()
+                if disconnected.done():
+                    break
+                chunk = ': keepalive\n\n'
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            main.rankings_broker.unsubscribe(subscription)
+            disconnected.cancel()
+
+    def serve_wsgi(self, environ, loop, send):
+        """Run the Flask app on a pool thread, sending its response as it is produced.
+
+        The whole response is iterated on one thread, so streamed exports keep
+        their request context and are never buffered in full.
+        """
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            send_sync({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                            for k, v in headers],
+            })
+
+        result = self.flask_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_sync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            send_sync({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    if self.async_reads:
+                        await async_db.pool()
+                        if main.replica_configured():
+                            await async_replica.pool()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.close()
+                await async_replica.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = HackathonASGI(create_app())
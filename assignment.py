@@ -0,0 +1,103 @@
+"""
+Balanced jury-to-project review assignment
+
+A hackathon with reviews_per_project set gives each submitted project that
+many reviewers from its jury panel, instead of showing every juror every
+project. plan_reviews() works out the changes that bring the current
+assignments to that target:
+
+- a juror never reviews a project of a team they belong to;
+- every project gets its reviewers from the least loaded eligible jurors,
+  so review loads stay within one of each other;
+- assignments already made are kept wherever possible, so late projects
+  and late jurors only move the reviews needed to even the loads out;
+- a review with an evaluation under way (draft or submitted) is never
+  moved, and an evaluation made before assignment counts as a review.
+
+The planner is pure: the caller reads the current state, applies the
+returned changes, and holds a lock on the hackathon while doing so.
+"""
+
+
+def plan_reviews(projects, jurors, reviews, per_project, conflicts=(), started=()):
+    """Assignments to add and remove to give each project per_project even reviews.
+
+    projects are the hackathon's submitted project ids and jurors its panel;
+    reviews are the current (project_id, jury_id) assignments; conflicts are
+    pairs that must not be assigned; started are pairs with an evaluation.
+    Returns (add, remove), two lists of (project_id, jury_id) pairs.
+    """
+    projects = sorted(set(projects))
+    jurors = sorted(set(jurors))
+    conflicts = set(conflicts)
+    started = set(started)
+    current = set(reviews)
+    panel = set(jurors)
+    submitted = set(projects)
+
+    # Started evaluations always count; other reviews only while still valid
+    kept = {pair for pair in current | started if pair in started or
+            (pair[0] in submitted and pair[1] in panel and pair not in conflicts)}
+    reviewers = {project_id: set() for project_id in projects}
+    load = {jury_id: 0 for jury_id in jurors}
+    for project_id, jury_id in kept:
+        if project_id in reviewers and jury_id in load:
+            reviewers[project_id].add(jury_id)
+            load[jury_id] += 1
+
+    def movable(project_id, jury_id):
+        return (project_id, jury_id) not in started
+
+    # A lowered target drops the unstarted reviews of the busiest jurors first
+    for project_id in projects:
+        extra = len(reviewers[project_id]) - per_project
+        if extra > 0:
+            for jury_id in sorted(reviewers[project_id], key=lambda j: -load[j]):
+                if extra and movable(project_id, jury_id):
+                    reviewers[project_id].discard(jury_id)
+                    load[jury_id] -= 1
+                    extra -= 1
+
+    def eligible(project_id, jury_id):
+        return jury_id not in reviewers[project_id] and (project_id, jury_id) not in conflicts
+
+    # Fill the projects with the fewest reviewers first, from the least loaded jurors
+    for project_id in sorted(projects, key=lambda p: len(reviewers[p])):
+        need = per_project - len(reviewers[project_id])
+        if need <= 0:
+            continue
+        candidates = sorted((j for j in jurors if eligible(project_id, j)), key=lambda j: (load[j], j))
+        for jury_id in candidates[:need]:
+            reviewers[project_id].add(jury_id)
+            load[jury_id] += 1
+
+    # Even out loads left uneven by late jurors: move unstarted reviews from
+    # the busiest juror to the idlest one that may take them
+    by_juror = {jury_id: set() for jury_id in jurors}
+    for project_id, assigned in reviewers.items():
+        for jury_id in assigned:
+            by_juror[jury_id].add(project_id)
+
+    def move_one():
+        for busiest in sorted(jurors, key=lambda j: (-load[j], j)):
+            for idlest in sorted(jurors, key=lambda j: (load[j], j)):
+                if load[busiest] - load[idlest] <= 1:
+                    break
+                for project_id in sorted(by_juror[busiest]):
+                    if movable(project_id, busiest) and eligible(project_id, idlest):
+                        reviewers[project_id].discard(busiest)
+                        reviewers[project_id].add(idlest)
+                        by_juror[busiest].discard(project_id)
+                        by_juror[idlest].add(project_id)
+                        load[busiest] -= 1
+                        load[idlest] += 1
+                        return True
+        return False
+
+    while move_one():
+        pass
+
+    wanted = {(project_id, jury_id) for project_id, assigned in reviewers.items() for jury_id in assigned}
+    # Started evaluations of withdrawn projects or departed jurors stay on record
+    wanted |= {pair for pair in current & started}
+    return sorted(wanted - current), sorted(current - wanted)
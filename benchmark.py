@@ -0,0 +1,341 @@
+"""
+Load-testing harness for the Hackathon Platform
+
+Drives the main routes with concurrent clients and reports throughput,
+p50/p95/p99 latency and database queries per request. Results
+are saved as JSON so later runs can be compared against a baseline.
+
+Seed a local database first, then run the harness:
+
+    flask --app app seed-data --users 100000 --hackathons 20 --teams 5000 --jurors 50
+    python benchmark.py --concurrency 16 --requests 500
+
+By default requests go through the Flask test client in this process, which
+needs no server. With --url the harness drives a running server instead
+(gunicorn via wsgi.py, or uvicorn via asgi.py), which measures the real
+serving stack. Either way, query counts come from each response's
+Server-Timing header:
+
+    python benchmark.py --url http://localhost:8000 --concurrency 200
+
+Compare with an earlier run; the exit status is 1 if any route regressed:
+
+    python benchmark.py --compare benchmark_results/<baseline>.json
+
+The evaluate_project.post scenario submits evaluations, so only point the
+harness at a disposable database.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import http.cookiejar
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import app as main
+
+PASSWORD = 'password123'
+RESULTS_DIR = 'benchmark_results'
+# Server-Timing: db;dur=1.234;desc="3 queries"
+SERVER_TIMING_QUERIES = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+
+
+def query_count(headers):
+    """Queries the app reported for a response, or None if it reported none"""
+    match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing') or '')
+    return int(match.group(1)) if match else None
+
+
+# Clients
+class InProcessClient:
+    def __init__(self):
+        self.client = main.app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code, query_count(response.headers)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                return response.status, query_count(response.headers)
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, query_count(e.headers)
+
+
+# Dataset and scenarios
+def dataset_sizes(cursor):
+    sizes = {}
+    for table in ('users', 'hackathons', 'teams', 'team_members', 'projects', 'evaluations'):
+        cursor.execute(f'SELECT COUNT(*) as count FROM {table}')
+        sizes[table] = cursor.fetchone()['count']
+    return sizes
+
+
+def pick_targets(cursor, prefix):
+    """Ids and accounts from the seeded data that the scenarios request"""
+    like = f'{prefix}-%'
+    cursor.execute('''
+        SELECT h.id, u.email
+        FROM hackathons h
+        JOIN users u ON h.organizer_id = u.id
+        WHERE u.email LIKE %s
+        ORDER BY h.team_count DESC
+        LIMIT 10
+    ''', (like,))
+    hackathons = cursor.fetchall()
+    if not hackathons:
+        raise SystemExit(f'No seeded data with prefix "{prefix}"; run flask --app app seed-data first.')
+
+    cursor.execute('''
+        SELECT ja.hackathon_id, u.email
+        FROM jury_assignments ja
+        JOIN users u ON ja.jury_id = u.id
+        JOIN hackathons h ON ja.hackathon_id = h.id
+        WHERE u.email LIKE %s
+        ORDER BY h.submitted_count DESC
+        LIMIT 1
+    ''', (like,))
+    jury = cursor.fetchone()
+
+    cursor.execute('''
+        SELECT p.id FROM projects p
+        JOIN teams t ON p.team_id = t.id
+        WHERE t.hackathon_id = %s AND p.is_submitted = 1
+        LIMIT 200
+    ''', (jury['hackathon_id'],))
+    projects = [row['id'] for row in cursor.fetchall()]
+
+    cursor.execute('''
+        SELECT tm.team_id, u.email
+        FROM team_members tm
+        JOIN users u ON tm.user_id = u.id
+        WHERE u.email LIKE %s AND u.role = 'participant' AND tm.status = 'accepted'
+        LIMIT 200
+    ''', (like,))
+    members = cursor.fetchall()
+
+    return {
+        'hackathons': [row['id'] for row in hackathons],
+        'organizer': hackathons[0]['email'],
+        'jury': jury['email'],
+        'jury_hackathon': jury['hackathon_id'],
+        'projects': projects,
+        'participant': members[0]['email'],
+        'teams': [row['team_id'] for row in members],
+    }
+
+
+def evaluation_form(rnd):
+    form = {name: round(rnd.uniform(3, 10), 1)
+            for name in ('innovation', 'technical', 'presentation', 'usefulness')}
+    form.update(comments='Benchmark evaluation', submit='1')
+    return form
+
+
+# name -> (account to log in as, method, request builder)
+SCENARIOS = {
+    'index': (None, 'GET', lambda t, r: ('/', None)),
+    'login': (None, 'POST', lambda t, r: ('/login', {'email': t['participant'], 'password': PASSWORD})),
+    'dashboard.organizer': ('organizer', 'GET', lambda t, r: ('/dashboard', None)),
+    'dashboard.jury': ('jury', 'GET', lambda t, r: ('/dashboard', None)),
+    'dashboard.participant': ('participant', 'GET', lambda t, r: ('/dashboard', None)),
+    'hackathon_detail': ('participant', 'GET', lambda t, r: (f'/hackathon/{r.choice(t["hackathons"])}', None)),
+    'team_detail': ('participant', 'GET', lambda t, r: (f'/team/{r.choice(t["teams"])}', None)),
+    'evaluate_hackathon': ('jury', 'GET', lambda t, r: (f'/evaluate/{t["jury_hackathon"]}', None)),
+    'evaluate_project.get': ('jury', 'GET', lambda t, r: (f'/evaluate/project/{r.choice(t["projects"])}', None)),
+    'evaluate_project.post': ('jury', 'POST', lambda t, r: (f'/evaluate/project/{r.choice(t["projects"])}',
+                                                            evaluation_form(r))),
+    'view_rankings': (None, 'GET', lambda t, r: (f'/rankings/{r.choice(t["hackathons"])}', None)),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(name, targets, make_client, concurrency, requests, warmup, seed):
+    account, method, build = SCENARIOS[name]
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, queries = [], []
+    errors = 0
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = make_client()
+            local.random = random.Random(f'{seed}-{name}-{threading.get_ident()}')
+            if account:
+                status, _ = local.client.request('POST', '/login',
+                                                 {'email': targets[account], 'password': PASSWORD})
+                if status != 302:
+                    raise RuntimeError(f'Could not log in as {targets[account]} (HTTP {status})')
+        return local.client
+
+    def one(timed):
+        nonlocal errors
+        c = client()
+        path, data = build(targets, local.random)
+        started = time.perf_counter()
+        status, count = c.request(method, path, data)
+        elapsed = time.perf_counter() - started
+        if timed:
+            with lock:
+                latencies.append(elapsed)
+                if count is not None:
+                    queries.append(count)
+                if status >= 400:
+                    errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: one(False), range(warmup)))
+        started = time.perf_counter()
+        list(pool.map(lambda _: one(True), range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / wall, 1),
+        'mean_ms': ms(sum(latencies) / len(latencies)),
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f'{"route":<24} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"errors":>7}')
+    for name, r in results.items():
+        queries = r['queries_per_request'] if r['queries_per_request'] is not None else '-'
+        print(f'{name:<24} {r["throughput"]:>8} {r["p50_ms"]:>8} {r["p95_ms"]:>8} '
+              f'{r["p99_ms"]:>8} {queries:>8} {r["errors"]:>7}')
+
+
+def compare(baseline, results, threshold):
+    """Print changes against a baseline run and return the regressed routes"""
+    regressed = []
+    print(f'\n{"route":<24} {"p95 ms":>18} {"req/s":>18} {"queries":>12}')
+    for name, new in results.items():
+        old = baseline['results'].get(name)
+        if not old:
+            continue
+        slower = new['p95_ms'] > old['p95_ms'] * (1 + threshold)
+        fewer = new['throughput'] < old['throughput'] * (1 - threshold)
+        more_queries = (new['queries_per_request'] is not None and old['queries_per_request'] is not None
+                        and new['queries_per_request'] > old['queries_per_request'])
+        flag = '  REGRESSION' if slower or fewer or more_queries else ''
+        if flag:
+            regressed.append(name)
+        print(f'{name:<24} {old["p95_ms"]:>8} -> {new["p95_ms"]:<6} {old["throughput"]:>8} -> '
+              f'{new["throughput"]:<6} {old["queries_per_request"]} -> {new["queries_per_request"]}{flag}')
+    return regressed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Benchmark the Hackathon Platform routes.')
+    parser.add_argument('--url', help='Drive a running server instead of the in-process app.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per route.')
+    parser.add_argument('--routes', help='Comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--prefix', default='bench', help='Email prefix used by seed-data.')
+    parser.add_argument('--cold', action='store_true', help='Disable the page and dashboard caches (in-process only).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help=f'Result file (default: {RESULTS_DIR}/<timestamp>.json).')
+    parser.add_argument('--compare', help='Baseline result file to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative p95/throughput change counted as a regression.')
+    args = parser.parse_args()
+
+    routes = args.routes.split(',') if args.routes else list(SCENARIOS)
+    unknown = [name for name in routes if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown routes: {", ".join(unknown)}')
+
+    with main.app.app_context():
+        cursor = main.get_db().cursor(dictionary=True)
+        targets = pick_targets(cursor, args.prefix)
+        sizes = dataset_sizes(cursor)
+        cursor.close()
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        if args.cold:
+            main.page_cache.ttl = 0
+            main.dashboard_cache.ttl = 0
+        make_client = InProcessClient
+
+    print(f'Dataset: {", ".join(f"{count} {table}" for table, count in sizes.items())}')
+    results = {}
+    for name in routes:
+        results[name] = run_scenario(name, targets, make_client, args.concurrency,
+                                     args.requests, args.warmup, args.seed)
+    print_results(results)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'target': args.url or 'in-process',
+        'cold': args.cold,
+        'concurrency': args.concurrency,
+        'dataset': sizes,
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nSaved {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(json.load(f), results, args.threshold)
+        if regressed:
+            print(f'\nRegressed: {", ".join(regressed)}')
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,156 @@
+"""
+Page data cache for the Hackathon Platform
+
+Read-heavy public pages cache the results of their queries, keyed by route
+and arguments. Every entry is filed under one or more tags (for example
+"hackathon:3"); write routes invalidate tags rather than individual keys.
+
+Invalidation is generational: each tag has a version number stored in the
+backend and folded into the keys of entries filed under it. Bumping the
+version makes every such entry unreachable at once, which works the same on
+an in-process store and on a shared one such as Redis.
+"""
+
+from collections import OrderedDict
+import pickle
+import threading
+import time
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Tag versions live outside the LRU: evicting one would resurrect stale entries
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisBackend:
+    """Shared store for multi-process deployments (requires the redis package)"""
+
+    def __init__(self, url, prefix='hackplatform:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package: pip install redis')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class PageCache:
+    def __init__(self, backend, ttl=60, recent=0):
+        self.backend = backend
+        self.ttl = ttl
+        # Seconds an invalidated tag counts as recently changed
+        self.recent = recent
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, tag):
+        return self.backend.counter('tag:' + tag)
+
+    def _key(self, key, tags):
+        versions = ','.join(f'{tag}={self._version(tag)}' for tag in ('*',) + tuple(tags))
+        return f'page:{key}|{versions}'
+
+    def _lookup(self, full_key):
+        entry = self.backend.get(full_key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def _store(self, full_key, value):
+        # Wrapped so that a cached None is told apart from a miss
+        self.backend.set(full_key, (value,), self.ttl)
+
+    def get_or_set(self, key, tags, loader):
+        """Return the cached value for key, calling loader() to fill a miss"""
+        if self.ttl <= 0:
+            return loader()
+        full_key = self._key(key, tags)
+        entry = self._lookup(full_key)
+        if entry is not None:
+            return entry[0]
+        value = loader()
+        self._store(full_key, value)
+        return value
+
+    async def get_or_set_async(self, key, tags, loader):
+        """get_or_set for the async server: loader is a coroutine function"""
+        if self.ttl <= 0:
+            return await loader()
+        full_key = self._key(key, tags)
+        entry = self._lookup(full_key)
+        if entry is not None:
+            return entry[0]
+        value = await loader()
+        self._store(full_key, value)
+        return value
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr('tag:' + tag)
+            if self.recent > 0:
+                self.backend.set('changed:' + tag, True, self.recent)
+
+    def recently_invalidated(self, tags):
+        """Whether any of tags was invalidated in the last `recent` seconds.
+
+        A read replica may not have applied the write behind such an
+        invalidation yet, so entries filed under these tags should be filled
+        from the primary.
+        """
+        return self.recent > 0 and any(self.backend.get('changed:' + tag) for tag in ('*',) + tuple(tags))
+
+    def clear(self):
+        self.invalidate('*')
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'ttl': self.ttl}
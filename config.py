@@ -0,0 +1,134 @@
+"""
+Configuration loading for the Hackathon Platform
+
+Settings are read in three layers, later ones winning: the defaults below,
+an optional Python settings file (named by HACKATHON_SETTINGS or passed to
+create_app), and environment variables of the same name. Environment values
+are converted to the type of the default.
+
+SECRET_KEY must be the same in every worker process, or a session signed by
+one worker is rejected by the next. When none is configured, a key is
+generated once and kept in the instance folder, so all workers on the box
+(and restarts) share it.
+"""
+
+import os
+import secrets
+
+DEFAULTS = {
+    'SECRET_KEY': None,
+
+    # 'mysql', or 'sqlite' for a single-node deployment without a database server
+    'DB_BACKEND': 'mysql',
+    # SQLite database file (default: instance/hackathon.sqlite3; ':memory:' for tests)
+    'SQLITE_PATH': '',
+
+    # MySQL database
+    'DB_HOST': 'localhost',
+    'DB_PORT': 3306,
+    'DB_USER': 'root',
+    'DB_PASSWORD': 'egy123456',
+    'DB_NAME': 'hackathon2',
+    # Connections per worker process, and seconds to wait for a free one
+    'DB_POOL_SIZE': 10,
+    'DB_POOL_TIMEOUT': 5.0,
+    # MySQL read replica for GET requests ('' for none); it shares the primary's
+    # user, password and database name
+    'DB_REPLICA_HOST': '',
+    'DB_REPLICA_PORT': 3306,
+    # Seconds a user's reads stay on the primary after they write, so they see their changes
+    'READ_YOUR_WRITES_SECONDS': 5,
+    # Connections per worker in the async (ASGI) server's aiomysql pool
+    'ASYNC_DB_POOL_SIZE': 20,
+
+    # Seconds a role cached in the session is trusted before it is re-read
+    'ROLE_CACHE_TTL': 300,
+    # Default and maximum rows per page on paginated listings
+    'PAGE_SIZE': 24,
+    'MAX_PAGE_SIZE': 100,
+    # Most evaluations accepted in one bulk upload
+    'BULK_EVALUATION_LIMIT': 1000,
+    # Seconds a user's dashboard may be served from cache
+    'DASHBOARD_CACHE_TTL': 30,
+
+    # Page and dashboard caches: 'memory' (per process) or 'redis' (shared between processes)
+    'CACHE_BACKEND': 'memory',
+    'CACHE_REDIS_URL': 'redis://localhost:6379/0',
+    'CACHE_TTL': 60,
+    'CACHE_MAX_ENTRIES': 1000,
+    # Worker processes serving the app (gunicorn.conf.py sets it; uvicorn reads
+    # the same variable). A 'memory' cache only sees its own worker's
+    # invalidations, so with more than one worker it is turned off: use
+    # CACHE_BACKEND='redis' to cache in a multi-worker deployment
+    'WEB_CONCURRENCY': 1,
+
+    # Statements slower than this are logged with their route
+    'SLOW_QUERY_MS': 200,
+    # A statement run this many times in one request is logged as a likely N+1
+    'REPEATED_QUERY_THRESHOLD': 5,
+    # Where workers share their metrics for /metrics (default: instance/metrics)
+    'METRICS_DIR': '',
+
+    # Sampling profiler: profile one request in PROFILE_SAMPLE_RATE (0: none), and
+    # requests sending an X-Profile header from the user ids in PROFILE_USERS
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_USERS': '',
+    'PROFILE_INTERVAL_MS': 5.0,
+    # Where profiles are written (default: instance/profiles), and their size cap
+    'PROFILE_DIR': '',
+    'PROFILE_MAX_MB': 100,
+
+    # Seconds between checks for rankings changed by other workers, while someone watches live
+    'LIVE_RANKINGS_POLL_SECONDS': 2.0,
+
+    # Apply pending migrations when the application starts
+    'MIGRATE_ON_START': True,
+}
+
+
+def _convert(value, default):
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def load_config(app, settings_file=None):
+    """Fill app.config from defaults, a settings file and the environment"""
+    app.config.update(DEFAULTS)
+
+    settings_file = settings_file or os.environ.get('HACKATHON_SETTINGS')
+    if settings_file:
+        app.config.from_pyfile(os.path.abspath(settings_file))
+
+    for name, default in DEFAULTS.items():
+        if name in os.environ:
+            app.config[name] = _convert(os.environ[name], default)
+
+    if not app.config['SECRET_KEY']:
+        app.config['SECRET_KEY'] = instance_secret_key(app.instance_path)
+
+
+def instance_secret_key(instance_path):
+    """Read the key kept in the instance folder, creating it on first use"""
+    path = os.path.join(instance_path, 'secret_key')
+    if not os.path.exists(path):
+        os.makedirs(instance_path, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}'
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        # link() fails if the key exists: when several workers start at once,
+        # the first one's key wins and the others read it
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+
+    with open(path) as f:
+        return f.read().strip()
@@ -0,0 +1,171 @@
+"""
+Dashboard data access for the Hackathon Platform
+
+Each role's dashboard is loaded with a single query and returned as compact
+named tuples, optionally cached per user.
+"""
+
+from collections import namedtuple
+
+OrganizerHackathon = namedtuple(
+    'OrganizerHackathon',
+    'id title status start_date team_count submitted_count'
+)
+JuryAssignment = namedtuple(
+    'JuryAssignment',
+    'id title status start_date total_projects evaluated_count'
+)
+ParticipantTeam = namedtuple(
+    'ParticipantTeam',
+    'id team_name hackathon_title hackathon_status member_count project_id project_title is_submitted'
+)
+JoinRequest = namedtuple(
+    'JoinRequest',
+    'id team_id team_name hackathon_title status joined_at'
+)
+
+ORGANIZER_SQL = '''
+    SELECT h.id, h.title, h.status, h.start_date, h.team_count, h.submitted_count
+    FROM hackathons h
+    WHERE h.organizer_id = %s
+    ORDER BY h.created_at DESC
+'''
+
+# Hackathons that assign reviews count the juror's assigned projects;
+# the others, every submitted project.
+JURY_SQL = '''
+    SELECT h.id, h.title, h.status, h.start_date,
+           CASE WHEN h.reviews_per_project > 0 THEN COALESCE(ra.assigned_count, 0)
+                ELSE h.submitted_count END as total_projects,
+           CASE WHEN h.reviews_per_project > 0 THEN COALESCE(ra.evaluated_count, 0)
+                ELSE COALESCE(ev.evaluated_count, 0) END as evaluated_count
+    FROM jury_assignments ja
+    JOIN hackathons h ON ja.hackathon_id = h.id
+    LEFT JOIN (
+        SELECT t.hackathon_id, COUNT(*) as evaluated_count
+        FROM evaluations e
+        JOIN projects p ON e.project_id = p.id
+        JOIN teams t ON p.team_id = t.id
+        WHERE e.jury_id = %s AND e.is_submitted = 1
+        GROUP BY t.hackathon_id
+    ) ev ON ev.hackathon_id = h.id
+    LEFT JOIN (
+        SELECT ra.hackathon_id, COUNT(*) as assigned_count,
+               SUM(CASE WHEN e.is_submitted = 1 THEN 1 ELSE 0 END) as evaluated_count
+        FROM review_assignments ra
+        JOIN projects p ON ra.project_id = p.id AND p.is_submitted = 1
+        LEFT JOIN evaluations e ON e.project_id = ra.project_id AND e.jury_id = ra.jury_id
+        WHERE ra.jury_id = %s
+        GROUP BY ra.hackathon_id
+    ) ra ON ra.hackathon_id = h.id
+    WHERE ja.jury_id = %s
+    ORDER BY h.start_date DESC
+'''
+
+# Teams, join requests and the pending request count in one result set,
+# told apart by the leading kind column.
+PARTICIPANT_SQL = '''
+    SELECT 'team' as kind, t.id, t.id as team_id, t.team_name,
+           h.title as hackathon_title, h.status, t.member_count as amount,
+           p.id as project_id, p.title as project_title, p.is_submitted,
+           t.created_at as sort_at
+    FROM team_members tm
+    JOIN teams t ON tm.team_id = t.id
+    JOIN hackathons h ON t.hackathon_id = h.id
+    LEFT JOIN projects p ON t.id = p.team_id
+    WHERE tm.user_id = %s AND tm.status = 'accepted'
+    UNION ALL
+    SELECT 'request', tm.id, t.id, t.team_name,
+           h.title, tm.status, NULL,
+           NULL, NULL, NULL,
+           tm.joined_at
+    FROM team_members tm
+    JOIN teams t ON tm.team_id = t.id
+    JOIN hackathons h ON t.hackathon_id = h.id
+    WHERE tm.user_id = %s AND tm.status IN ('pending', 'rejected')
+    UNION ALL
+    SELECT 'pending', NULL, NULL, NULL,
+           NULL, NULL, COUNT(*),
+           NULL, NULL, NULL,
+           NULL
+    FROM team_members tm
+    JOIN teams t ON tm.team_id = t.id
+    WHERE t.team_leader_id = %s AND tm.status = 'pending'
+    ORDER BY kind, sort_at DESC
+'''
+
+
+def load_dashboard(db, user_id, role):
+    """Fetch the dashboard data for one user in a single round trip"""
+    cursor = db.cursor()
+    data = {}
+
+    if role == 'organizer':
+        cursor.execute(ORGANIZER_SQL, (user_id,))
+        data['hackathons'] = [OrganizerHackathon(*row) for row in cursor.fetchall()]
+
+    elif role == 'jury':
+        cursor.execute(JURY_SQL, (user_id, user_id, user_id))
+        data['assignments'] = [JuryAssignment(*row) for row in cursor.fetchall()]
+
+    else:  # participant
+        cursor.execute(PARTICIPANT_SQL, (user_id, user_id, user_id))
+        data['teams'] = []
+        data['join_requests'] = []
+        data['pending_team_requests'] = 0
+        for (kind, id, team_id, team_name, hackathon_title, status, amount,
+             project_id, project_title, is_submitted, sort_at) in cursor.fetchall():
+            if kind == 'team':
+                data['teams'].append(ParticipantTeam(
+                    id, team_name, hackathon_title, status, amount,
+                    project_id, project_title, is_submitted
+                ))
+            elif kind == 'request':
+                data['join_requests'].append(JoinRequest(
+                    id, team_id, team_name, hackathon_title, status, sort_at
+                ))
+            else:
+                data['pending_team_requests'] = amount or 0
+
+    cursor.close()
+    return data
+
+
+class DashboardCache:
+    """Per-user dashboard cache with a TTL as a safety net for missed invalidations.
+
+    Entries live in a cache backend (see cache.py): in process, or in Redis
+    when several workers must see each other's invalidations. As in the
+    page cache, each user has a version counter folded into their entry's
+    key, and invalidating bumps the counter.
+    """
+
+    def __init__(self, backend, ttl=30):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, user_id):
+        generation = self.backend.counter('dashboard-version:*')
+        version = self.backend.counter(f'dashboard-version:{user_id}')
+        return f'dashboard:{user_id}|{generation}.{version}'
+
+    def get(self, user_id, role):
+        if self.ttl <= 0:
+            return None
+        entry = self.backend.get(self._key(user_id))
+        if entry is None:
+            return None
+        cached_role, data = entry
+        return data if cached_role == role else None
+
+    def set(self, user_id, role, data):
+        if self.ttl <= 0:
+            return
+        self.backend.set(self._key(user_id), (role, data), self.ttl)
+
+    def invalidate(self, *user_ids):
+        for user_id in user_ids:
+            self.backend.incr(f'dashboard-version:{user_id}')
+
+    def clear(self):
+        self.backend.incr('dashboard-version:*')
@@ -0,0 +1,213 @@
+"""
+Synthetic data generator for the Hackathon Platform
+
+Seeds a database with users, hackathons, teams, members, join requests,
+projects, jury assignments and evaluations at event scale, for load testing
+and query-plan checks. Sizes follow rough real-world shapes: a few large
+hackathons and a long tail of small ones, mostly 2-4 person teams, most
+teams submitting, and jurors that differ in how leniently they score.
+
+Rows get explicit ids above the current maximum of each table, so run it on
+a database nobody else is writing to. Every generated user has the password
+"password123"; emails are <prefix>-<role><n>@example.test.
+"""
+
+from datetime import datetime, timedelta
+from itertools import islice
+import random
+
+CRITERIA = ('innovation_score', 'technical_score', 'presentation_score', 'usefulness_score')
+# Relative weight of each hackathon status, and of team sizes 1..4
+STATUS_WEIGHTS = {'open_registration': 3, 'ongoing': 2, 'judging': 2, 'completed': 3}
+TEAM_SIZE_WEIGHTS = (10, 25, 35, 30)
+WORDS = ('smart', 'open', 'green', 'quantum', 'civic', 'health', 'data', 'edge', 'cloud',
+         'learning', 'climate', 'mobile', 'secure', 'social', 'fin', 'urban', 'robot', 'voice')
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DataGenerator:
+    def __init__(self, db, hash_password, users=1000, hackathons=10, teams=200, jurors=20,
+                 organizers=None, evaluation_rate=0.6, prefix='bench', seed=0,
+                 batch_size=1000, progress=print):
+        self.db = db
+        self.hash_password = hash_password
+        self.sizes = {'users': users, 'hackathons': hackathons, 'teams': teams,
+                      'jurors': jurors, 'organizers': organizers or max(1, hackathons // 5)}
+        self.evaluation_rate = evaluation_rate
+        self.prefix = prefix
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress
+        self.now = datetime.now().replace(microsecond=0)
+        self.stats = {}
+
+    def _next_ids(self, cursor):
+        ids = {}
+        for table in ('users', 'hackathons', 'teams', 'team_members', 'projects',
+                      'jury_assignments', 'evaluations'):
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            ids[table] = cursor.fetchone()[0] + 1
+        return ids
+
+    def _insert(self, cursor, table, columns, rows):
+        sql = (f'INSERT INTO {table} ({", ".join(columns)}) '
+               f'VALUES ({", ".join(["%s"] * len(columns))})')
+        count = 0
+        for chunk in _chunks(rows, self.batch_size):
+            cursor.executemany(sql, chunk)
+            self.db.commit()
+            count += len(chunk)
+        self.stats[table] = self.stats.get(table, 0) + count
+        self.progress(f'{table}: {self.stats[table]} rows')
+
+    def _when(self, days_from, days_to):
+        return self.now + timedelta(seconds=self.random.randint(int(days_from * 86400),
+                                                                int(days_to * 86400)))
+
+    def _title(self, n):
+        return ' '.join(self.random.sample(WORDS, 2)).title() + f' {n}'
+
+    def run(self):
+        cursor = self.db.cursor()
+        cursor.execute('SELECT id FROM users WHERE email = %s',
+                       (f'{self.prefix}-organizer1@example.test',))
+        if cursor.fetchone():
+            cursor.close()
+            raise ValueError(f'Data with prefix "{self.prefix}" already exists; choose another --prefix.')
+
+        ids = self._next_ids(cursor)
+        password_hash = self.hash_password('password123')
+        rnd = self.random
+
+        # Users: organizers, jurors, then participants
+        users = []
+        by_role = {'organizer': [], 'jury': [], 'participant': []}
+        for role, key in (('organizer', 'organizers'), ('jury', 'jurors'), ('participant', 'users')):
+            for n in range(1, self.sizes[key] + 1):
+                user_id = ids['users'] + len(users)
+                name = 'jury' if role == 'jury' else role
+                users.append((user_id, f'{self.prefix}-{name}{n}@example.test', password_hash,
+                              f'{role.title()} {n}', role, f'gh-{self.prefix}-{user_id}'))
+                by_role[role].append(user_id)
+        self._insert(cursor, 'users',
+                     ('id', 'email', 'password_hash', 'full_name', 'role', 'github_username'), users)
+
+        # Hackathons, each with a popularity weight that decides its share of teams
+        hackathons = []
+        statuses = list(STATUS_WEIGHTS)
+        for n in range(self.sizes['hackathons']):
+            status = rnd.choices(statuses, weights=list(STATUS_WEIGHTS.values()))[0]
+            offset = {'open_registration': 14, 'ongoing': 0, 'judging': -3, 'completed': -30}[status]
+            start = self._when(offset - 2, offset + 2)
+            hackathons.append((ids['hackathons'] + n, rnd.choice(by_role['organizer']),
+                               self._title(n + 1), 'Synthetic hackathon for load testing.',
+                               start, start + timedelta(days=2), start - timedelta(days=2),
+                               4, status, rnd.random() < 0.5))
+        self._insert(cursor, 'hackathons',
+                     ('id', 'organizer_id', 'title', 'description', 'start_date', 'end_date',
+                      'registration_deadline', 'max_team_size', 'status', 'is_online'),
+                     hackathons)
+        popularity = [rnd.paretovariate(1.2) for _ in hackathons]
+
+        # Teams and accepted members: one team per participant per hackathon
+        teams, members, placed = [], [], {h[0]: set() for h in hackathons}
+        participants = by_role['participant']
+        for n in range(self.sizes['teams']):
+            hackathon = rnd.choices(hackathons, weights=popularity)[0]
+            taken = placed[hackathon[0]]
+            size = rnd.choices(range(1, len(TEAM_SIZE_WEIGHTS) + 1), weights=TEAM_SIZE_WEIGHTS)[0]
+            size = min(size, len(participants) - len(taken))
+            if size <= 0:
+                continue
+            team_members = []
+            while len(team_members) < size:
+                user_id = rnd.choice(participants)
+                if user_id not in taken:
+                    taken.add(user_id)
+                    team_members.append(user_id)
+            team_id = ids['teams'] + len(teams)
+            created = hackathon[6] - timedelta(seconds=rnd.randint(0, 20 * 86400))
+            teams.append((team_id, hackathon[0], f'{self._title(n + 1)} Team', team_members[0],
+                          'Synthetic team.', created, len(team_members), hackathon[8]))
+            for position, user_id in enumerate(team_members):
+                members.append((ids['team_members'] + len(members), team_id, user_id, 'accepted',
+                                'leader' if position == 0 else 'member',
+                                created + timedelta(minutes=position * 30)))
+
+        # Pending join requests on one team in ten
+        for team in teams:
+            if rnd.random() < 0.1:
+                taken = placed[team[1]]
+                for _ in range(rnd.randint(1, 2)):
+                    user_id = rnd.choice(participants)
+                    if user_id not in taken:
+                        taken.add(user_id)
+                        members.append((ids['team_members'] + len(members), team[0], user_id,
+                                        'pending', 'member', team[5] + timedelta(hours=1)))
+
+        self._insert(cursor, 'teams',
+                     ('id', 'hackathon_id', 'team_name', 'team_leader_id', 'description',
+                      'created_at', 'member_count'),
+                     (team[:7] for team in teams))
+        self._insert(cursor, 'team_members',
+                     ('id', 'team_id', 'user_id', 'status', 'role', 'joined_at'), members)
+
+        # Projects: teams of running or finished hackathons mostly have one
+        projects = []
+        for team in teams:
+            status = team[7]
+            if status == 'open_registration' or rnd.random() > 0.85:
+                continue
+            submitted = status in ('judging', 'completed') or rnd.random() < 0.5
+            project_id = ids['projects'] + len(projects)
+            projects.append((project_id, team[0], f'Project {project_id}', 'Synthetic project.',
+                             f'https://github.com/{self.prefix}/project-{project_id}', None,
+                             submitted, team[5] + timedelta(days=rnd.randint(10, 22)) if submitted else None,
+                             team[1], status))
+        self._insert(cursor, 'projects',
+                     ('id', 'team_id', 'title', 'description', 'github_url', 'demo_url',
+                      'is_submitted', 'submitted_at'),
+                     (p[:8] for p in projects))
+
+        # Jury panels and evaluations; each juror has a personal leniency
+        jurors = by_role['jury']
+        assignments, panels = [], {}
+        for hackathon in hackathons:
+            if not jurors:
+                break
+            panel = rnd.sample(jurors, min(len(jurors), rnd.randint(3, 8)))
+            panels[hackathon[0]] = panel
+            for jury_id in panel:
+                assignments.append((ids['jury_assignments'] + len(assignments), hackathon[0], jury_id))
+        self._insert(cursor, 'jury_assignments', ('id', 'hackathon_id', 'jury_id'), assignments)
+
+        leniency = {jury_id: rnd.gauss(0, 1) for jury_id in jurors}
+        evaluations = []
+        for project in projects:
+            if not project[6] or project[9] == 'ongoing':
+                continue
+            quality = rnd.gauss(6, 1.5)
+            rate = 1.0 if project[9] == 'completed' else self.evaluation_rate
+            for jury_id in panels.get(project[8], ()):
+                if rnd.random() > rate:
+                    continue
+                scores = [round(min(10, max(0, quality + leniency[jury_id] + rnd.gauss(0, 1))), 1)
+                          for _ in CRITERIA]
+                evaluations.append((ids['evaluations'] + len(evaluations), project[0], jury_id,
+                                    *scores, sum(scores) / len(scores), None,
+                                    project[9] == 'completed' or rnd.random() < 0.9))
+        self._insert(cursor, 'evaluations',
+                     ('id', 'project_id', 'jury_id') + CRITERIA +
+                     ('overall_score', 'comments', 'is_submitted'),
+                     evaluations)
+
+        cursor.close()
+        return self.stats
@@ -0,0 +1,413 @@
+"""
+Database backends for the Hackathon Platform
+
+Two backends share one interface. A pool has get(), put(), close_all() and
+stats(); its connections have cursor(dictionary=False), commit(), rollback()
+and close(); cursors follow mysql.connector (execute with %s parameters,
+fetchone, fetchall, iteration, lastrowid, rowcount). Errors raised by either
+backend derive from Error.
+
+- ConnectionPool: a bounded pool of MySQL connections.
+- SQLitePool: per-thread connections to an SQLite file, for single-node
+  deployments and tests. Statements are written for MySQL; SQLiteCursor
+  translates the few MySQL-only constructs the app uses.
+- RecordingCursor: captures the statements a query function would run.
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+import queue
+import re
+import sqlite3
+import threading
+import time
+import weakref
+
+try:
+    import mysql.connector
+    from mysql.connector import Error, IntegrityError
+except ImportError:  # SQLite-only installs
+    mysql = None
+
+    class Error(Exception):
+        def __init__(self, msg=None, errno=None):
+            super().__init__(msg)
+            self.msg = msg
+            self.errno = errno
+
+    class IntegrityError(Error):
+        pass
+
+
+class PoolExhaustedError(Error):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections.
+
+    Connections are opened lazily up to ``size`` and handed out one at a time.
+    A checked out connection is pinged before use and transparently replaced
+    if the server dropped it.
+    """
+
+    dialect = 'mysql'
+
+    def __init__(self, size=10, timeout=5.0, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.connect_args = connect_args
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._replaced = 0
+        self._wait_time = 0.0
+
+    def _connect(self):
+        if mysql is None:
+            raise RuntimeError('DB_BACKEND=mysql requires mysql-connector-python: '
+                               'pip install mysql-connector-python')
+        return mysql.connector.connect(**self.connect_args)
+
+    def _healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    def get(self, timeout=None):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    can_open = self._opened < self.size
+                    if can_open:
+                        self._opened += 1
+                if can_open:
+                    try:
+                        conn = self._connect()
+                    except Error:
+                        with self._lock:
+                            self._opened -= 1
+                        raise
+                else:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        conn = self._idle.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        with self._lock:
+                            self._timeouts += 1
+                        raise PoolExhaustedError(
+                            msg=f'No database connection available after {timeout}s '
+                                f'(pool size {self.size})'
+                        )
+
+            if self._healthy(conn):
+                break
+
+            # Stale connection: drop it and try again with a fresh slot
+            self._discard(conn)
+            with self._lock:
+                self._replaced += 1
+
+        with self._lock:
+            self._checkouts += 1
+            self._wait_time += time.monotonic() - started
+        return conn
+
+    def put(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        try:
+            conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        """Snapshot of pool counters for monitoring"""
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                'size': self.size,
+                'opened': self._opened,
+                'idle': idle,
+                'in_use': self._opened - idle,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'replaced': self._replaced,
+                'avg_wait_ms': round(self._wait_time / self._checkouts * 1000, 3)
+                               if self._checkouts else 0.0,
+            }
+
+
+# SQLite backend
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers never block the writer
+    'synchronous': 'NORMAL',      # durable at checkpoints; safe with WAL
+    'foreign_keys': 'ON',
+    'cache_size': -65536,         # 64 MB page cache per connection
+    'temp_store': 'MEMORY',
+    'mmap_size': 268435456,       # read the first 256 MB through mmap
+}
+
+# TIMESTAMP columns come back as datetime, as they do from MySQL
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+
+def _parse_timestamp(raw):
+    text = raw.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_converter('TIMESTAMP', _parse_timestamp)
+sqlite3.register_converter('DATETIME', _parse_timestamp)
+
+_PARAMETER = re.compile(r'%([s%])')
+_INSERT_IGNORE = re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE)
+_VALUES_REF = re.compile(r'\bVALUES\((\w+)\)', re.IGNORECASE)
+_NOW_MICROSECONDS = re.compile(r'\bCURRENT_TIMESTAMP\(6\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql):
+    """Rewrite a MySQL statement for SQLite.
+
+    Covers %s parameters, INSERT IGNORE, ON DUPLICATE KEY UPDATE with
+    VALUES(column) and CURRENT_TIMESTAMP(6). Anything else must already be
+    valid in both dialects.
+    """
+    sql = _PARAMETER.sub(lambda m: '?' if m.group(1) == 's' else '%', sql)
+    sql = _INSERT_IGNORE.sub('INSERT OR IGNORE', sql)
+    parts = _ON_DUPLICATE.split(sql, maxsplit=1)
+    if len(parts) == 2:
+        sql = parts[0] + 'ON CONFLICT DO UPDATE SET' + _VALUES_REF.sub(r'excluded.\1', parts[1])
+    return _NOW_MICROSECONDS.sub("strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')", sql)
+
+
+@contextmanager
+def _sqlite_errors():
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        raise IntegrityError(msg=str(e)) from e
+    except sqlite3.Error as e:
+        raise Error(msg=str(e)) from e
+
+
+class SQLiteCursor:
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self.dictionary = dictionary
+
+    def _row(self, row):
+        if not self.dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def execute(self, sql, params=()):
+        with _sqlite_errors():
+            self._cursor.execute(translate_sql(sql), tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        with _sqlite_errors():
+            self._cursor.executemany(translate_sql(sql), [tuple(row) for row in rows])
+
+    def fetchone(self):
+        with _sqlite_errors():
+            row = self._cursor.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchall(self):
+        with _sqlite_errors():
+            return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    dialect = 'sqlite'
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        with _sqlite_errors():
+            self._conn.commit()
+
+    def rollback(self):
+        with _sqlite_errors():
+            self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        with _sqlite_errors():
+            self._conn.execute('SELECT 1')
+
+    def close(self):
+        self._conn.close()
+
+
+_memory_keepers = {}
+
+
+class SQLitePool:
+    """Per-thread SQLite connections behind the ConnectionPool interface.
+
+    SQLite runs in-process, so there is nothing to bound or wait for: each
+    thread opens one connection on first use and keeps it until the thread
+    ends. Write transactions begin IMMEDIATE, so concurrent writers queue on
+    the busy timeout instead of failing on a lock upgrade.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path, timeout=5.0, pragmas=None):
+        memory = path == ':memory:'
+        if memory:
+            # One database shared by every thread of this process
+            path = 'file:hackathon-memory?mode=memory&cache=shared'
+        self.path = path
+        self.timeout = timeout
+        self.pragmas = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+        # An in-memory database lives only while a connection to it is open, so
+        # one is kept for the life of the process and survives pool rebuilds
+        if memory and path not in _memory_keepers:
+            _memory_keepers[path] = self._connect()
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._checkouts = 0
+
+    def _connect(self):
+        with _sqlite_errors():
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   detect_types=sqlite3.PARSE_DECLTYPES,
+                                   isolation_level='IMMEDIATE',
+                                   check_same_thread=False,
+                                   uri=self.path.startswith('file:'))
+            for name, value in self.pragmas.items():
+                conn.execute(f'PRAGMA {name} = {value}')
+        return SQLiteConnection(conn)
+
+    def get(self, timeout=None):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.add(conn)
+        with self._lock:
+            self._checkouts += 1
+        return conn
+
+    def put(self, conn):
+        """Hand the connection back, discarding any open transaction"""
+        try:
+            conn.rollback()
+        except Error:
+            conn.close()
+            self._local.__dict__.pop('conn', None)
+
+    def close_all(self):
+        """Close every connection; threads reopen theirs on next use"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'connections': len(self._connections),
+                'checkouts': self._checkouts,
+            }
+
+
+class RecordingCursor:
+    """Cursor stand-in: records the statements a query function runs, then serves rows.
+
+    Lets the async server and the query plan check reuse the shared query
+    functions without a database.
+    """
+
+    def __init__(self, rows=(), dictionary=True):
+        self.rows = list(rows)
+        self.dictionary = dictionary
+        self.statements = []
+
+    def cursor(self, dictionary=False):
+        # load_dashboard takes a connection rather than a cursor
+        self.dictionary = dictionary
+        return self
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
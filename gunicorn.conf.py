@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for the Hackathon Platform
+
+Every value can be overridden on the command line or through the
+environment variables read below.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+# One worker per core by default; each worker has its own DB pool (DB_POOL_SIZE)
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WORKER_THREADS', 4))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 30))
+
+# Load the app (and run migrations) once in the master, then fork workers
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Connections and caches must not be shared with the master or siblings.
+    # The worker count decides whether in-process caches are safe to use.
+    from app import app, init_worker
+    app.config['WEB_CONCURRENCY'] = server.cfg.workers
+    init_worker()
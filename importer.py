@@ -0,0 +1,235 @@
+"""
+Bulk participant and team import for the Hackathon Platform
+
+The CSV is streamed twice: the first pass creates users, the second creates
+teams and memberships. Work is committed in batches and the last committed
+row of each pass is recorded in a checkpoint file, so an interrupted import
+picks up where it stopped. Re-importing a file is safe either way, since
+existing emails and memberships are skipped.
+
+CSV columns: email, full_name (required); password, role, bio,
+github_username, team_name, team_role (optional). A team's leader is the
+first row with team_role "leader", or else its first member. Members beyond
+the hackathon's max_team_size are not added; their rows are reported in
+errors.
+"""
+
+import csv
+from itertools import islice
+import json
+import os
+import secrets
+
+USER_ROLES = ('participant', 'organizer', 'jury')
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+class Checkpoint:
+    """Last committed row number per pass, persisted as JSON next to the CSV"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    def done(self, phase):
+        return self.state.get(phase, 0)
+
+    def save(self, phase, rows):
+        self.state[phase] = rows
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParticipantImporter:
+    def __init__(self, db, path, hackathon_id, hash_password,
+                 batch_size=1000, default_password=None, progress=print):
+        self.db = db
+        self.path = path
+        self.hackathon_id = hackathon_id
+        self.hash_password = hash_password
+        self.batch_size = batch_size
+        self.default_password = default_password
+        self.progress = progress
+        self.checkpoint = Checkpoint(path + '.progress')
+        self.stats = {'rows': 0, 'users_created': 0, 'users_skipped': 0,
+                      'teams_created': 0, 'members_added': 0, 'members_skipped': 0,
+                      'members_rejected': 0, 'invalid': 0}
+        # Rows that could not be imported, for the report
+        self.errors = []
+
+    def _rows(self, skip):
+        with open(self.path, newline='', encoding='utf-8-sig') as f:
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                if number > skip:
+                    yield number, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+
+    def run(self):
+        self.import_users()
+        if self.hackathon_id is not None:
+            self.import_teams()
+        self.checkpoint.clear()
+        return self.stats
+
+    def import_users(self):
+        """First pass: insert users whose email is not registered yet"""
+        done = self.checkpoint.done('users')
+        cursor = self.db.cursor()
+        for batch in _batches(self._rows(done), self.batch_size):
+            new_users = {}
+            for number, row in batch:
+                email = row.get('email', '').lower()
+                if not email or not row.get('full_name'):
+                    self.stats['invalid'] += 1
+                    continue
+                if email in new_users:
+                    continue
+                role = row.get('role') or 'participant'
+                if role not in USER_ROLES:
+                    role = 'participant'
+                password = row.get('password') or self.default_password or secrets.token_urlsafe(12)
+                new_users[email] = (email, self.hash_password(password), row['full_name'], role,
+                                    row.get('bio') or None, row.get('github_username') or None)
+
+            if new_users:
+                emails = list(new_users)
+                cursor.execute(f'SELECT email FROM users WHERE email IN ({_placeholders(emails)})',
+                               emails)
+                for (email,) in cursor.fetchall():
+                    new_users.pop(email.lower(), None)
+                    self.stats['users_skipped'] += 1
+
+            if new_users:
+                cursor.executemany('''
+                    INSERT INTO users (email, password_hash, full_name, role, bio, github_username)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                ''', list(new_users.values()))
+                self.stats['users_created'] += len(new_users)
+
+            self.db.commit()
+            last = batch[-1][0]
+            self.checkpoint.save('users', last)
+            self.stats['rows'] = last
+            self.progress(f'users: {last} rows read, {self.stats["users_created"]} created, '
+                          f'{self.stats["users_skipped"]} already registered')
+        cursor.close()
+
+    def import_teams(self):
+        """Second pass: create teams and add members to them"""
+        done = self.checkpoint.done('teams')
+        cursor = self.db.cursor()
+        for batch in _batches(self._rows(done), self.batch_size):
+            rows = [(number, r['email'].lower(), r['team_name'],
+                     r.get('team_role', '').lower() == 'leader')
+                    for number, r in batch if r.get('email') and r.get('team_name')]
+            if rows:
+                self._import_team_batch(cursor, rows)
+            self.db.commit()
+            last = batch[-1][0]
+            self.checkpoint.save('teams', last)
+            self.progress(f'teams: {last} rows read, {self.stats["teams_created"]} teams created, '
+                          f'{self.stats["members_added"]} members added')
+        cursor.close()
+
+    def _import_team_batch(self, cursor, rows):
+        emails = list({email for _, email, _, _ in rows})
+        cursor.execute(f'SELECT id, email FROM users WHERE email IN ({_placeholders(emails)})',
+                       emails)
+        user_ids = {email.lower(): user_id for user_id, email in cursor.fetchall()}
+
+        # One team per user per hackathon, as create_team enforces
+        cursor.execute(f'''
+            SELECT tm.user_id FROM team_members tm
+            JOIN teams t ON tm.team_id = t.id
+            WHERE t.hackathon_id = %s AND tm.user_id IN ({_placeholders(emails)})
+        ''', [self.hackathon_id] + [user_ids.get(e, 0) for e in emails])
+        placed = {user_id for (user_id,) in cursor.fetchall()}
+
+        names = list({name for _, _, name, _ in rows})
+        cursor.execute(f'''
+            SELECT id, team_name FROM teams
+            WHERE hackathon_id = %s AND team_name IN ({_placeholders(names)})
+        ''', [self.hackathon_id] + names)
+        team_ids = {name: team_id for team_id, name in cursor.fetchall()}
+
+        # Leaders of new teams: an explicit leader row wins over the first member
+        leaders = {}
+        for _, email, name, is_leader in rows:
+            user_id = user_ids.get(email)
+            if name in team_ids or user_id is None or user_id in placed:
+                continue
+            if any(leader == user_id for leader, _ in leaders.values()):
+                continue
+            if name not in leaders or (is_leader and not leaders[name][1]):
+                leaders[name] = (user_id, is_leader)
+        leaders = {name: user_id for name, (user_id, _) in leaders.items()}
+
+        if leaders:
+            cursor.executemany('''
+                INSERT INTO teams (hackathon_id, team_name, team_leader_id)
+                VALUES (%s, %s, %s)
+            ''', [(self.hackathon_id, name, leader) for name, leader in leaders.items()])
+            cursor.execute('UPDATE hackathons SET team_count = team_count + %s WHERE id = %s',
+                           (len(leaders), self.hackathon_id))
+            self.stats['teams_created'] += len(leaders)
+            created = list(leaders)
+            cursor.execute(f'''
+                SELECT id, team_name FROM teams
+                WHERE hackathon_id = %s AND team_name IN ({_placeholders(created)})
+            ''', [self.hackathon_id] + created)
+            team_ids.update({name: team_id for team_id, name in cursor.fetchall()})
+
+        members = []
+        for number, email, name, _ in rows:
+            user_id = user_ids.get(email)
+            if user_id is None or user_id in placed or name not in team_ids:
+                self.stats['members_skipped'] += 1
+                continue
+            placed.add(user_id)
+            role = 'leader' if leaders.get(name) == user_id else 'member'
+            members.append((number, name, team_ids[name], user_id, role))
+        # Leaders take their place before the members of their team
+        members.sort(key=lambda member: member[4] != 'leader')
+
+        for number, name, team_id, user_id, role in members:
+            # The same conditional increment as approving a join request, so an
+            # import can't overfill a team either
+            cursor.execute('''
+                UPDATE teams SET member_count = member_count + 1
+                WHERE id = %s AND member_count < (
+                    SELECT max_team_size FROM hackathons WHERE id = teams.hackathon_id
+                )
+            ''', (team_id,))
+            if cursor.rowcount == 0:
+                self.stats['members_rejected'] += 1
+                self.errors.append(f'Row {number}: team "{name}" is full.')
+                continue
+            cursor.execute('''
+                INSERT IGNORE INTO team_members (team_id, user_id, status, role)
+                VALUES (%s, %s, 'accepted', %s)
+            ''', (team_id, user_id, role))
+            if cursor.rowcount == 0:
+                cursor.execute('UPDATE teams SET member_count = member_count - 1 WHERE id = %s',
+                               (team_id,))
+                self.stats['members_skipped'] += 1
+                continue
+            self.stats['members_added'] += 1
@@ -0,0 +1,158 @@
+"""
+Live rankings for the Hackathon Platform
+
+Spectators of a hackathon's rankings subscribe to a RankingsBroker, which
+keeps one copy of each watched hackathon's standings per process and sends
+every subscriber the changes. Viewers never query the database themselves:
+the broker reloads a hackathon's standings once per change, however many
+people are watching.
+
+A change is noticed in two ways. Write routes in this process call
+notify() after they commit, which wakes the broker at once. Changes made
+by other workers (or the CLI) move hackathons.rankings_updated_at, which
+the broker polls for all watched hackathons in one query every
+poll_interval seconds.
+
+Subscribers receive events as dicts:
+
+    {'type': 'snapshot', 'rankings': [row, ...]}          on subscribing
+    {'type': 'update', 'changed': [row, ...],              on every change
+     'removed': [project_id, ...], 'order': [project_id, ...]}
+
+Delivery is a callable, so the same broker feeds threads (a queue.Queue)
+and the async server (an asyncio.Queue filled from the event loop).
+"""
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, hackathon_id, deliver):
+        self.hackathon_id = hackathon_id
+        self.deliver = deliver
+        self.needs_snapshot = True
+        self.closed = False
+
+
+class _Channel:
+    def __init__(self):
+        self.subscribers = set()
+        self.version = None
+        self.standings = None
+
+
+def diff_standings(old, new, key='project_id'):
+    """Update event turning the old standings into the new ones, or None if equal"""
+    before = {row[key]: row for row in old}
+    changed = [row for row in new if before.get(row[key]) != row]
+    current = {row[key] for row in new}
+    removed = [project_id for project_id in before if project_id not in current]
+    order = [row[key] for row in new]
+    if not changed and not removed and order == [row[key] for row in old]:
+        return None
+    return {'type': 'update', 'changed': changed, 'removed': removed, 'order': order}
+
+
+class RankingsBroker:
+    """Fans out standings changes to subscribers; one loader thread per process.
+
+    versions(ids) returns {hackathon_id: change marker} for the given
+    hackathons, and standings(hackathon_id) the rows of one; both are called
+    from the broker's thread only.
+    """
+
+    def __init__(self, versions, standings, poll_interval=2.0):
+        self.versions = versions
+        self.standings = standings
+        self.poll_interval = poll_interval
+        self._channels = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, hackathon_id, deliver):
+        subscription = Subscription(hackathon_id, deliver)
+        with self._lock:
+            self._channels.setdefault(hackathon_id, _Channel()).subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='rankings-broker', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            channel = self._channels.get(subscription.hackathon_id)
+            if channel is not None:
+                channel.subscribers.discard(subscription)
+                if not channel.subscribers:
+                    del self._channels[subscription.hackathon_id]
+
+    def notify(self, hackathon_id):
+        """A write in this process changed the hackathon's standings"""
+        with self._lock:
+            if hackathon_id not in self._channels:
+                return
+            self._pending.add(hackathon_id)
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {'hackathons': len(self._channels),
+                    'subscribers': sum(len(c.subscribers) for c in self._channels.values())}
+
+    def _send(self, subscription, event):
+        try:
+            subscription.deliver(event)
+        except Exception:
+            # A subscriber that can't keep up is dropped; its client reconnects
+            # and starts over from a snapshot
+            self.unsubscribe(subscription)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._channels:
+                    self._thread = None
+                    return
+                channels = {hackathon_id: (channel, list(channel.subscribers))
+                            for hackathon_id, channel in self._channels.items()}
+                pending, self._pending = self._pending, set()
+            try:
+                self._refresh(channels, pending)
+            except Exception:
+                logger.exception('Refreshing live rankings failed')
+
+    def _refresh(self, channels, pending):
+        versions = self.versions(list(channels))
+        for hackathon_id, (channel, subscribers) in channels.items():
+            version = versions.get(hackathon_id)
+            if channel.standings is None or hackathon_id in pending or version != channel.version:
+                # Record the marker first: a change landing during the load is
+                # picked up again on the next poll
+                channel.version = version
+                standings = self.standings(hackathon_id)
+                update = diff_standings(channel.standings, standings) if channel.standings is not None else None
+                channel.standings = standings
+                for subscription in subscribers:
+                    if update is not None and not subscription.needs_snapshot:
+                        self._send(subscription, update)
+            snapshot = {'type': 'snapshot', 'rankings': channel.standings}
+            for subscription in subscribers:
+                if subscription.needs_snapshot:
+                    subscription.needs_snapshot = False
+                    self._send(subscription, snapshot)
+
+
+def queue_delivery(maxsize=100):
+    """A bounded queue and a delivery callable for it; a full queue raises queue.Full"""
+    events = queue.Queue(maxsize)
+    return events, events.put_nowait
@@ -0,0 +1,378 @@
+"""
+Request and query instrumentation for the Hackathon Platform
+
+Connections handed out by get_db() during a request are wrapped so that
+every statement is timed into the request's QueryLog. When the request ends
+its route latency, query count and database time feed the Metrics registry,
+which renders them in the Prometheus text format.
+
+Metrics are counted per process. With several workers, each one saves a
+snapshot of its counters to a shared directory (at most once per
+flush_interval), and whichever worker answers /metrics adds them all up, so
+a scrape sees the whole server however requests were balanced. Snapshots
+not saved for retire_after seconds, normally those of exited workers, are
+folded into one retired snapshot and deleted.
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker, nothing to serialize
+    fcntl = None
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Totals of workers that stopped saving snapshots, and the lock guarding them
+RETIRED_FILE = 'retired.json'
+LOCK_FILE = '.lock'
+
+DESCRIPTIONS = {
+    'hackathon_request_duration_seconds': ('histogram', 'Time to serve a request, by route'),
+    'hackathon_request_db_seconds': ('histogram', 'Database time spent per request, by route'),
+    'hackathon_requests_total': ('counter', 'Requests served, by route, method and status'),
+    'hackathon_db_queries_total': ('counter', 'Statements executed, by route'),
+    'hackathon_slow_queries_total': ('counter', 'Statements slower than SLOW_QUERY_MS, by route'),
+    'hackathon_repeated_queries_total': ('counter', 'Statements repeated within one request '
+                                                    'at least REPEATED_QUERY_THRESHOLD times, by route'),
+    'hackathon_db_pool': ('gauge', 'Connection pool statistics of each worker'),
+}
+
+
+class QueryLog:
+    """Statements run while serving one request, with their durations"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = []
+
+    def record(self, sql, seconds):
+        self.statements.append((sql, seconds))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def slower_than(self, seconds):
+        return [(sql, elapsed) for sql, elapsed in self.statements if elapsed >= seconds]
+
+    def repeated(self, threshold):
+        """Statements run at least threshold times, usually once per row of an earlier result"""
+        counts = Counter(sql for sql, _ in self.statements)
+        return {sql: n for sql, n in counts.items() if n >= threshold}
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, sql, params=()):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._log.record(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, rows):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, rows)
+        finally:
+            self._log.record(sql, time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """A pooled connection whose cursors time their statements into a QueryLog"""
+
+    def __init__(self, conn, log):
+        self.connection = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.connection.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ''
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def _add(snapshot, counters, histograms, buckets):
+    """Sum a snapshot's counters and histograms into the given totals"""
+    for name, labels, value in snapshot['counters']:
+        counters[(name, tuple(map(tuple, labels)))] += value
+    for name, labels, bounds, series in snapshot['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        buckets[name] = bounds
+        total = histograms.setdefault(key, [0] * len(series))
+        for i, value in enumerate(series):
+            total[i] += value
+
+
+def _number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class Metrics:
+    """Process-wide counters and histograms, optionally shared through a directory.
+
+    gauges is a callable returning (name, labels, value) triples read at
+    flush and render time, such as the connection pool's statistics.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0, gauges=None, retire_after=600):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.retire_after = retire_after
+        self.gauges = gauges or (lambda: [])
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        # (name, labels) -> [count per bucket..., count, sum]
+        self._histograms = {}
+        self._buckets = {}
+        self._last_flush = 0.0
+        self._name = None
+        # The snapshot last saved, in case another worker retires it
+        self._flushed = None
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, _labels(**labels))] += amount
+
+    def observe(self, name, value, buckets, **labels):
+        key = (name, _labels(**labels))
+        with self._lock:
+            self._buckets[name] = buckets
+            series = self._histograms.setdefault(key, [0] * (len(buckets) + 1) + [0.0])
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def observe_request(self, route, method, status, duration, log, slow_seconds, repeat_threshold):
+        """Record one finished request; returns its slow and repeated statements"""
+        slow = log.slower_than(slow_seconds)
+        repeated = log.repeated(repeat_threshold)
+        self.observe('hackathon_request_duration_seconds', duration, LATENCY_BUCKETS,
+                     route=route, method=method)
+        self.inc('hackathon_requests_total', route=route, method=method, status=status)
+        if log.count:
+            self.observe('hackathon_request_db_seconds', log.total, DB_TIME_BUCKETS, route=route)
+            self.inc('hackathon_db_queries_total', log.count, route=route)
+        if slow:
+            self.inc('hackathon_slow_queries_total', len(slow), route=route)
+        if repeated:
+            self.inc('hackathon_repeated_queries_total', len(repeated), route=route)
+        self.maybe_flush()
+        return slow, repeated
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, self._buckets[name], series]
+                               for (name, labels), series in self._histograms.items()],
+            }
+
+    def _path(self):
+        # A pid alone may be reused by a later worker, which would overwrite
+        # the counters of the one that exited
+        if self._name is None or self._name[0] != os.getpid():
+            self._name = (os.getpid(), uuid.uuid4().hex[:12])
+        pid, token = self._name
+        return os.path.join(self.directory, f'{pid}-{token}.json')
+
+    def _current(self):
+        return dict(self.snapshot(), gauges=[[name, _labels(**labels), value]
+                                             for name, labels, value in self.gauges()],
+                    saved_at=time.time())
+
+    @contextmanager
+    def _directory_lock(self):
+        """Serialize snapshot writes and retirement between the workers"""
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write(self, path, snapshot):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+    def _forget(self, snapshot):
+        """Drop counts that another worker folded into the retired snapshot"""
+        with self._lock:
+            for name, labels, value in snapshot['counters']:
+                self._counters[(name, labels)] -= value
+            for name, labels, _, series in snapshot['histograms']:
+                current = self._histograms[(name, labels)]
+                for i, value in enumerate(series):
+                    current[i] -= value
+
+    def flush(self):
+        """Save this process's snapshot for the other workers to read"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        with self._directory_lock():
+            if self._flushed is not None and not os.path.exists(self._path()):
+                # This worker sat idle past retire_after: what it last saved is
+                # already counted as retired, so only report what came since
+                self._forget(self._flushed)
+                self._name = None
+            current = self._current()
+            self._write(self._path(), current)
+            self._flushed = current
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _retire(self):
+        """Fold snapshots not saved for retire_after seconds into the retired one.
+
+        Their workers have most likely exited. Without this every worker
+        that ever ran would leave a file behind for each scrape to read.
+        """
+        retired_path = os.path.join(self.directory, RETIRED_FILE)
+        cutoff = time.time() - self.retire_after
+        stale = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == RETIRED_FILE:
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.directory, name)) < cutoff:
+                    stale.append(name)
+            except OSError:
+                continue
+        try:
+            with open(retired_path) as f:
+                retired = json.load(f)
+        except (OSError, ValueError):
+            retired = {'counters': [], 'histograms': [], 'folded': []}
+        # Files folded by a worker that died before deleting them
+        leftover = set(retired['folded'])
+        if not stale and not leftover:
+            return
+
+        counters = defaultdict(float)
+        histograms = {}
+        buckets = {}
+        folded = []
+        _add(retired, counters, histograms, buckets)
+        for name in stale:
+            if name in leftover:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    _add(json.load(f), counters, histograms, buckets)
+            except (OSError, ValueError):
+                continue
+            folded.append(name)
+        self._write(retired_path, {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, buckets[name], series]
+                           for (name, labels), series in histograms.items()],
+            'folded': folded,
+        })
+        for name in leftover.union(folded):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self._current()]
+        self.flush()
+        snapshots = []
+        with self._directory_lock():
+            self._retire()
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # not ours
+        return snapshots
+
+    def render(self, gauge_max_age=60):
+        """All workers' metrics in the Prometheus text exposition format.
+
+        Counters and histograms are summed over every snapshot, including
+        the retired totals of workers that have exited, so they never go
+        backwards. Gauges are reported per worker, for workers seen in the
+        last gauge_max_age seconds.
+        """
+        counters = defaultdict(float)
+        histograms = {}
+        buckets = {}
+        current = []
+        now = time.time()
+        for snapshot in self._snapshots():
+            _add(snapshot, counters, histograms, buckets)
+            if 'gauges' in snapshot and now - snapshot['saved_at'] <= gauge_max_age:
+                current.extend((name, tuple(map(tuple, labels)), value)
+                               for name, labels, value in snapshot['gauges'])
+
+        families = defaultdict(list)
+        for (name, labels), value in sorted(counters.items()):
+            families[name].append(f'{name}{_format_labels(labels)} {_number(value)}')
+        for (name, labels), series in sorted(histograms.items()):
+            # Bucket counts are stored cumulative, as the format wants them
+            for bound, count in zip(buckets[name], series):
+                families[name].append(f'{name}_bucket{_format_labels(labels, le=_number(float(bound)))} {count}')
+            families[name].append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {series[-2]}')
+            families[name].append(f'{name}_count{_format_labels(labels)} {series[-2]}')
+            families[name].append(f'{name}_sum{_format_labels(labels)} {_number(series[-1])}')
+        for name, labels, value in sorted(current):
+            families[name].append(f'{name}{_format_labels(labels)} {_number(value)}')
+
+        lines = []
+        for name in sorted(families):
+            kind, description = DESCRIPTIONS.get(name, ('untyped', name))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(families[name])
+        return '\n'.join(lines) + '\n'
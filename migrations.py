@@ -0,0 +1,413 @@
+"""
+Versioned schema migrations for the Hackathon Platform
+"""
+
+# Each migration is (version, description, statements). Versions are applied
+# in order and recorded in schema_migrations, so a statement only ever runs
+# once per database. Never edit a migration that has shipped; add a new one.
+# Where MySQL and SQLite need different DDL, statements is a dict keyed by
+# dialect.
+MIGRATIONS = [
+    (1, 'initial schema', {'mysql': [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(64) NOT NULL,
+            full_name VARCHAR(255) NOT NULL,
+            role VARCHAR(50) NOT NULL DEFAULT 'participant',
+            bio TEXT,
+            github_username VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS hackathons (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            organizer_id INT NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            start_date TIMESTAMP NOT NULL,
+            end_date TIMESTAMP NOT NULL,
+            registration_deadline TIMESTAMP NOT NULL,
+            max_team_size INT DEFAULT 4,
+            min_team_size INT DEFAULT 1,
+            status VARCHAR(50) DEFAULT 'draft',
+            is_online BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (organizer_id) REFERENCES users(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            hackathon_id INT NOT NULL,
+            team_name VARCHAR(255) NOT NULL,
+            team_leader_id INT NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
+            FOREIGN KEY (team_leader_id) REFERENCES users(id),
+            UNIQUE(hackathon_id, team_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS team_members (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            team_id INT NOT NULL,
+            user_id INT NOT NULL,
+            status VARCHAR(50) DEFAULT 'accepted',
+            role VARCHAR(50) DEFAULT 'member',
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (team_id) REFERENCES teams(id),
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            UNIQUE(team_id, user_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            team_id INT UNIQUE NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            github_url VARCHAR(500),
+            demo_url VARCHAR(500),
+            is_submitted BOOLEAN DEFAULT 0,
+            submitted_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (team_id) REFERENCES teams(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS jury_assignments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            hackathon_id INT NOT NULL,
+            jury_id INT NOT NULL,
+            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
+            FOREIGN KEY (jury_id) REFERENCES users(id),
+            UNIQUE(hackathon_id, jury_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            project_id INT NOT NULL,
+            jury_id INT NOT NULL,
+            innovation_score FLOAT,
+            technical_score FLOAT,
+            presentation_score FLOAT,
+            usefulness_score FLOAT,
+            overall_score FLOAT,
+            comments TEXT,
+            is_submitted BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (project_id) REFERENCES projects(id),
+            FOREIGN KEY (jury_id) REFERENCES users(id),
+            UNIQUE(project_id, jury_id)
+        )
+        ''',
+    ], 'sqlite': [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(64) NOT NULL,
+            full_name VARCHAR(255) NOT NULL,
+            role VARCHAR(50) NOT NULL DEFAULT 'participant',
+            bio TEXT,
+            github_username VARCHAR(255),
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS hackathons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            organizer_id INT NOT NULL REFERENCES users(id),
+            title VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            start_date TIMESTAMP NOT NULL,
+            end_date TIMESTAMP NOT NULL,
+            registration_deadline TIMESTAMP NOT NULL,
+            max_team_size INT DEFAULT 4,
+            min_team_size INT DEFAULT 1,
+            status VARCHAR(50) DEFAULT 'draft',
+            is_online BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hackathon_id INT NOT NULL REFERENCES hackathons(id),
+            team_name VARCHAR(255) NOT NULL,
+            team_leader_id INT NOT NULL REFERENCES users(id),
+            description TEXT,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            UNIQUE(hackathon_id, team_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS team_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INT NOT NULL REFERENCES teams(id),
+            user_id INT NOT NULL REFERENCES users(id),
+            status VARCHAR(50) DEFAULT 'accepted',
+            role VARCHAR(50) DEFAULT 'member',
+            joined_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            UNIQUE(team_id, user_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INT UNIQUE NOT NULL REFERENCES teams(id),
+            title VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            github_url VARCHAR(500),
+            demo_url VARCHAR(500),
+            is_submitted BOOLEAN DEFAULT 0,
+            submitted_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS jury_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hackathon_id INT NOT NULL REFERENCES hackathons(id),
+            jury_id INT NOT NULL REFERENCES users(id),
+            UNIQUE(hackathon_id, jury_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INT NOT NULL REFERENCES projects(id),
+            jury_id INT NOT NULL REFERENCES users(id),
+            innovation_score FLOAT,
+            technical_score FLOAT,
+            presentation_score FLOAT,
+            usefulness_score FLOAT,
+            overall_score FLOAT,
+            comments TEXT,
+            is_submitted BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            UNIQUE(project_id, jury_id)
+        )
+        ''',
+        # InnoDB indexes foreign keys implicitly; this is the one no other index covers
+        'CREATE INDEX idx_jury_assignments_jury ON jury_assignments (jury_id)',
+    ]}),
+    (2, 'project score aggregate', {'mysql': [
+        '''
+        CREATE TABLE IF NOT EXISTS project_scores (
+            project_id INT PRIMARY KEY,
+            hackathon_id INT NOT NULL,
+            score_sum FLOAT NOT NULL DEFAULT 0,
+            score_count INT NOT NULL DEFAULT 0,
+            avg_score FLOAT,
+            rank_position INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (project_id) REFERENCES projects(id),
+            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
+            INDEX idx_project_scores_rank (hackathon_id, rank_position)
+        )
+        ''',
+    ], 'sqlite': [
+        '''
+        CREATE TABLE IF NOT EXISTS project_scores (
+            project_id INT PRIMARY KEY REFERENCES projects(id),
+            hackathon_id INT NOT NULL REFERENCES hackathons(id),
+            score_sum FLOAT NOT NULL DEFAULT 0,
+            score_count INT NOT NULL DEFAULT 0,
+            avg_score FLOAT,
+            rank_position INT,
+            updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+        )
+        ''',
+        'CREATE INDEX idx_project_scores_rank ON project_scores (hackathon_id, rank_position)',
+    ]}),
+    (3, 'secondary indexes for hot queries', [
+        'CREATE INDEX idx_hackathons_status_start ON hackathons (status, start_date)',
+        'CREATE INDEX idx_hackathons_organizer_created ON hackathons (organizer_id, created_at)',
+        'CREATE INDEX idx_teams_hackathon_created ON teams (hackathon_id, created_at)',
+        'CREATE INDEX idx_teams_leader ON teams (team_leader_id)',
+        'CREATE INDEX idx_team_members_user_status ON team_members (user_id, status)',
+        'CREATE INDEX idx_team_members_team_status ON team_members (team_id, status)',
+        'CREATE INDEX idx_projects_submitted ON projects (is_submitted, submitted_at)',
+        'CREATE INDEX idx_evaluations_jury_submitted ON evaluations (jury_id, is_submitted)',
+    ]),
+    (4, 'denormalized team, submission and member counters', {'mysql': [
+        '''
+        ALTER TABLE hackathons
+            ADD COLUMN team_count INT NOT NULL DEFAULT 0,
+            ADD COLUMN submitted_count INT NOT NULL DEFAULT 0
+        ''',
+        'ALTER TABLE teams ADD COLUMN member_count INT NOT NULL DEFAULT 0',
+        '''
+        UPDATE hackathons h
+        SET team_count = (SELECT COUNT(*) FROM teams t WHERE t.hackathon_id = h.id),
+            submitted_count = (SELECT COUNT(*) FROM teams t
+                               JOIN projects p ON t.id = p.team_id
+                               WHERE t.hackathon_id = h.id AND p.is_submitted = 1)
+        ''',
+        '''
+        UPDATE teams t
+        SET member_count = (SELECT COUNT(*) FROM team_members tm
+                            WHERE tm.team_id = t.id AND tm.status = 'accepted')
+        ''',
+    ], 'sqlite': [
+        'ALTER TABLE hackathons ADD COLUMN team_count INT NOT NULL DEFAULT 0',
+        'ALTER TABLE hackathons ADD COLUMN submitted_count INT NOT NULL DEFAULT 0',
+        'ALTER TABLE teams ADD COLUMN member_count INT NOT NULL DEFAULT 0',
+        '''
+        UPDATE hackathons AS h
+        SET team_count = (SELECT COUNT(*) FROM teams t WHERE t.hackathon_id = h.id),
+            submitted_count = (SELECT COUNT(*) FROM teams t
+                               JOIN projects p ON t.id = p.team_id
+                               WHERE t.hackathon_id = h.id AND p.is_submitted = 1)
+        ''',
+        '''
+        UPDATE teams AS t
+        SET member_count = (SELECT COUNT(*) FROM team_members tm
+                            WHERE tm.team_id = t.id AND tm.status = 'accepted')
+        ''',
+    ]}),
+    (5, 'keyset pagination over team join requests', {'mysql': [
+        'CREATE INDEX idx_team_members_team_status_joined ON team_members (team_id, status, joined_at)',
+        'DROP INDEX idx_team_members_team_status ON team_members',
+    ], 'sqlite': [
+        'CREATE INDEX idx_team_members_team_status_joined ON team_members (team_id, status, joined_at)',
+        'DROP INDEX idx_team_members_team_status',
+    ]}),
+    (6, 'rankings change stamp for conditional GETs', [
+        'ALTER TABLE hackathons ADD COLUMN rankings_updated_at TIMESTAMP(6) NULL',
+    ]),
+    (7, 'per-hackathon scoring scheme', {'mysql': [
+        '''
+        ALTER TABLE hackathons
+            ADD COLUMN weight_innovation FLOAT NOT NULL DEFAULT 1,
+            ADD COLUMN weight_technical FLOAT NOT NULL DEFAULT 1,
+            ADD COLUMN weight_presentation FLOAT NOT NULL DEFAULT 1,
+            ADD COLUMN weight_usefulness FLOAT NOT NULL DEFAULT 1,
+            ADD COLUMN score_normalization VARCHAR(20) NOT NULL DEFAULT 'none',
+            ADD COLUMN score_trim FLOAT NOT NULL DEFAULT 0
+        ''',
+    ], 'sqlite': [
+        'ALTER TABLE hackathons ADD COLUMN weight_innovation FLOAT NOT NULL DEFAULT 1',
+        'ALTER TABLE hackathons ADD COLUMN weight_technical FLOAT NOT NULL DEFAULT 1',
+        'ALTER TABLE hackathons ADD COLUMN weight_presentation FLOAT NOT NULL DEFAULT 1',
+        'ALTER TABLE hackathons ADD COLUMN weight_usefulness FLOAT NOT NULL DEFAULT 1',
+        "ALTER TABLE hackathons ADD COLUMN score_normalization VARCHAR(20) NOT NULL DEFAULT 'none'",
+        'ALTER TABLE hackathons ADD COLUMN score_trim FLOAT NOT NULL DEFAULT 0',
+    ]}),
+    (8, 'per-project review assignments', {'mysql': [
+        'ALTER TABLE hackathons ADD COLUMN reviews_per_project INT NOT NULL DEFAULT 0',
+        '''
+        CREATE TABLE IF NOT EXISTS review_assignments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            hackathon_id INT NOT NULL,
+            project_id INT NOT NULL,
+            jury_id INT NOT NULL,
+            assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (hackathon_id) REFERENCES hackathons(id),
+            FOREIGN KEY (project_id) REFERENCES projects(id),
+            FOREIGN KEY (jury_id) REFERENCES users(id),
+            UNIQUE(project_id, jury_id),
+            INDEX idx_review_assignments_jury (jury_id, hackathon_id)
+        )
+        ''',
+    ], 'sqlite': [
+        'ALTER TABLE hackathons ADD COLUMN reviews_per_project INT NOT NULL DEFAULT 0',
+        '''
+        CREATE TABLE IF NOT EXISTS review_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hackathon_id INT NOT NULL REFERENCES hackathons(id),
+            project_id INT NOT NULL REFERENCES projects(id),
+            jury_id INT NOT NULL REFERENCES users(id),
+            assigned_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+            UNIQUE(project_id, jury_id)
+        )
+        ''',
+        'CREATE INDEX idx_review_assignments_jury ON review_assignments (jury_id, hackathon_id)',
+        'CREATE INDEX idx_review_assignments_hackathon ON review_assignments (hackathon_id)',
+    ]}),
+    # SQLite has no full-text index of its own here: each process builds one in
+    # memory (search.py), and search_changes tells it what to re-read
+    (9, 'full-text search', {'mysql': [
+        'ALTER TABLE hackathons ADD FULLTEXT INDEX ft_hackathons (title, description)',
+        'ALTER TABLE teams ADD FULLTEXT INDEX ft_teams (team_name, description)',
+        'ALTER TABLE projects ADD FULLTEXT INDEX ft_projects (title, description)',
+    ], 'sqlite': [
+        '''
+        CREATE TABLE IF NOT EXISTS search_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind VARCHAR(20) NOT NULL,
+            ref_id INT NOT NULL
+        )
+        ''',
+    ]}),
+    # Set by evaluations of a hackathon with a scoring scheme; the next read of
+    # its rankings rescores it
+    (10, 'deferred rescoring', [
+        'ALTER TABLE hackathons ADD COLUMN scores_stale TINYINT NOT NULL DEFAULT 0',
+    ]),
+]
+
+def migrate(db, dialect='mysql'):
+    """Apply every migration newer than the database's recorded version.
+
+    Returns the list of versions applied.
+    """
+    cursor = db.cursor(dictionary=True)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT COALESCE(MAX(version), 0) as version FROM schema_migrations')
+    current = cursor.fetchone()['version']
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        if isinstance(statements, dict):
+            statements = statements[dialect]
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(
+            'INSERT INTO schema_migrations (version, description) VALUES (%s, %s)',
+            (version, description)
+        )
+        db.commit()
+        applied.append(version)
+
+    cursor.close()
+    return applied
+
+
+def find_full_scans(db, queries, dialect='mysql'):
+    """EXPLAIN each route query and report plan rows that scan a whole table.
+
+    Returns a list of (query name, table, estimated rows) tuples; SQLite
+    plans carry no row estimates.
+    """
+    cursor = db.cursor(dictionary=True)
+    offenders = []
+    for name, (sql, params) in queries.items():
+        if dialect == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            for row in cursor.fetchall():
+                # "SCAN t" reads the whole table; "SCAN t USING INDEX ..." does not
+                detail = row['detail']
+                if detail.startswith('SCAN ') and ' USING ' not in detail:
+                    offenders.append((name, detail.split()[1], None))
+            continue
+        cursor.execute('EXPLAIN ' + sql, params)
+        for row in cursor.fetchall():
+            if row.get('type') == 'ALL':
+                offenders.append((name, row.get('table'), row.get('rows')))
+    cursor.close()
+    return offenders
@@ -0,0 +1,71 @@
+"""
+Keyset pagination helpers for the Hackathon Platform
+
+A page cursor is the sort key of the last row shown, encoded as an opaque
+URL-safe token. The next page continues strictly after that key, so reading
+page N costs the same as reading page 1.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+import json
+
+
+def encode_cursor(*values):
+    """Encode a row's sort key as a cursor token"""
+    values = [str(v) if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Decode a cursor token, returning None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    # Values are bound straight into SQL: only scalars are valid
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
+
+def page_size(value, default, maximum):
+    """Parse a requested page size, clamped to 1..maximum"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def keyset_condition(columns, descending=False):
+    """SQL condition selecting rows after a cursor on the given sort columns.
+
+    Expands (a, b) > (x, y) to a > x OR (a = x AND b > y) so MySQL can use
+    a range scan on the matching index. Bind the cursor values with
+    keyset_params().
+    """
+    op = '<' if descending else '>'
+    first, second = columns
+    return f'({first} {op} %s OR ({first} = %s AND {second} {op} %s))'
+
+
+def keyset_params(cursor):
+    """Parameters for keyset_condition() from a decoded two-column cursor"""
+    first, second = cursor
+    return (first, first, second)
+
+
+def split_page(rows, limit, key):
+    """Trim a LIMIT n+1 result to n rows and build the cursor for the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
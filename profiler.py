@@ -0,0 +1,169 @@
+"""
+Sampling profiler for production requests
+
+While a request is being profiled, one shared background thread samples its
+thread's stack every few milliseconds. Each sample is put in a category by
+the code it is in: the database driver and pool (db), Jinja templates
+(template), or anything else (python). A template that triggers a query
+counts as db.
+
+The samples of a request are written as collapsed stacks, one
+"frame;frame;...;frame count" line per distinct stack, with the category as
+the root frame so a flame graph splits at the top into db, template and
+python time. The files load directly into flamegraph.pl, inferno or
+speedscope. The output directory is capped at max_bytes; the oldest
+profiles are deleted to make room for new ones.
+"""
+
+from collections import Counter
+import os
+import re
+import sys
+import threading
+import time
+
+DB_PATH = re.compile(r'[/\\](mysql|aiomysql|pymysql|sqlite3)[/\\]')
+TEMPLATE_PATH = re.compile(r'[/\\]jinja2[/\\]|\.(html|jinja2?)$')
+CATEGORIES = ('db', 'template', 'python')
+
+
+class RequestProfile:
+    """Stack samples of one request"""
+
+    def __init__(self, route, thread_id):
+        self.route = route
+        self.thread_id = thread_id
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stacks = Counter()
+        self.categories = Counter()
+
+    @property
+    def samples(self):
+        return sum(self.categories.values())
+
+    def split(self):
+        """Estimated milliseconds per category: the share of samples times the duration"""
+        duration = (self.duration or time.perf_counter() - self.started) * 1000
+        samples = self.samples
+        return {category: round(duration * self.categories[category] / samples, 1) if samples else 0.0
+                for category in CATEGORIES}
+
+    def summary(self):
+        split = self.split()
+        return '; '.join([f'{category}={split[category]}ms' for category in CATEGORIES] +
+                         [f'samples={self.samples}'])
+
+
+class SamplingProfiler:
+    def __init__(self, directory, interval=0.005, max_bytes=100 * 1024 * 1024, db_files=()):
+        self.directory = directory
+        self.interval = interval
+        self.max_bytes = max_bytes
+        # Our own database layer counts as db, like the drivers it wraps
+        self.db_files = {os.path.abspath(path) for path in db_files}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._frames = {}
+
+    def start(self, route):
+        """Begin sampling the calling thread"""
+        profile = RequestProfile(route, threading.get_ident())
+        with self._lock:
+            self._active[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(id(profile), None)
+        if profile.duration is None:
+            profile.duration = time.perf_counter() - profile.started
+        return profile
+
+    def finish(self, profile):
+        """Stop sampling and write the profile; returns the file written, if any"""
+        self.stop(profile)
+        if not profile.stacks:
+            return None
+        return self.write(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active.values())
+            frames = sys._current_frames()
+            for profile in profiles:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    category, stack = self._collapse(frame)
+                    profile.categories[category] += 1
+                    profile.stacks[f'{category};{stack}'] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _frame(self, code):
+        """Label and category of a code object, cached as the same code recurs in every sample"""
+        cached = self._frames.get(code)
+        if cached is None:
+            path = code.co_filename
+            if DB_PATH.search(path) or os.path.abspath(path) in self.db_files:
+                category = 'db'
+            elif TEMPLATE_PATH.search(path):
+                category = 'template'
+            else:
+                category = 'python'
+            # The parent directory tells flask/app.py from our app.py
+            where = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+            label = f'{code.co_name} ({where}:{code.co_firstlineno})'
+            cached = self._frames[code] = (label.replace(';', ':'), category)
+        return cached
+
+    def _collapse(self, frame):
+        labels, seen = [], set()
+        while frame is not None:
+            label, category = self._frame(frame.f_code)
+            labels.append(label)
+            seen.add(category)
+            frame = frame.f_back
+        category = 'db' if 'db' in seen else 'template' if 'template' in seen else 'python'
+        return category, ';'.join(reversed(labels))
+
+    def write(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        name = (f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}.{int(now * 1000) % 1000:03d}-'
+                f'{profile.route}-{os.getpid()}-'
+                f'{round(profile.duration * 1000)}ms.folded')
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            for stack, count in profile.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        self.prune()
+        return path
+
+    def prune(self):
+        """Delete the oldest profiles until the directory fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.folded'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue  # pruned by another worker
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
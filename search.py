@@ -0,0 +1,212 @@
+"""
+Full-text search over hackathons, teams and projects
+
+On MySQL, search runs on FULLTEXT indexes (see query_search in app.py).
+SQLite has none, so each process keeps a SearchIndex: one in-memory
+inverted index per kind of document, ranked with BM25. A result must
+contain every search term; the last term also matches as a prefix, so
+results appear while a word is still being typed.
+
+Each index is built from the database on the first search in a process.
+Writes that change searchable text record the changed hackathon or team in
+the search_changes table, in the same transaction. Before every search,
+the index re-reads just the documents journalled since it last looked, so
+every worker sees every other worker's edits. The journal only keeps its
+newest rows; an index that fell further behind than that rebuilds.
+"""
+
+from collections import Counter, defaultdict
+import bisect
+import math
+import re
+import threading
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+KINDS = ('hackathon', 'team', 'project')
+# A title word counts as much as this many description words
+TITLE_WEIGHT = 3
+# Shortest prefix expanded to every word it starts
+MIN_PREFIX = 3
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """BM25-ranked documents of one kind, with per-document metadata for filtering"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc id: weighted term frequency}
+        self.terms = {}                    # doc id -> {term: frequency}, for removal
+        self.lengths = {}
+        self.meta = {}
+        self.total_length = 0
+        self._vocabulary = None            # sorted terms, for prefix lookups
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, title, description, meta=None):
+        self.remove(doc_id)
+        frequencies = Counter(tokenize(description))
+        for term in tokenize(title):
+            frequencies[term] += TITLE_WEIGHT
+        postings = self.postings
+        for term, frequency in frequencies.items():
+            postings[term][doc_id] = frequency
+        self._vocabulary = None
+        self.terms[doc_id] = frequencies
+        self.lengths[doc_id] = length = sum(frequencies.values())
+        self.total_length += length
+        self.meta[doc_id] = meta or {}
+
+    def remove(self, doc_id):
+        frequencies = self.terms.pop(doc_id, None)
+        if frequencies is None:
+            return
+        for term in frequencies:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+                self._vocabulary = None
+        self.total_length -= self.lengths.pop(doc_id)
+        del self.meta[doc_id]
+
+    def _matches(self, term, prefix):
+        """Postings of a term, or of every term it starts when it's a prefix"""
+        if not prefix or len(term) < MIN_PREFIX:
+            return self.postings.get(term, {})
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + '\uffff')
+        if end - start == 1:
+            return self.postings[self._vocabulary[start]]
+        merged = defaultdict(int)
+        for word in self._vocabulary[start:end]:
+            for doc_id, frequency in self.postings[word].items():
+                merged[doc_id] += frequency
+        return merged
+
+    def search(self, query, accept=None):
+        """(score, doc id) of every document with all the query's terms, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.lengths:
+            return []
+        matches = [self._matches(term, prefix=(i == len(terms) - 1)) for i, term in enumerate(terms)]
+        if not all(matches):
+            return []
+        # Intersect starting from the rarest term
+        rarest = min(matches, key=len)
+        candidates = [doc_id for doc_id in rarest if all(doc_id in m for m in matches)]
+        if accept is not None:
+            candidates = [doc_id for doc_id in candidates if accept(self.meta[doc_id])]
+
+        count = len(self.lengths)
+        average = self.total_length / count
+        results = []
+        for doc_id in candidates:
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average)
+            score = 0.0
+            for postings in matches:
+                frequency = postings[doc_id]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                score += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append((round(score, 6), doc_id))
+        results.sort(reverse=True)
+        return results
+
+
+class SearchIndex:
+    """The in-process indexes of all three kinds, kept in step with the database.
+
+    position() returns the newest search_changes id, changes(after) the
+    (id, kind, ref_id) rows newer than after in id order, and documents(kind, ids) the
+    rows to index: all of a kind when ids is None, and projects by team id. Rows carry id, title and
+    description, plus status (hackathons), hackathon_id (teams and projects)
+    and is_submitted (projects). A 'team' change reloads the team and its project; an 'all'
+    change rebuilds everything.
+    """
+
+    def __init__(self, position, changes, documents):
+        self.position = position
+        self.changes = changes
+        self.documents = documents
+        self.indexes = None
+        self.last_change = 0
+        self._lock = threading.Lock()
+
+    def _index(self, indexes, kind, row):
+        meta = {key: row[key] for key in ('status', 'hackathon_id', 'is_submitted') if key in row}
+        indexes[kind].add(row['id'], row['title'], row['description'], meta)
+
+    def _build(self):
+        # Note the journal position first: changes made during the build are replayed
+        position = self.position()
+        indexes = {kind: InvertedIndex() for kind in KINDS}
+        for kind in KINDS:
+            for row in self.documents(kind, None):
+                self._index(indexes, kind, row)
+        # Only a complete build replaces the indexes and moves the position
+        self.indexes = indexes
+        self.last_change = position
+
+    def sync(self):
+        """Bring the indexes up to date with the journal"""
+        with self._lock:
+            if self.indexes is None:
+                self._build()
+            changed = self.changes(self.last_change)
+            if not changed:
+                return
+            # Journal ids follow each other, so a gap before the first unseen
+            # change means the rows this index needed have been pruned
+            if changed[0]['id'] > self.last_change + 1 or any(row['kind'] == 'all' for row in changed):
+                self._build()
+                return
+            for kind in ('hackathon', 'team'):
+                ids = sorted({row['ref_id'] for row in changed if row['kind'] == kind})
+                if not ids:
+                    continue
+                reload = [(kind, ids)] if kind == 'hackathon' else [('team', ids), ('project', ids)]
+                for doc_kind, ref_ids in reload:
+                    rows = self.documents(doc_kind, ref_ids)
+                    if doc_kind != 'project':
+                        # Documents that no longer exist drop out
+                        for missing in set(ref_ids) - {row['id'] for row in rows}:
+                            self.indexes[doc_kind].remove(missing)
+                    for row in rows:
+                        self._index(self.indexes, doc_kind, row)
+            # Only now: if a reload failed, the next sync retries these changes
+            self.last_change = changed[-1]['id']
+
+    def search(self, kind, query, hackathon_id=None):
+        """Ranked (score, id) results of one kind that the public may see"""
+        self.sync()
+        with self._lock:
+            statuses = self.indexes['hackathon'].meta
+
+            def visible_hackathon(hackathon_id):
+                meta = statuses.get(hackathon_id)
+                return meta is not None and meta['status'] != 'draft'
+
+            if kind == 'hackathon':
+                accept = lambda meta: meta['status'] != 'draft'
+            elif kind == 'team':
+                accept = lambda meta: (visible_hackathon(meta['hackathon_id']) and
+                                       (hackathon_id is None or meta['hackathon_id'] == hackathon_id))
+            else:
+                accept = lambda meta: (meta['is_submitted'] and visible_hackathon(meta['hackathon_id']) and
+                                       (hackathon_id is None or meta['hackathon_id'] == hackathon_id))
+            return self.indexes[kind].search(query, accept)
+
+    def stats(self):
+        with self._lock:
+            if self.indexes is None:
+                return {'built': False}
+            return dict({kind: len(index) for kind, index in self.indexes.items()},
+                        built=True, last_change=self.last_change)
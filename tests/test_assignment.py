@@ -0,0 +1,108 @@
+from collections import Counter
+
+from assignment import plan_reviews
+
+
+def apply(reviews, add, remove):
+    return (set(reviews) | set(add)) - set(remove)
+
+
+def loads(reviews, jurors):
+    counts = Counter(jury_id for _, jury_id in reviews)
+    return [counts[jury_id] for jury_id in jurors]
+
+
+def per_project(reviews, projects):
+    counts = Counter(project_id for project_id, _ in reviews)
+    return {project_id: counts[project_id] for project_id in projects}
+
+
+def test_every_project_gets_its_reviews_with_even_loads():
+    projects, jurors = range(1, 11), [100, 101, 102, 103]
+    add, remove = plan_reviews(projects, jurors, [], 3)
+    assert remove == []
+    assert set(per_project(add, projects).values()) == {3}
+    assert max(loads(add, jurors)) - min(loads(add, jurors)) <= 1
+    assert len(set(add)) == len(add) == 30
+
+
+def test_fewer_jurors_than_reviews_wanted():
+    add, _ = plan_reviews([1, 2], [100, 101], [], 3)
+    assert add == [(1, 100), (1, 101), (2, 100), (2, 101)]
+
+
+def test_conflicts_are_never_assigned():
+    projects, jurors = range(1, 7), [100, 101, 102]
+    conflicts = {(1, 100), (2, 100), (3, 101)}
+    add, _ = plan_reviews(projects, jurors, [], 2, conflicts=conflicts)
+    assert not set(add) & conflicts
+    assert set(per_project(add, projects).values()) == {2}
+    assert max(loads(add, jurors)) - min(loads(add, jurors)) <= 1
+
+
+def test_conflicting_assignment_is_replaced():
+    add, remove = plan_reviews([1], [100, 101], [(1, 100)], 1, conflicts={(1, 100)})
+    assert (add, remove) == ([(1, 101)], [(1, 100)])
+
+
+def test_existing_assignments_are_kept():
+    reviews = [(1, 100), (2, 101)]
+    add, remove = plan_reviews([1, 2, 3], [100, 101, 102], reviews, 1)
+    assert remove == []
+    assert add == [(3, 102)]
+
+
+def test_up_to_date_plan_changes_nothing():
+    projects, jurors = range(1, 9), [100, 101, 102]
+    add, _ = plan_reviews(projects, jurors, [], 2)
+    assert plan_reviews(projects, jurors, add, 2) == ([], [])
+
+
+def test_lowered_target_drops_unstarted_reviews_of_the_busiest_jurors():
+    reviews = [(1, 100), (1, 101), (1, 102), (2, 100), (3, 100)]
+    add, remove = plan_reviews([1, 2, 3], [100, 101, 102], reviews, 2, started={(1, 101)})
+    after = apply(reviews, add, remove)
+    assert remove[0] == (1, 100)
+    assert (1, 101) in after
+    assert per_project(after, [1, 2, 3]) == {1: 2, 2: 2, 3: 2}
+
+
+def test_started_reviews_are_never_moved():
+    # Every review of juror 100 has an evaluation under way
+    reviews = [(project_id, 100) for project_id in range(1, 7)]
+    started = set(reviews)
+    add, remove = plan_reviews(range(1, 7), [100, 101], reviews, 1, started=started)
+    assert (add, remove) == ([], [])
+
+
+def test_started_review_of_a_withdrawn_project_stays_on_record():
+    add, remove = plan_reviews([2], [100], [(1, 100)], 1, started={(1, 100)})
+    assert (add, remove) == ([(2, 100)], [])
+
+
+def test_evaluation_made_before_assignment_counts_as_a_review():
+    add, remove = plan_reviews([1, 2], [100, 101], [], 1, started={(1, 101)})
+    assert (add, remove) == ([(1, 101), (2, 100)], [])
+
+
+def test_late_juror_takes_over_unstarted_reviews():
+    projects = range(1, 9)
+    add, _ = plan_reviews(projects, [100, 101], [], 1)
+    assert loads(add, [100, 101]) == [4, 4]
+
+    jurors = [100, 101, 102]
+    add2, remove2 = plan_reviews(projects, jurors, add, 1, started={(1, 100), (2, 101)})
+    after = apply(add, add2, remove2)
+    assert max(loads(after, jurors)) - min(loads(after, jurors)) <= 1
+    assert len(remove2) == len(add2) == 2
+    assert {(1, 100), (2, 101)} <= after
+    assert set(per_project(after, projects).values()) == {1}
+
+
+def test_departed_juror_reviews_are_reassigned():
+    reviews = [(1, 100), (2, 101)]
+    add, remove = plan_reviews([1, 2], [101, 102], reviews, 1)
+    assert remove == [(1, 100)]
+    assert len(add) == 1 and add[0][0] == 1
+    after = apply(reviews, add, remove)
+    assert loads(after, [101, 102]) == [1, 1]
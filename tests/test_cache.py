@@ -0,0 +1,137 @@
+import time
+
+from cache import MemoryBackend, PageCache
+from dashboard_data import DashboardCache
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == 1
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend()
+    backend.set('a', 1, ttl=0.01)
+    backend.set('b', 2)
+    time.sleep(0.02)
+    assert backend.get('a') is None
+    assert backend.get('b') == 2
+
+
+def test_memory_backend_counters_survive_eviction():
+    backend = MemoryBackend(max_entries=1)
+    assert backend.counter('tag:x') == 0
+    assert backend.incr('tag:x') == 1
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.counter('tag:x') == 1
+
+
+def test_page_cache_serves_hits_until_a_tag_is_invalidated():
+    cache = PageCache(MemoryBackend())
+    loader = Loader(['row'])
+    assert cache.get_or_set('rankings/1', ['hackathon:1', 'rankings:1'], loader) == ['row']
+    assert cache.get_or_set('rankings/1', ['hackathon:1', 'rankings:1'], loader) == ['row']
+    assert loader.calls == 1
+
+    cache.invalidate('rankings:1')
+    cache.get_or_set('rankings/1', ['hackathon:1', 'rankings:1'], loader)
+    assert loader.calls == 2
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'ttl': 60}
+
+
+def test_page_cache_invalidation_leaves_other_tags_alone():
+    cache = PageCache(MemoryBackend())
+    first, second = Loader(1), Loader(2)
+    cache.get_or_set('hackathon/1', ['hackathon:1'], first)
+    cache.get_or_set('hackathon/2', ['hackathon:2'], second)
+    cache.invalidate('hackathon:2')
+    cache.get_or_set('hackathon/1', ['hackathon:1'], first)
+    cache.get_or_set('hackathon/2', ['hackathon:2'], second)
+    assert (first.calls, second.calls) == (1, 2)
+
+
+def test_page_cache_clear_drops_every_entry():
+    cache = PageCache(MemoryBackend())
+    first, second = Loader(1), Loader(2)
+    cache.get_or_set('hackathons', ['hackathons'], first)
+    cache.get_or_set('hackathon/2', ['hackathon:2'], second)
+    cache.clear()
+    cache.get_or_set('hackathons', ['hackathons'], first)
+    cache.get_or_set('hackathon/2', ['hackathon:2'], second)
+    assert (first.calls, second.calls) == (2, 2)
+
+
+def test_page_cache_caches_none():
+    cache = PageCache(MemoryBackend())
+    loader = Loader(None)
+    assert cache.get_or_set('hackathon/9', ['hackathon:9'], loader) is None
+    assert cache.get_or_set('hackathon/9', ['hackathon:9'], loader) is None
+    assert loader.calls == 1
+
+
+def test_page_cache_with_zero_ttl_always_loads():
+    cache = PageCache(MemoryBackend(), ttl=0)
+    loader = Loader(1)
+    cache.get_or_set('hackathons', ['hackathons'], loader)
+    cache.get_or_set('hackathons', ['hackathons'], loader)
+    assert loader.calls == 2
+
+
+def test_page_cache_remembers_recent_invalidations():
+    cache = PageCache(MemoryBackend(), recent=5)
+    assert not cache.recently_invalidated(['hackathon:1'])
+    cache.invalidate('hackathon:1')
+    assert cache.recently_invalidated(['hackathon:1'])
+    assert not cache.recently_invalidated(['hackathon:2'])
+    assert not PageCache(MemoryBackend()).recently_invalidated(['hackathon:1'])
+
+
+def test_dashboard_cache_is_per_user_and_role():
+    cache = DashboardCache(MemoryBackend())
+    cache.set(1, 'jury', {'projects': []})
+    assert cache.get(1, 'jury') == {'projects': []}
+    assert cache.get(1, 'participant') is None
+    assert cache.get(2, 'jury') is None
+
+
+def test_dashboard_cache_invalidates_only_the_given_users():
+    cache = DashboardCache(MemoryBackend())
+    cache.set(1, 'participant', 'one')
+    cache.set(2, 'participant', 'two')
+    cache.invalidate(1)
+    assert cache.get(1, 'participant') is None
+    assert cache.get(2, 'participant') == 'two'
+
+
+def test_dashboard_cache_clear_drops_every_user():
+    cache = DashboardCache(MemoryBackend())
+    cache.set(1, 'participant', 'one')
+    cache.set(2, 'organizer', 'two')
+    cache.clear()
+    assert cache.get(1, 'participant') is None
+    assert cache.get(2, 'organizer') is None
+    cache.set(1, 'participant', 'again')
+    assert cache.get(1, 'participant') == 'again'
+
+
+def test_dashboard_cache_with_zero_ttl_stores_nothing():
+    cache = DashboardCache(MemoryBackend(), ttl=0)
+    cache.set(1, 'participant', 'one')
+    assert cache.get(1, 'participant') is None
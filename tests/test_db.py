@@ -0,0 +1,64 @@
+import pytest
+
+from db import IntegrityError, SQLitePool, translate_sql
+
+
+def test_parameters_become_question_marks():
+    assert translate_sql('SELECT * FROM users WHERE id = %s AND role = %s') == \
+        'SELECT * FROM users WHERE id = ? AND role = ?'
+
+
+def test_escaped_percent_signs_are_unescaped():
+    assert translate_sql("SELECT * FROM teams WHERE name LIKE 'a%%' AND id = %s") == \
+        "SELECT * FROM teams WHERE name LIKE 'a%' AND id = ?"
+
+
+def test_insert_ignore():
+    assert translate_sql('INSERT IGNORE INTO team_members (team_id, user_id) VALUES (%s, %s)') == \
+        'INSERT OR IGNORE INTO team_members (team_id, user_id) VALUES (?, ?)'
+    assert translate_sql('insert  ignore into t values (%s)') == 'INSERT OR IGNORE into t values (?)'
+
+
+def test_on_duplicate_key_update_with_values_references():
+    sql = ('INSERT INTO evaluations (project_id, jury_id, score) VALUES (%s, %s, %s) '
+           'ON DUPLICATE KEY UPDATE score = VALUES(score), jury_id = VALUES(jury_id)')
+    assert translate_sql(sql) == (
+        'INSERT INTO evaluations (project_id, jury_id, score) VALUES (?, ?, ?) '
+        'ON CONFLICT DO UPDATE SET score = excluded.score, jury_id = excluded.jury_id')
+
+
+def test_values_outside_the_update_clause_are_kept():
+    sql = 'INSERT INTO t (a) VALUES(%s) ON DUPLICATE KEY UPDATE a = VALUES(a)'
+    assert translate_sql(sql) == 'INSERT INTO t (a) VALUES(?) ON CONFLICT DO UPDATE SET a = excluded.a'
+
+
+def test_microsecond_timestamps():
+    assert translate_sql('UPDATE t SET updated_at = CURRENT_TIMESTAMP(6)') == \
+        "UPDATE t SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+
+def test_portable_statements_are_unchanged():
+    sql = 'SELECT id, name FROM hackathons WHERE status <> ? ORDER BY start_date DESC'
+    assert translate_sql(sql) == sql
+
+
+def test_translated_statements_run_on_sqlite(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'test.db'))
+    conn = pool.get()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute('CREATE TABLE scores (id INTEGER PRIMARY KEY, score REAL, '
+                   'updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    cursor.execute('INSERT INTO scores (id, score) VALUES (%s, %s)', (1, 4.0))
+    cursor.execute('INSERT IGNORE INTO scores (id, score) VALUES (%s, %s)', (1, 9.0))
+    cursor.execute('SELECT score FROM scores WHERE id = %s', (1,))
+    assert cursor.fetchone() == {'score': 4.0}
+
+    cursor.execute('INSERT INTO scores (id, score) VALUES (%s, %s) '
+                   'ON DUPLICATE KEY UPDATE score = VALUES(score), updated_at = CURRENT_TIMESTAMP(6)', (1, 7.5))
+    cursor.execute('SELECT score FROM scores WHERE id = %s', (1,))
+    assert cursor.fetchone() == {'score': 7.5}
+
+    with pytest.raises(IntegrityError):
+        cursor.execute('INSERT INTO scores (id, score) VALUES (%s, %s)', (1, 1.0))
+    pool.put(conn)
+    pool.close_all()
@@ -0,0 +1,68 @@
+import base64
+from datetime import datetime
+import json
+
+from pagination import (decode_cursor, encode_cursor, keyset_condition, keyset_params,
+                        page_size, split_page)
+
+
+def token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('2030-01-01 10:00:00', 7), 2) == ['2030-01-01 10:00:00', 7]
+    assert decode_cursor(encode_cursor(1.5, None), 2) == [1.5, None]
+
+
+def test_cursor_encodes_datetimes_as_strings():
+    cursor = encode_cursor(datetime(2030, 1, 1, 10, 0), 3)
+    assert decode_cursor(cursor, 2) == ['2030-01-01 10:00:00', 3]
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor('a' * 10, 123456)
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+
+
+def test_missing_or_malformed_cursor_is_none():
+    assert decode_cursor(None, 2) is None
+    assert decode_cursor('', 2) is None
+    assert decode_cursor('not base64!', 2) is None
+    assert decode_cursor(token({'a': 1}), 2) is None
+    assert decode_cursor(token('text'), 2) is None
+
+
+def test_cursor_of_the_wrong_length_is_none():
+    assert decode_cursor(token([1]), 2) is None
+    assert decode_cursor(token([1, 2, 3]), 2) is None
+
+
+def test_cursor_values_must_be_scalars():
+    assert decode_cursor(token([{}, 1]), 2) is None
+    assert decode_cursor(token([[1], 1]), 2) is None
+    assert decode_cursor(token(['x', {'id': 1}]), 2) is None
+
+
+def test_page_size_is_clamped():
+    assert page_size(None, 24, 100) == 24
+    assert page_size('abc', 24, 100) == 24
+    assert page_size('10', 24, 100) == 10
+    assert page_size('0', 24, 100) == 1
+    assert page_size('1000', 24, 100) == 100
+
+
+def test_keyset_condition():
+    assert keyset_condition(('a', 'b')) == '(a > %s OR (a = %s AND b > %s))'
+    assert keyset_condition(('a', 'b'), descending=True) == '(a < %s OR (a = %s AND b < %s))'
+    assert keyset_params(['x', 5]) == ('x', 'x', 5)
+
+
+def test_split_page():
+    rows = [{'at': i, 'id': i} for i in range(5)]
+    page, cursor = split_page(rows, 5, lambda r: (r['at'], r['id']))
+    assert page == rows and cursor is None
+
+    page, cursor = split_page(rows, 4, lambda r: (r['at'], r['id']))
+    assert page == rows[:4]
+    assert decode_cursor(cursor, 2) == [3, 3]
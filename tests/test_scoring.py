@@ -0,0 +1,132 @@
+import math
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from scoring import ScoringScheme, evaluation_array, final_scores
+
+
+def scores(results):
+    return {project_id: score for project_id, (score, _) in results.items()}
+
+
+def ranks(results):
+    return {project_id: rank for project_id, (_, rank) in results.items()}
+
+
+def row(project_id, jury_id, innovation, technical, presentation, usefulness):
+    return {'project_id': project_id, 'jury_id': jury_id, 'innovation_score': innovation,
+            'technical_score': technical, 'presentation_score': presentation,
+            'usefulness_score': usefulness}
+
+
+def test_no_evaluations():
+    assert final_scores([], ScoringScheme()) == {}
+
+
+def test_plain_mean_of_the_criteria():
+    results = final_scores([(1, 10, 8, 6, 4, 2), (1, 11, 10, 10, 10, 10), (2, 10, 5, 5, 5, 5)],
+                           ScoringScheme())
+    assert results == {1: (7.5, 1), 2: (5.0, 2)}
+
+
+def test_weights():
+    evaluations = [(1, 10, 10, 0, 0, 0), (2, 10, 0, 10, 0, 0)]
+    results = final_scores(evaluations, ScoringScheme([1, 3, 0, 0]))
+    assert scores(results) == {1: 2.5, 2: 7.5}
+    assert ranks(results) == {1: 2, 2: 1}
+
+
+def test_missing_criteria_are_left_out_of_the_weighted_mean():
+    results = final_scores([(1, 10, 8, None, 6, None)], ScoringScheme([1, 5, 1, 5]))
+    assert scores(results) == {1: 7.0}
+
+
+def test_evaluation_without_any_weighted_criterion_scores_zero():
+    results = final_scores([(1, 10, None, None, 9, 9)], ScoringScheme([1, 1, 0, 0]))
+    assert scores(results) == {1: 0.0}
+
+
+def test_trim_drops_the_highest_and_lowest_scores():
+    evaluations = [(1, jury_id, score, score, score, score)
+                   for jury_id, score in enumerate([0, 6, 7, 8, 10])]
+    assert scores(final_scores(evaluations, ScoringScheme())) == {1: 6.2}
+    assert scores(final_scores(evaluations, ScoringScheme(trim=0.2))) == {1: 7.0}
+
+
+def test_trim_keeps_at_least_one_score():
+    evaluations = [(1, 10, 2, 2, 2, 2), (1, 11, 8, 8, 8, 8)]
+    assert scores(final_scores(evaluations, ScoringScheme(trim=0.45))) == {1: 5.0}
+
+
+def test_zscore_weighs_strict_and_lenient_jurors_the_same():
+    # Juror 10 is lenient and juror 11 strict, but they agree on the order
+    evaluations = [(1, 10, 9, 9, 9, 9), (2, 10, 7, 7, 7, 7),
+                   (3, 11, 4, 4, 4, 4), (4, 11, 2, 2, 2, 2)]
+    plain = ranks(final_scores(evaluations, ScoringScheme()))
+    assert plain == {1: 1, 2: 2, 3: 3, 4: 4}
+
+    results = final_scores(evaluations, ScoringScheme(normalization='zscore'))
+    assert ranks(results) == {1: 1, 3: 1, 2: 3, 4: 3}
+    # The overall mean and spread are kept
+    values = list(scores(results).values())
+    assert sum(values) / len(values) == pytest.approx(5.5)
+    assert results[1][0] - results[2][0] == pytest.approx(2 * 2.6925824, abs=1e-5)
+
+
+def test_zscore_of_a_juror_with_equal_scores_is_the_mean():
+    evaluations = [(1, 10, 5, 5, 5, 5), (2, 10, 5, 5, 5, 5), (3, 11, 9, 9, 9, 9)]
+    results = final_scores(evaluations, ScoringScheme(normalization='zscore'))
+    mean = (5 + 5 + 9) / 3
+    assert scores(results) == pytest.approx({1: mean, 2: mean, 3: mean})
+    assert all(math.isfinite(score) for score in scores(results).values())
+
+
+def test_percentile_ranks_within_each_juror():
+    evaluations = [(1, 10, 1, 1, 1, 1), (2, 10, 2, 2, 2, 2), (3, 10, 3, 3, 3, 3), (4, 10, 4, 4, 4, 4),
+                   (1, 11, 9, 9, 9, 9), (2, 11, 8, 8, 8, 8)]
+    results = final_scores(evaluations, ScoringScheme(normalization='rank'))
+    # Juror 10: mid-rank percentiles 1/8, 3/8, 5/8, 7/8; juror 11: 3/4, 1/4
+    assert scores(results) == pytest.approx({1: (1.25 + 7.5) / 2, 2: (3.75 + 2.5) / 2,
+                                             3: 6.25, 4: 8.75})
+
+
+def test_percentile_ties_share_the_middle_rank():
+    evaluations = [(1, 10, 5, 5, 5, 5), (2, 10, 5, 5, 5, 5), (3, 10, 9, 9, 9, 9)]
+    results = final_scores(evaluations, ScoringScheme(normalization='rank'))
+    assert scores(results) == pytest.approx({1: 10 / 3, 2: 10 / 3, 3: 25 / 3})
+    assert ranks(results) == {3: 1, 1: 2, 2: 2}
+
+
+def test_ranks_skip_after_ties():
+    evaluations = [(1, 10, 9, 9, 9, 9), (2, 10, 7, 7, 7, 7), (3, 10, 7, 7, 7, 7), (4, 10, 1, 1, 1, 1)]
+    assert ranks(final_scores(evaluations, ScoringScheme([1, 2, 1, 1]))) == {1: 1, 2: 2, 3: 2, 4: 4}
+
+
+def test_evaluation_array_matches_tuples():
+    rows = [row(1, 10, 8, None, 6, 5), row(2, 10, 3, 4, 5, 6), row(2, 11, 9, 9, None, 9)]
+    array = evaluation_array(rows)
+    assert math.isnan(array['technical_score'][0])
+    scheme = ScoringScheme([2, 1, 1, 1], 'zscore', 0.1)
+    tuples = [tuple(r.values()) for r in rows]
+    assert final_scores(array, scheme) == final_scores(tuples, scheme)
+    assert len(evaluation_array(iter(rows))) == 3
+
+
+def test_scheme_errors():
+    assert ScoringScheme().errors() == []
+    assert ScoringScheme().is_plain_mean
+    assert not ScoringScheme([1, 2, 1, 1]).is_plain_mean
+    assert ScoringScheme([1, -1, 1, 1]).errors() == ['Criterion weights must be numbers of zero or more.']
+    assert ScoringScheme([0, 0, 0, 0]).errors() == ['At least one criterion needs a weight above zero.']
+    assert ScoringScheme(normalization='median').errors() == ['Unknown normalization: median.']
+    assert ScoringScheme(trim=0.5).errors() == ['Trim must be a number between 0 and 45%.']
+
+
+def test_non_finite_weights_and_trim_are_errors():
+    nan, inf = float('nan'), float('inf')
+    assert ScoringScheme([nan, 1, 1, 1]).errors() == ['Criterion weights must be numbers of zero or more.']
+    assert ScoringScheme([inf, 1, 1, 1]).errors() == ['Criterion weights must be numbers of zero or more.']
+    assert ScoringScheme(trim=nan).errors() == ['Trim must be a number between 0 and 45%.']
+    assert ScoringScheme(trim=inf).errors() == ['Trim must be a number between 0 and 45%.']
@@ -0,0 +1,14 @@
+"""
+Production entry point for the Hackathon Platform
+
+Serve with a pre-fork WSGI server, for example:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings come from the environment or the file named by HACKATHON_SETTINGS
+(see config.py).
+"""
+
+from app import create_app
+
+app = create_app()